@@ -12,28 +12,89 @@ class SafraConfig:
         self.PROCESSED_DIR = self.DATA_DIR / "processed"
         self.BACKUP_DIR = self.DATA_DIR / "backup"
         self.LOGS_DIR = self.BASE_DIR / "logs"
+        self.INGEST_CACHE_DIR = self.PROCESSED_DIR / "cache_ingestao"
+        self.SNAPSHOTS_DIR = self.PROCESSED_DIR / "snapshots"
         
         # Arquivos principais
         self.RELATORIO_DIARIO = "Relatorio_Diario.xlsx"
+        # Arquivo único legado (migrado automaticamente para BASE_HISTORICA_DIR)
         self.BASE_HISTORICA = "safra_base_historica.parquet"
+        # Dataset particionado: mes_criacao=AAAA-MM/provider=<Provider>/
+        self.BASE_HISTORICA_DIR = "base_historica"
+        # Log append-only de ordens alteradas (incorporado à base por main.py --compactar)
+        self.LOG_ALTERACOES_DIR = "log_alteracoes"
         self.DASHBOARD_DATA = "dashboard_data.parquet"
+        # Mapeamento Polo + SAP → líder (INPUT_DIR) e dimensão de providers (PROCESSED_DIR)
+        self.MAPEAMENTO_LIDERES = "pagresolve_regionais.xlsx"
+        self.DIMENSAO_PROVIDER = "dim_provider.parquet"
+        # Cache das decisões de correspondência aproximada de providers
+        self.CORRESPONDENCIAS_PROVIDER = "correspondencias_provider.parquet"
+        # Faixas de linhas por polo no dashboard_data (ordenado por Provider_Id)
+        self.INDICE_LIDERES = "indice_lideres.parquet"
+        # Relatórios publicados pelo ETL para o dashboard: um Parquet por data + catálogo
+        self.CATALOGO_SNAPSHOTS = "catalogo.json"
+        self.DESEMPENHO_LEITORES = "desempenho_leitores.json"
+        self.HASHES_LINHAS = "safra_hashes_linhas.parquet"
+        # Padrão de nome dos relatórios no modo lote (--diretorio)
+        self.PADRAO_RELATORIOS = "Relatorio_Diario*"
         
         # Configurações de processamento
         self.CHUNK_SIZE = 10000
         self.MAX_MEMORY_GB = 2.0
         self.BACKUP_RETENTION_DAYS = 30
+        # Motor de leitura de planilhas: 'auto' (mais rápido medido), 'calamine' ou 'openpyxl'
+        self.MOTOR_PLANILHA = "auto"
         
         # Regras de negócio
         self.PROVIDERS_EXCLUIDOS = ["TEFTI"]
         self.SLA_CLIENTE_MINIMO = 2
         self.COLUNAS_CHAVE = ["Ordem PagBank"]
         
+        # Regras de SLA: primeira faixa em que Dias_Em_Aberto <= fator × SLA Cliente
+        self.REGRAS_SLA = {
+            'coluna_sla': 'SLA Cliente',
+            'coluna_dias': 'Dias_Em_Aberto',
+            'faixas': [('No Prazo', 0.8), ('Atenção', 1.0)],
+            'acima': 'Vencido',
+            'indefinido': 'Indefinido'
+        }
+        self.PRIORIDADE_POR_STATUS_SLA = {
+            'mapa': {'Vencido': 'Alta', 'Atenção': 'Média'},
+            'padrao': 'Baixa'
+        }
+        # Envelhecimento das ordens: uma data de referência por execução no fuso
+        # de Brasília; dias úteis descontam fins de semana e feriados nacionais (BR)
+        # e da UF da ordem listados em FERIADOS_ARQUIVO (data;abrangencia;descricao)
+        self.FERIADOS_ARQUIVO = self.BASE_DIR / "config" / "feriados.csv"
+        self.ENVELHECIMENTO = {
+            'coluna_data': 'Criação da Ordem',
+            'coluna_uf': 'Estado',
+            'coluna_dias_corridos': 'Dias_Em_Aberto',
+            'coluna_dias_uteis': 'Dias_Uteis_Em_Aberto',
+            'fuso': 'America/Sao_Paulo',
+            'dias_semana_uteis': '1111100'
+        }
+        
+        # Urgência nos relatórios por polo: status crítico ou dias > SLA = 5;
+        # senão o primeiro nível em que Dias_Em_Aberto >= fator × SLA Cliente
+        self.NIVEIS_URGENCIA = {
+            'coluna_status': 'Status_SLA',
+            'coluna_sla': 'SLA Cliente',
+            'coluna_dias': 'Dias_Em_Aberto',
+            'status_critico': 'Vencido',
+            'sla_padrao': 999,
+            'faixas': [(4, 0.9), (3, 0.7), (2, 0.5)],
+            'descricoes': {
+                5: '🔴 CRÍTICO', 4: '🟠 ALTO', 3: '🟡 MÉDIO', 2: '🔵 BAIXO', 1: '⚪ NORMAL'
+            }
+        }
+        
         # Tipos de dados para conversão
         self.TIPOS_DADOS = {
             'numeros_inteiros': [
                 'Ordem PagBank', 'Ordem SAP', 'SLA Cliente', 'SLA Logística',
-                'Cód. Último Tracking', 'Ordem Workfinity', 'SLA', 'SLA Tracking',
-                'Dias_Em_Aberto'
+                'Cód. Último Tracking', 'Ordem Workfinity', 'Dias_Em_Aberto',
+                'Dias_Uteis_Em_Aberto'
             ],
             'datas': [
                 'Criação da Ordem', 'Início Indoor', 'Data Últ. Tracking Indoor',
@@ -46,10 +107,45 @@ class SafraConfig:
                 'Transportadora', 'Status Operação', 'Último Tracking',
                 'Status Integração', 'Estado', 'Região', 'Classif. Cidade',
                 'Origem', 'Cidade', 'status_da_ordem', 'tipo_da_ordem',
+                'SLA', 'SLA Tracking', 'Status Prazo 10 Dias', 'Status Prazo 10 Dias Tracking',
+                'Status Prazo Tracking Entrada', 'classificacao da ordem',
+                "'DAX-ORDENS_LOGISTICA'[nam_opl]", "'DAX-ORDENS_LOGISTICA'[opl]",
+                'operador_operacao', 'operador_operacao2', 'operador_sql',
                 'Status_Tratativa', 'Causa_Raiz', 'Feedback', 'Proxima_Acao', 'Alerta_SLA'
             ]
         }
         
+        # Modo categórico: colunas de texto repetidas em todas as ordens viram
+        # category no SafraTransformer e são gravadas como colunas dicionário no Parquet
+        self.MODO_CATEGORICO = True
+        self.COLUNAS_CATEGORICAS = [
+            'Provider', 'Status da Ordem', 'Tipo da Ordem', 'Estado', 'Cidade',
+            'Transportadora', 'Último Tracking', 'Lider', 'Provider_Normalizado'
+        ]
+        # Providers fora do mapeamento exato: mesmo código SAP ou similaridade de
+        # Dice entre n-gramas de caracteres >= similaridade_minima (nomes sem código)
+        self.CORRESPONDENCIA_PROVIDER = {
+            'tamanho_ngrama': 3,
+            'similaridade_minima': 0.8,
+            # Código SAP igual, mas nomes sem o código abaixo disso → sem líder (código suspeito)
+            'similaridade_minima_codigo': 0.5
+        }
+        # Valores distintos memorizados pelos normalizadores de Provider/Polo + SAP
+        self.NORMALIZACAO_CACHE_TAMANHO = 100_000
+        
+        # Formato das datas em texto no relatório (demais formatos: parse dia/mês)
+        self.FORMATO_DATA = "%d/%m/%Y"
+        # Valores tratados como nulos na leitura dos relatórios
+        self.VALORES_NA = ['', ' ', 'N/A', 'n/a', '#N/D', '#REF!', '#VALOR!']
+        
+        # Snapshot do dashboard publica todas as colunas do relatório (tabela e exportação);
+        # KPIs, cubo e formulário leem apenas estas
+        self.COLUNAS_METRICAS_DASHBOARD = [
+            'Provider', 'Provider_Normalizado', 'Provider_Id', 'Estado', 'Último Tracking', 'SLA Cliente'
+        ]
+        # Colunas internas do snapshot, fora da tabela e da exportação
+        self.COLUNAS_INTERNAS_DASHBOARD = ['Provider_Id']
+        
         # Colunas de feedback que devem ser preservadas
         self.COLUNAS_FEEDBACK = [
             'Status_Tratativa', 'Data_Status', 'Causa_Raiz', 'Feedback', 
@@ -63,7 +159,7 @@ class SafraConfig:
             'Data Últ. Tracking Indoor', 'Data Últ. Tracking Transporte',
             'Início Indoor', 'Início Transporte', 'Data Tracking',
             'Código Rastreio', 'Status Integração', 'Estado', 'Região',
-            'Classif. Cidade', 'Cidade', 'CEP'
+            'Classif. Cidade', 'Cidade', 'CEP', 'Provider_Normalizado', 'Provider_Id'
         ]
         
         # Criar diretórios automaticamente
@@ -72,7 +168,7 @@ class SafraConfig:
     def _criar_diretorios(self):
         """Cria diretórios necessários"""
         for dir_path in [self.DATA_DIR, self.INPUT_DIR, self.PROCESSED_DIR, 
-                        self.BACKUP_DIR, self.LOGS_DIR]:
+                        self.BACKUP_DIR, self.LOGS_DIR, self.INGEST_CACHE_DIR]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
 # Instância global
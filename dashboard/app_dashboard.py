@@ -3,9 +3,8 @@ import pandas as pd
 import io
 from pathlib import Path
 import sys
-import unicodedata
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import requests
 import json
 import base64
@@ -15,6 +14,18 @@ import re
 
 # Adicionar path do projeto
 sys.path.append(str(Path(__file__).parent.parent))
+from src.utils.leitor_planilhas import ler_planilha
+from src.etl.cubo_metricas import CuboMetricas, carregar_cubo
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.relatorio_dashboard import versao_arquivo
+from src.etl.snapshot_compartilhado import SnapshotCompartilhado
+from src.etl.snapshots import ArmazemSnapshots
+from config.settings import config
+
+# Copy-on-write (padrão no pandas 3): visões do snapshot compartilhado entre
+# sessões nunca alteram o original
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
 
 # Configuração de cores
 CORES = {
@@ -208,110 +219,6 @@ def calcular_semana_ano() -> Tuple[int, str]:
     return semana, periodo
 
 
-def remover_acentos(texto: str) -> str:
-    """
-    Remove acentos de uma string usando normalização Unicode.
-
-    Args:
-        texto (str): Texto a ser processado
-
-    Returns:
-        str: Texto sem acentos
-    """
-    if pd.isna(texto):
-        return ""
-    texto = str(texto)
-    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('ascii')
-
-
-def normalizar_provider(provider: str) -> str:
-    """
-    Normaliza o nome do provider removendo prefixos e acentos.
-
-    Args:
-        provider (str): Nome do provider
-
-    Returns:
-        str: Provider normalizado
-    """
-    if pd.isna(provider):
-        return ""
-
-    provider_str = str(provider).strip().upper()
-    if provider_str.startswith('POLO '):
-        provider_str = provider_str[5:]
-
-    return remover_acentos(provider_str)
-
-
-def normalizar_polo_sap(polo_sap: str) -> str:
-    """
-    Normaliza o nome do polo SAP removendo acentos.
-
-    Args:
-        polo_sap (str): Nome do polo SAP
-
-    Returns:
-        str: Polo SAP normalizado
-    """
-    if pd.isna(polo_sap):
-        return ""
-
-    polo_str = str(polo_sap).strip().upper()
-    return remover_acentos(polo_str)
-
-
-def calcular_metricas_safra(df_filtrado: pd.DataFrame) -> Dict[str, float]:
-    """
-    Calcula métricas principais da safra para um DataFrame filtrado.
-
-    Args:
-        df_filtrado (pd.DataFrame): DataFrame com dados filtrados
-
-    Returns:
-        Dict[str, float]: Dicionário com métricas calculadas
-    """
-    if df_filtrado.empty:
-        return {
-            'total_em_aberto': 0,
-            'em_atraso': 0,
-            'perc_atraso': 0.0,
-            'sla_medio': 0.0
-        }
-
-    total_em_aberto = len(df_filtrado)
-
-    if 'SLA Cliente' in df_filtrado.columns:
-        try:
-            sla_validos = pd.to_numeric(
-                df_filtrado['SLA Cliente'], errors='coerce').dropna()
-            if not sla_validos.empty:
-                em_atraso = len(sla_validos[sla_validos >= 2])
-                perc_atraso = round(
-                    (em_atraso / total_em_aberto * 100), 1) if total_em_aberto > 0 else 0.0
-                sla_medio = round(sla_validos.mean(), 1)
-            else:
-                em_atraso = 0
-                perc_atraso = 0.0
-                sla_medio = 0.0
-        except Exception as e:
-            # Em caso de erro, usar valores padrão
-            em_atraso = 0
-            perc_atraso = 0.0
-            sla_medio = 0.0
-    else:
-        em_atraso = 0
-        perc_atraso = 0.0
-        sla_medio = 0.0
-
-    return {
-        'total_em_aberto': total_em_aberto,
-        'em_atraso': em_atraso,
-        'perc_atraso': perc_atraso,
-        'sla_medio': sla_medio
-    }
-
-
 def calcular_deltas(metricas_hoje: Dict[str, float], metricas_ontem: Dict[str, float]) -> Dict[str, float]:
     """
     Calcula as diferenças entre métricas de hoje e ontem.
@@ -331,9 +238,22 @@ def calcular_deltas(metricas_hoje: Dict[str, float], metricas_ontem: Dict[str, f
     }
 
 
+def remover_colunas_internas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove as colunas internas do snapshot (config.COLUNAS_INTERNAS_DASHBOARD).
+
+    Args:
+        df (pd.DataFrame): Ordens do snapshot
+
+    Returns:
+        pd.DataFrame: Ordens com as colunas do relatório exibidas na tabela e exportação
+    """
+    return df.drop(columns=[coluna for coluna in config.COLUNAS_INTERNAS_DASHBOARD if coluna in df.columns])
+
+
 def preparar_dataframe_para_excel(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Prepara DataFrame para exportação Excel removendo timezone das colunas datetime.
+    Prepara DataFrame para exportação Excel removendo colunas internas e timezone das colunas datetime.
 
     Args:
         df (pd.DataFrame): DataFrame original
@@ -341,7 +261,7 @@ def preparar_dataframe_para_excel(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame preparado para Excel
     """
-    df_export = df.copy()
+    df_export = remover_colunas_internas(df)
 
     # Identificar e converter colunas com timezone
     cols_with_tz = [
@@ -499,26 +419,20 @@ def criar_grafico_comparacao(metricas_hoje: Dict[str, float], metricas_ontem: Di
     return fig, CONFIG_PLOT
 
 
-def criar_graficos_ultimo_tracking(df_em_aberto: pd.DataFrame) -> Tuple[Optional[go.Figure], Optional[go.Figure], Dict]:
+def criar_graficos_ultimo_tracking(status_counts: pd.Series, total_em_aberto: int) -> Tuple[Optional[go.Figure], Optional[go.Figure], Dict]:
     """
     Cria gráficos de pizza (%) e barras (quantidade) para último tracking.
 
     Args:
-        df_em_aberto (pd.DataFrame): DataFrame com ordens em aberto
+        status_counts (pd.Series): Ordens em aberto por último tracking (decrescente)
+        total_em_aberto (int): Total de ordens em aberto (inclui tracking vazio)
 
     Returns:
         Tuple[Optional[go.Figure], Optional[go.Figure], Dict]: Gráfico pizza, barras e configuração
     """
-    if df_em_aberto.empty or 'Último Tracking' not in df_em_aberto.columns:
+    if status_counts.empty or total_em_aberto == 0:
         return None, None, CONFIG_PLOT
 
-    status_counts = df_em_aberto['Último Tracking'].value_counts()
-
-    if status_counts.empty:
-        return None, None, CONFIG_PLOT
-
-    total_em_aberto = len(df_em_aberto)
-
     df_status = pd.DataFrame({
         'Status': status_counts.index,
         'Quantidade': status_counts.values,
@@ -719,155 +633,411 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Fragmento (Streamlit >= 1.37): o envio do formulário reexecuta só a sua seção;
+# em versões anteriores o st.form ainda agrupa a digitação num único envio
+fragmento = getattr(st, 'fragment', lambda funcao: funcao)
+
+
+@fragmento
+def formulario_justificativas(lider: str, semana_atual: int, periodo_atual: str,
+                              metricas_polos: Dict[str, Dict[str, float]]) -> None:
+    """
+    Formulário de justificativas dos polos do líder, com envio para o Logic Apps.
+
+    Os campos ficam num st.form: digitar não reexecuta o script, e o envio é
+    o único gatilho. Como fragmento, o envio reexecuta só esta seção (sem
+    refazer filtros, métricas, gráficos e a tabela do dashboard).
+
+    Args:
+        lider (str): Líder selecionado
+        semana_atual (int): Semana do ano
+        periodo_atual (str): Período da semana (dd/mm a dd/mm)
+        metricas_polos (Dict[str, Dict[str, float]]): Métricas de cada polo do líder
+    """
+    with st.form("formulario_justificativas"):
+        # Lista para armazenar dados do formulário
+        polos_formulario = []
+
+        for polo, metricas_polo in metricas_polos.items():
+            # Determinar classe do card
+            if metricas_polo['perc_atraso'] >= 30:  # Critico
+                card_class = "polo-card-critico"
+                status_emoji = "🔴"
+            elif metricas_polo['perc_atraso'] >= 20:  # Atenção
+                card_class = "polo-card-atencao"
+                status_emoji = "🟡"
+            else:  # OK
+                card_class = "polo-card-ok"
+                status_emoji = "🟢"
+
+            # Card do polo
+            st.markdown(f"""
+            <div class="{card_class}">
+                <h5>{status_emoji} {polo}</h5>
+                <p>📊 <strong>Ordens em Aberto:</strong> {metricas_polo['total_em_aberto']}</p>
+                <p>⚠️ <strong>Em Atraso (≥2 dias):</strong> {metricas_polo['em_atraso']} ({metricas_polo['perc_atraso']:.1f}%)</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            # Campos de justificativa
+            # Adiciona a classe 'campo-obrigatorio' se for crítico
+            is_obrigatorio = metricas_polo['perc_atraso'] >= 20
+            label_justificativa = f"📝 Justificativa para {polo}:"
+            if is_obrigatorio:
+                label_justificativa = f"<span class='campo-obrigatorio'>{label_justificativa}</span>"
+
+            justificativa = st.text_area(
+                label_justificativa,
+                key=f"just_{polo}",
+                height=100,
+                placeholder="Descreva os motivos dos atrasos..." if metricas_polo[
+                    'perc_atraso'] > 0 else "Polo sem atrasos",
+                help="Campo obrigatório se o percentual de atraso for 20% ou mais." if is_obrigatorio else ""
+            )
+
+            acao_corretiva = st.text_area(
+                f"🔧 Ação Corretiva para {polo}:",
+                key=f"acao_{polo}",
+                height=100,
+                placeholder="(Opcional) Descreva ações planejadas ou deixe em branco"
+            )
+
+            # Armazenar dados
+            polos_formulario.append({
+                'nome': polo,
+                'ordens_em_aberto': metricas_polo['total_em_aberto'],
+                'ordens_em_atraso': metricas_polo['em_atraso'],
+                'perc_atraso': metricas_polo['perc_atraso'],
+                'justificativa': justificativa,
+                'acao_corretiva': acao_corretiva
+            })
+
+        # Observações gerais
+        st.markdown("**💬 Observações Gerais:**")
+        observacoes = st.text_area(
+            "Comentários adicionais:",
+            height=100,
+            placeholder="Observações sobre a semana..."
+        )
+
+        # Botão de envio para Logic Apps
+        enviado = st.form_submit_button("🚀 Enviar para Azure Logic Apps", type="primary")
+
+    if not enviado:
+        return
+
+    # Validar campos obrigatórios (apenas justificativa para polos críticos)
+    erros = []
+    for polo in polos_formulario:
+        if polo['perc_atraso'] >= 20:  # Se o polo tem 20% ou mais de atraso
+            if not polo['justificativa'].strip():
+                erros.append(
+                    f"Justificativa obrigatória para {polo['nome']} (% atraso ≥ 20%)")
+            # Ação Corretiva NÃO é obrigatória
+
+    if erros:
+        for erro in erros:
+            mostrar_mensagem_status('error', erro)
+    else:
+        # Preparar dados para envio
+        dados_formulario = {
+            'data': datetime.now().strftime('%d/%m/%Y'),
+            'semana': f"Semana {semana_atual} ({periodo_atual})",
+            'lider': lider,
+            'polos': polos_formulario,
+            'observacoes': observacoes
+        }
+
+        # Enviar para Logic Apps
+        with st.spinner("🚀 Enviando para Azure Logic Apps..."):
+            sucesso, mensagem = enviar_para_power_automate(
+                dados_formulario)
+
+            if sucesso:
+                st.markdown(f"""
+                <div class="webhook-success">
+                    <h4>✅ Justificativas Enviadas com Sucesso!</h4>
+                    <p>{mensagem}</p>
+                    <p><strong>🔗 Processamento:</strong> Azure Logic Apps está processando os dados</p>
+                    <p><strong>📧 Notificação:</strong> Você receberá um card no Teams com o link para o Excel no SharePoint</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+                st.balloons()
+
+                # Mostrar resumo
+                total_polos = len(polos_formulario)
+                polos_criticos = len(
+                    [p for p in polos_formulario if p['perc_atraso'] >= 20])
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Total de Polos", total_polos)
+                with col2:
+                    st.metric("Polos Críticos", polos_criticos)
+                with col3:
+                    st.metric("Status", "✅ Enviado")
+
+                # Informações adicionais
+                st.markdown("### 📋 Próximos Passos")
+                st.info("""
+                1. **Azure Logic Apps** processará os dados automaticamente.
+                2. O arquivo Excel será salvo no **SharePoint**.
+                3. Um **card no Teams** será enviado com o link direto para o arquivo.
+                """)
+
+                # Obter o link do Excel salvo no SharePoint
+                # Este é um exemplo de como você pode obter o link do arquivo
+                # Você precisará de uma lógica para obter o caminho do arquivo no SharePoint
+                # e gerar um link direto.
+                # Por enquanto, vamos apenas mostrar uma mensagem de sucesso.
+                # Para obter o link real, você precisaria de uma integração com o SharePoint
+                # ou uma API que retorne o link do arquivo.
+                # Por exemplo:
+                # excel_url = "https://universoonline.sharepoint.com/sites/SafraDashboard/Shared%20Documents/Relatorio_Diario.xlsx"
+                # adaptive_card_payload = montar_adaptive_card_teams(dados_formulario, excel_url)
+                # response = requests.post(webhook_teams_url, json=adaptive_card_payload)
+                # print(response.status_code, response.text)
+
+            else:
+                mostrar_mensagem_status('error', mensagem)
+
+                # Oferecer download como backup
+                st.markdown("### 💾 Backup - Download Manual")
+                st.warning(
+                    "Como o envio falhou, você pode baixar os dados manualmente:")
+
+                try:
+                    # Gerar Excel de backup
+                    excel_buffer = io.BytesIO()
+                    linhas_excel = []
+                    for polo in dados_formulario['polos']:
+                        linhas_excel.append({
+                            'Data': dados_formulario['data'],
+                            'Semana': dados_formulario['semana'],
+                            'Líder': dados_formulario['lider'],
+                            'Polo': polo['nome'],
+                            'Ordens_Em_Aberto': polo['ordens_em_aberto'],
+                            'Ordens_Em_Atraso': polo['ordens_em_atraso'],
+                            'Perc_Atraso': polo['perc_atraso'],
+                            'Justificativa': polo['justificativa'],
+                            'Acao_Corretiva': polo['acao_corretiva'],
+                            'Observacoes': dados_formulario['observacoes']
+                        })
+
+                    df_backup = pd.DataFrame(linhas_excel)
+                    df_backup.to_excel(excel_buffer, index=False)
+
+                    nome_arquivo_backup = f"Backup_Justificativas_{sanitizar_nome_arquivo(dados_formulario['lider'])}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+
+                    st.download_button(
+                        "📥 Download Backup Excel",
+                        data=excel_buffer.getvalue(),
+                        file_name=nome_arquivo_backup,
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+
+                except Exception as e:
+                    st.error(f"Erro ao gerar backup: {e}")
+
+
 # Cache para dados
 
 
-@st.cache_data(ttl=300)
-def carregar_dados_comparativo() -> Dict[str, pd.DataFrame]:
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obter_dimensao_provider(caminho: str, versao: int, versao_dimensao: Optional[int]) -> Optional[DimensaoProvider]:
     """
-    Carrega dados comparativos de hoje e ontem com cache.
+    Dimensão de providers com os líderes do mapeamento, uma por processo.
+
+    Recriada quando o mapeamento ou a dimensão gravada pelo ETL (novos
+    Provider_Id) mudam de versão.
+
+    Args:
+        caminho (str): Caminho do mapeamento
+        versao (int): mtime em ns do mapeamento
+        versao_dimensao (Optional[int]): mtime em ns da dimensão persistida
 
     Returns:
-        Dict[str, pd.DataFrame]: Dados de hoje e ontem
+        Optional[DimensaoProvider]: Dimensão (None se o mapeamento estiver vazio)
     """
-    dados = {}
+    df_mapeamento = ler_planilha(caminho)
+    if df_mapeamento.empty:
+        return None
+    return DimensaoProvider.carregar_ou_construir(df_mapeamento)
 
-    # Dados de hoje
-    try:
-        arquivo_hoje = Path('data/input/Relatorio_Diario1.xlsx')
-        if arquivo_hoje.exists():
-            dados['hoje'] = pd.read_excel(arquivo_hoje)
-            mostrar_mensagem_status(
-                'success', f"Dados de HOJE: {len(dados['hoje']):,} registros")
-        else:
-            dados['hoje'] = pd.DataFrame()
-            mostrar_mensagem_status(
-                'warning', "Arquivo de dados de hoje não encontrado")
-    except Exception as e:
-        mostrar_mensagem_status(
-            'error', f"Erro ao carregar dados de hoje: {e}")
-        dados['hoje'] = pd.DataFrame()
 
-    # Dados de ontem
-    try:
-        arquivo_ontem = Path('data/input/Relatorio_Diario2.xlsx')
-        if arquivo_ontem.exists():
-            dados['ontem'] = pd.read_excel(arquivo_ontem)
-            mostrar_mensagem_status(
-                'success', f"Dados de ONTEM: {len(dados['ontem']):,} registros")
-        else:
-            dados['ontem'] = pd.DataFrame()
-            mostrar_mensagem_status(
-                'info', "Arquivo de dados de ontem não encontrado")
-    except Exception as e:
-        mostrar_mensagem_status(
-            'warning', f"Dados de ontem não disponíveis: {e}")
-        dados['ontem'] = pd.DataFrame()
+@st.cache_resource(max_entries=4, show_spinner=False)
+def obter_snapshot_compartilhado(caminho: str, data_relatorio: date, versao: int,
+                                 _dimensao: DimensaoProvider, versao_dimensao: Tuple) -> SnapshotCompartilhado:
+    """
+    Snapshot publicado pelo ETL, preparado uma vez e compartilhado por todas as sessões.
 
-    return dados
+    Ao contrário de st.cache_data, não há pickle nem cópia por sessão: todas
+    recebem o mesmo objeto, que é somente leitura. Uma nova publicação do
+    ETL (mtime) ou um novo mapeamento geram outra entrada.
+
+    Args:
+        caminho (str): Caminho do Parquet publicado
+        data_relatorio (date): Data do relatório
+        versao (int): mtime em ns do arquivo
+        _dimensao (DimensaoProvider): Dimensão de providers (fora da chave)
+        versao_dimensao (Tuple): Versões do mapeamento e da dimensão
+
+    Returns:
+        SnapshotCompartilhado: Fato agrupado por líder, índice e cubo
+    """
+    return SnapshotCompartilhado.carregar(Path(caminho), data_relatorio, _dimensao)
 
 
-@st.cache_data(ttl=3600)
-def carregar_mapeamento() -> pd.DataFrame:
+@st.cache_resource(max_entries=4, show_spinner=False)
+def obter_cubo_compartilhado(caminho: str, data_relatorio: date, versao: int,
+                             _dimensao: DimensaoProvider, versao_dimensao: Tuple) -> CuboMetricas:
     """
-    Carrega mapeamento de regionais com cache.
+    Cubo de métricas de uma data de comparação, com líderes, compartilhado pelo processo.
+
+    Args:
+        caminho (str): Caminho do Parquet do relatório
+        data_relatorio (date): Data do relatório
+        versao (int): mtime em ns do relatório
+        _dimensao (DimensaoProvider): Dimensão de providers (fora da chave)
+        versao_dimensao (Tuple): Versões do mapeamento e da dimensão
 
     Returns:
-        pd.DataFrame: Dados de mapeamento
+        CuboMetricas: Cubo para os KPIs de comparação
     """
-    try:
-        df_map = pd.read_excel('data/input/pagresolve_regionais.xlsx')
-        # Pré-processar mapeamento para otimizar joins
-        df_map['Polo_SAP_Normalizado'] = df_map['Polo + SAP'].apply(
-            normalizar_polo_sap)
-        return df_map
-    except Exception as e:
-        mostrar_mensagem_status('error', f"Erro ao carregar mapeamento: {e}")
-        return pd.DataFrame()
+    return carregar_cubo(Path(caminho), data_relatorio).com_lideres(_dimensao)
 
 
-# Carregar dados
-dados_comparativo = carregar_dados_comparativo()
-df_mapeamento = carregar_mapeamento()
+def selecionar_datas_comparacao(datas: List[date]) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Seleciona, na barra lateral, a data de referência e a data de comparação.
 
-if df_mapeamento.empty or dados_comparativo['hoje'].empty:
-    mostrar_mensagem_status(
-        'error', "Dados essenciais não encontrados. Verifique os arquivos de entrada.")
-    st.stop()
+    Args:
+        datas (List[date]): Datas do catálogo de snapshots (mais recente primeiro)
 
-# Processar dados
-df_hoje = dados_comparativo['hoje'][dados_comparativo['hoje']
-                                    ['Provider'] != 'TEFTI'].copy()
-tem_dados_ontem = not dados_comparativo['ontem'].empty
+    Returns:
+        Tuple[Optional[date], Optional[date]]: Data de "hoje" e de "ontem"
+    """
+    if not datas:
+        return None, None
 
-if tem_dados_ontem:
-    df_ontem = dados_comparativo['ontem'][dados_comparativo['ontem']
-                                          ['Provider'] != 'TEFTI'].copy()
-else:
-    df_ontem = pd.DataFrame()
+    with st.sidebar:
+        st.markdown("### 📅 Datas do Relatório")
+        data_hoje = st.selectbox(
+            "Data de referência:", datas, format_func=lambda d: d.strftime('%d/%m/%Y'))
+
+        outras = [d for d in datas if d != data_hoje]
+        if not outras:
+            return data_hoje, None
+
+        # Padrão: o relatório publicado imediatamente antes da referência
+        anteriores = [posicao for posicao, d in enumerate(outras) if d < data_hoje]
+        data_ontem = st.selectbox(
+            "Comparar com:", outras, index=anteriores[0] if anteriores else 0,
+            format_func=lambda d: d.strftime('%d/%m/%Y'))
+
+    return data_hoje, data_ontem
 
 
-def processar_dados_com_lider(df: pd.DataFrame) -> pd.DataFrame:
+def carregar_dados_comparativo(data_hoje: Optional[date], data_ontem: Optional[date],
+                               dimensao: DimensaoProvider, versao_dimensao: Tuple) -> Dict[str, object]:
     """
-    Processa dados adicionando informação do líder.
+    Obtém os snapshots compartilhados das datas de hoje e ontem.
+
+    De ontem só é lido o cubo de métricas: a comparação usa apenas os KPIs.
 
     Args:
-        df (pd.DataFrame): DataFrame original
+        data_hoje (Optional[date]): Data de referência
+        data_ontem (Optional[date]): Data de comparação
+        dimensao (DimensaoProvider): Dimensão de providers
+        versao_dimensao (Tuple): Versões do mapeamento e da dimensão
 
     Returns:
-        pd.DataFrame: DataFrame com coluna de líder
+        Dict[str, object]: Snapshot compartilhado de hoje e cubo de ontem
     """
-    if df.empty:
-        return df
+    dados = {'hoje': None, 'cubo_ontem': None}
 
-    df_processado = df.copy()
-    df_processado['Provider_Normalizado'] = df_processado['Provider'].apply(
-        normalizar_provider)
+    for dia, data_relatorio in {'hoje': data_hoje, 'ontem': data_ontem}.items():
+        arquivo = armazem_snapshots.arquivo(data_relatorio) if data_relatorio else None
+        try:
+            if arquivo is not None:
+                if dia == 'hoje':
+                    dados['hoje'] = obter_snapshot_compartilhado(
+                        str(arquivo), data_relatorio, versao_arquivo(arquivo), dimensao, versao_dimensao)
+                    cubo = dados['hoje'].cubo
+                else:
+                    cubo = dados['cubo_ontem'] = obter_cubo_compartilhado(
+                        str(arquivo), data_relatorio, versao_arquivo(arquivo), dimensao, versao_dimensao)
+                mostrar_mensagem_status(
+                    'success', f"Dados de {dia.upper()}: {cubo.total:,} registros")
+            elif dia == 'hoje':
+                mostrar_mensagem_status(
+                    'warning', "Nenhum relatório publicado - execute o ETL (python main.py)")
+            else:
+                mostrar_mensagem_status(
+                    'info', "Relatório de ontem não encontrado")
+        except Exception as e:
+            mostrar_mensagem_status(
+                'error' if dia == 'hoje' else 'warning', f"Erro ao carregar dados de {dia}: {e}")
 
-    df_com_lider = df_processado.merge(
-        df_mapeamento[['Polo_SAP_Normalizado', 'Líder PagResolve']],
-        left_on='Provider_Normalizado',
-        right_on='Polo_SAP_Normalizado',
-        how='left'
-    ).rename(columns={'Líder PagResolve': 'Lider'})
+    return dados
 
-    return df_com_lider
 
+def carregar_dimensao_provider() -> Tuple[Optional[DimensaoProvider], Tuple]:
+    """
+    Carrega a dimensão de providers (Provider_Id → líder) compartilhada.
 
-# Processar dados com líder
-df_hoje_com_lider = processar_dados_com_lider(df_hoje)
-if tem_dados_ontem:
-    df_ontem_com_lider = processar_dados_com_lider(df_ontem)
-else:
-    df_ontem_com_lider = pd.DataFrame()
+    Returns:
+        Tuple[Optional[DimensaoProvider], Tuple]: Dimensão e suas versões
+    """
+    arquivo = config.INPUT_DIR / config.MAPEAMENTO_LIDERES
+    versao_dimensao = (versao_arquivo(arquivo),
+                       versao_arquivo(config.PROCESSED_DIR / config.DIMENSAO_PROVIDER))
+    try:
+        return obter_dimensao_provider(str(arquivo), *versao_dimensao), versao_dimensao
+    except Exception as e:
+        mostrar_mensagem_status('error', f"Erro ao carregar mapeamento: {e}")
+        return None, versao_dimensao
 
-# Verificar associação
-com_lider_hoje = df_hoje_com_lider['Lider'].notna().sum()
 
-if com_lider_hoje > 0:
-    lideres = ['TODOS'] + \
-        sorted(df_hoje_com_lider['Lider'].dropna().unique().tolist())
+# Carregar dados
+armazem_snapshots = ArmazemSnapshots()
+data_hoje, data_ontem = selecionar_datas_comparacao(armazem_snapshots.datas())
+dimensao_provider, versao_dimensao = carregar_dimensao_provider()
+dados_comparativo = carregar_dados_comparativo(
+    data_hoje, data_ontem, dimensao_provider, versao_dimensao) if dimensao_provider is not None else {}
+snapshot_hoje = dados_comparativo.get('hoje')
+
+if snapshot_hoje is None or snapshot_hoje.df.empty:
+    mostrar_mensagem_status(
+        'error', "Dados essenciais não encontrados. Verifique os arquivos de entrada.")
+    st.stop()
+
+# Snapshot compartilhado pelo processo (TEFTI já excluído pelo ETL, líderes já associados):
+# as sessões só leem visões dele, sem copiar o fato
+indice_hoje = snapshot_hoje.indice
+cubo_ontem = dados_comparativo['cubo_ontem']
+tem_dados_ontem = cubo_ontem is not None and cubo_ontem.total > 0
+
+if snapshot_hoje.lideres():
+    lideres = ['TODOS'] + snapshot_hoje.lideres()
 
     st.markdown('<h3 class="titulo-secao">🎯 Seleção de Líder</h3>',
                 unsafe_allow_html=True)
     lider_selecionado = st.selectbox(
         "Selecione o líder:", lideres, label_visibility="collapsed")
 
-    # Filtrar dados
-    if lider_selecionado == 'TODOS':
-        df_hoje_filtrado = df_hoje_com_lider.copy()
-    else:
-        df_hoje_filtrado = df_hoje_com_lider[df_hoje_com_lider['Lider'] == lider_selecionado].copy(
-        )
+    # Filtrar dados: visão (fatia contígua) do fato compartilhado, sem cópia
+    lider_filtro = None if lider_selecionado == 'TODOS' else lider_selecionado
+    df_hoje_filtrado = snapshot_hoje.linhas(lider_filtro)
 
-    if tem_dados_ontem and not df_ontem_com_lider.empty:
-        if lider_selecionado == 'TODOS':
-            df_ontem_filtrado = df_ontem_com_lider.copy()
-        else:
-            df_ontem_filtrado = df_ontem_com_lider[df_ontem_com_lider['Lider'] == lider_selecionado].copy(
-            )
+    # Métricas, ranking e gráficos saem do cubo (poucas linhas por líder)
+    cubo_hoje_filtrado = snapshot_hoje.cubo_do_lider(lider_filtro)
+    if tem_dados_ontem:
+        cubo_ontem_filtrado = cubo_ontem if lider_filtro is None else cubo_ontem.do_lider(lider_filtro)
     else:
-        df_ontem_filtrado = pd.DataFrame()
+        cubo_ontem_filtrado = None
+    total_ontem_filtrado = cubo_ontem_filtrado.total if cubo_ontem_filtrado is not None else 0
 
     # Mostrar informações do filtro
     st.markdown(
@@ -875,19 +1045,19 @@ if com_lider_hoje > 0:
 
     if tem_dados_ontem:
         st.markdown(
-            f'<div class="info-box">📊 Dados de ONTEM ({lider_selecionado}): {len(df_ontem_filtrado):,} registros</div>', unsafe_allow_html=True)
+            f'<div class="info-box">📊 Dados de ONTEM ({lider_selecionado}): {total_ontem_filtrado:,} registros</div>', unsafe_allow_html=True)
 
     # Mostrar polos do líder
     if lider_selecionado != 'TODOS' and not df_hoje_filtrado.empty:
-        polos = df_hoje_filtrado['Provider'].unique()
+        polos = indice_hoje.polos_do_lider(lider_selecionado)
         st.markdown(
             f'<div class="info-box">🏢 <strong>Polos:</strong> {", ".join(polos)}</div>', unsafe_allow_html=True)
 
     # Calcular métricas
-    metricas_hoje = calcular_metricas_safra(df_hoje_filtrado)
+    metricas_hoje = cubo_hoje_filtrado.metricas()
 
-    if tem_dados_ontem and not df_ontem_filtrado.empty:
-        metricas_ontem = calcular_metricas_safra(df_ontem_filtrado)
+    if total_ontem_filtrado > 0:
+        metricas_ontem = cubo_ontem_filtrado.metricas()
         deltas = calcular_deltas(metricas_hoje, metricas_ontem)
         mostrar_comparacao = True
     else:
@@ -1012,40 +1182,32 @@ if com_lider_hoje > 0:
         st.markdown(
             '<h3 class="titulo-secao">🏆 Ranking: Polos com Mais Ordens em Atraso (Hoje)</h3>', unsafe_allow_html=True)
 
-        if 'SLA Cliente' in df_hoje_filtrado.columns:
-            sla_validos = pd.to_numeric(
-                df_hoje_filtrado['SLA Cliente'], errors='coerce')
-            em_atraso_df = df_hoje_filtrado[sla_validos >= 2]
-
-            if not em_atraso_df.empty:
-                ranking = em_atraso_df['Provider'].value_counts()
-                fig, config = criar_ranking_vertical(ranking)
+        ranking = cubo_hoje_filtrado.ranking_atraso()
+        fig, config_ranking = criar_ranking_vertical(ranking)
 
-                if fig:
-                    st.plotly_chart(
-                        fig, use_container_width=True, config=config)
+        if fig:
+            st.plotly_chart(
+                fig, use_container_width=True, config=config_ranking)
 
     # Análise do Último Tracking das Ordens em Aberto
     if metricas_hoje['total_em_aberto'] > 0:
         st.markdown(
             '<h3 class="titulo-secao">📋 Status das Ordens em Aberto (Último Tracking)</h3>', unsafe_allow_html=True)
 
-        df_em_aberto = df_hoje_filtrado.copy()
-
-        if 'Último Tracking' in df_em_aberto.columns and not df_em_aberto.empty:
-            fig_pizza, fig_barras, config = criar_graficos_ultimo_tracking(
-                df_em_aberto)
+        if 'Último Tracking' in df_hoje_filtrado.columns:
+            fig_pizza, fig_barras, config_tracking = criar_graficos_ultimo_tracking(
+                cubo_hoje_filtrado.contagem_tracking(), metricas_hoje['total_em_aberto'])
 
             if fig_pizza and fig_barras:
                 col1, col2 = st.columns(2)
 
                 with col1:
                     st.plotly_chart(
-                        fig_pizza, use_container_width=True, config=config)
+                        fig_pizza, use_container_width=True, config=config_tracking)
 
                 with col2:
                     st.plotly_chart(
-                        fig_barras, use_container_width=True, config=config)
+                        fig_barras, use_container_width=True, config=config_tracking)
             else:
                 mostrar_mensagem_status(
                     'info', "Dados de 'Último Tracking' não disponíveis ou insuficientes")
@@ -1065,7 +1227,7 @@ if com_lider_hoje > 0:
                 50, 100, 200, 500, 1000], index=1)
 
         # Usar height para melhor experiência
-        st.dataframe(df_hoje_filtrado.head(max_registros),
+        st.dataframe(remover_colunas_internas(df_hoje_filtrado.head(max_registros)),
                      use_container_width=True, height=400)
         st.caption(
             f"Mostrando {min(max_registros, len(df_hoje_filtrado)):,} de {len(df_hoje_filtrado):,} registros")
@@ -1120,194 +1282,13 @@ if com_lider_hoje > 0:
         </div>
         """, unsafe_allow_html=True)
 
-        # Obter polos do líder
-        polos_lider = df_hoje_filtrado['Provider'].unique()
-
-        # Lista para armazenar dados do formulário
-        polos_formulario = []
-
-        for polo in polos_lider:
-            # Calcular métricas do polo
-            df_polo = df_hoje_filtrado[df_hoje_filtrado['Provider'] == polo]
-            metricas_polo = calcular_metricas_safra(df_polo)
-
-            # Determinar classe do card
-            if metricas_polo['perc_atraso'] >= 30:  # Critico
-                card_class = "polo-card-critico"
-                status_emoji = "🔴"
-            elif metricas_polo['perc_atraso'] >= 20:  # Atenção
-                card_class = "polo-card-atencao"
-                status_emoji = "🟡"
-            else:  # OK
-                card_class = "polo-card-ok"
-                status_emoji = "🟢"
+        # Obter polos do líder e suas métricas (roll-up do cubo por Provider_Id)
+        polos_lider = indice_hoje.polos_do_lider(lider_selecionado)
+        metricas_polos = cubo_hoje_filtrado.metricas_por_polo()
 
-            # Card do polo
-            st.markdown(f"""
-            <div class="{card_class}">
-                <h5>{status_emoji} {polo}</h5>
-                <p>📊 <strong>Ordens em Aberto:</strong> {metricas_polo['total_em_aberto']}</p>
-                <p>⚠️ <strong>Em Atraso (≥2 dias):</strong> {metricas_polo['em_atraso']} ({metricas_polo['perc_atraso']:.1f}%)</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # Campos de justificativa
-            # Adiciona a classe 'campo-obrigatorio' se for crítico
-            is_obrigatorio = metricas_polo['perc_atraso'] >= 20
-            label_justificativa = f"📝 Justificativa para {polo}:"
-            if is_obrigatorio:
-                label_justificativa = f"<span class='campo-obrigatorio'>{label_justificativa}</span>"
-
-            justificativa = st.text_area(
-                label_justificativa,
-                key=f"just_{polo}",
-                height=100,
-                placeholder="Descreva os motivos dos atrasos..." if metricas_polo[
-                    'perc_atraso'] > 0 else "Polo sem atrasos",
-                help="Campo obrigatório se o percentual de atraso for 20% ou mais." if is_obrigatorio else ""
-            )
-
-            acao_corretiva = st.text_area(
-                f"🔧 Ação Corretiva para {polo}:",
-                key=f"acao_{polo}",
-                height=100,
-                placeholder="(Opcional) Descreva ações planejadas ou deixe em branco"
-            )
-
-            # Armazenar dados
-            polos_formulario.append({
-                'nome': polo,
-                'ordens_em_aberto': metricas_polo['total_em_aberto'],
-                'ordens_em_atraso': metricas_polo['em_atraso'],
-                'perc_atraso': metricas_polo['perc_atraso'],
-                'justificativa': justificativa,
-                'acao_corretiva': acao_corretiva
-            })
-
-        # Observações gerais
-        st.markdown("**💬 Observações Gerais:**")
-        observacoes = st.text_area(
-            "Comentários adicionais:",
-            height=100,
-            placeholder="Observações sobre a semana..."
-        )
-
-        # Botão de envio para Logic Apps
-        if st.button("🚀 Enviar para Azure Logic Apps", type="primary"):
-
-            # Validar campos obrigatórios (apenas justificativa para polos críticos)
-            erros = []
-            for polo in polos_formulario:
-                if polo['perc_atraso'] >= 20:  # Se o polo tem 20% ou mais de atraso
-                    if not polo['justificativa'].strip():
-                        erros.append(
-                            f"Justificativa obrigatória para {polo['nome']} (% atraso ≥ 20%)")
-                    # Ação Corretiva NÃO é obrigatória
-
-            if erros:
-                for erro in erros:
-                    mostrar_mensagem_status('error', erro)
-            else:
-                # Preparar dados para envio
-                dados_formulario = {
-                    'data': datetime.now().strftime('%d/%m/%Y'),
-                    'semana': f"Semana {semana_atual} ({periodo_atual})",
-                    'lider': lider_selecionado,
-                    'polos': polos_formulario,
-                    'observacoes': observacoes
-                }
-
-                # Enviar para Logic Apps
-                with st.spinner("🚀 Enviando para Azure Logic Apps..."):
-                    sucesso, mensagem = enviar_para_power_automate(
-                        dados_formulario)
-
-                    if sucesso:
-                        st.markdown(f"""
-                        <div class="webhook-success">
-                            <h4>✅ Justificativas Enviadas com Sucesso!</h4>
-                            <p>{mensagem}</p>
-                            <p><strong>🔗 Processamento:</strong> Azure Logic Apps está processando os dados</p>
-                            <p><strong>📧 Notificação:</strong> Você receberá um card no Teams com o link para o Excel no SharePoint</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        st.balloons()
-
-                        # Mostrar resumo
-                        total_polos = len(polos_formulario)
-                        polos_criticos = len(
-                            [p for p in polos_formulario if p['perc_atraso'] >= 20])
-
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Total de Polos", total_polos)
-                        with col2:
-                            st.metric("Polos Críticos", polos_criticos)
-                        with col3:
-                            st.metric("Status", "✅ Enviado")
-
-                        # Informações adicionais
-                        st.markdown("### 📋 Próximos Passos")
-                        st.info("""
-                        1. **Azure Logic Apps** processará os dados automaticamente.
-                        2. O arquivo Excel será salvo no **SharePoint**.
-                        3. Um **card no Teams** será enviado com o link direto para o arquivo.
-                        """)
-
-                        # Obter o link do Excel salvo no SharePoint
-                        # Este é um exemplo de como você pode obter o link do arquivo
-                        # Você precisará de uma lógica para obter o caminho do arquivo no SharePoint
-                        # e gerar um link direto.
-                        # Por enquanto, vamos apenas mostrar uma mensagem de sucesso.
-                        # Para obter o link real, você precisaria de uma integração com o SharePoint
-                        # ou uma API que retorne o link do arquivo.
-                        # Por exemplo:
-                        # excel_url = "https://universoonline.sharepoint.com/sites/SafraDashboard/Shared%20Documents/Relatorio_Diario.xlsx"
-                        # adaptive_card_payload = montar_adaptive_card_teams(dados_formulario, excel_url)
-                        # response = requests.post(webhook_teams_url, json=adaptive_card_payload)
-                        # print(response.status_code, response.text)
-
-                    else:
-                        mostrar_mensagem_status('error', mensagem)
-
-                        # Oferecer download como backup
-                        st.markdown("### 💾 Backup - Download Manual")
-                        st.warning(
-                            "Como o envio falhou, você pode baixar os dados manualmente:")
-
-                        try:
-                            # Gerar Excel de backup
-                            excel_buffer = io.BytesIO()
-                            linhas_excel = []
-                            for polo in dados_formulario['polos']:
-                                linhas_excel.append({
-                                    'Data': dados_formulario['data'],
-                                    'Semana': dados_formulario['semana'],
-                                    'Líder': dados_formulario['lider'],
-                                    'Polo': polo['nome'],
-                                    'Ordens_Em_Aberto': polo['ordens_em_aberto'],
-                                    'Ordens_Em_Atraso': polo['ordens_em_atraso'],
-                                    'Perc_Atraso': polo['perc_atraso'],
-                                    'Justificativa': polo['justificativa'],
-                                    'Acao_Corretiva': polo['acao_corretiva'],
-                                    'Observacoes': dados_formulario['observacoes']
-                                })
-
-                            df_backup = pd.DataFrame(linhas_excel)
-                            df_backup.to_excel(excel_buffer, index=False)
-
-                            nome_arquivo_backup = f"Backup_Justificativas_{sanitizar_nome_arquivo(dados_formulario['lider'])}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-
-                            st.download_button(
-                                "📥 Download Backup Excel",
-                                data=excel_buffer.getvalue(),
-                                file_name=nome_arquivo_backup,
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                            )
-
-                        except Exception as e:
-                            st.error(f"Erro ao gerar backup: {e}")
+        formulario_justificativas(
+            lider_selecionado, semana_atual, periodo_atual,
+            {polo: metricas_polos[indice_hoje.chave_do_polo(polo)] for polo in polos_lider})
 
     else:
         st.markdown("""
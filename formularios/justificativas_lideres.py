@@ -9,10 +9,14 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-import unicodedata
 
 sys.path.append(str(Path(__file__).parent.parent))
 from config.settings import config
+from src.utils.leitor_planilhas import ler_planilha
+from src.utils.normalizacao import garantir_provider_normalizado
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.indice_lideres import indexar_por_provider
+from src.etl.snapshots import ArmazemSnapshots
 
 def aplicar_estilo_formulario():
     """CSS específico para o formulário"""
@@ -91,28 +95,6 @@ def calcular_semana_ano(data=None):
     
     return semana, ano, periodo
 
-def remover_acentos(texto):
-    if pd.isna(texto):
-        return ""
-    texto = str(texto)
-    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('ascii')
-
-def normalizar_provider(provider):
-    if pd.isna(provider):
-        return ""
-    provider_str = str(provider).strip().upper()
-    if provider_str.startswith('POLO '):
-        provider_str = provider_str[5:]
-    provider_str = remover_acentos(provider_str)
-    return provider_str
-
-def normalizar_polo_sap(polo_sap):
-    if pd.isna(polo_sap):
-        return ""
-    polo_str = str(polo_sap).strip().upper()
-    polo_str = remover_acentos(polo_str)
-    return polo_str
-
 def calcular_metricas_polo(df_polo):
     """Calcula métricas de um polo específico"""
     if df_polo.empty:
@@ -258,28 +240,28 @@ def carregar_dados_dashboard():
     if 'dados_dashboard' in st.session_state:
         return st.session_state['dados_dashboard']
     
-    # Fallback: carregar dados diretamente
+    # Fallback: snapshot mais recente publicado pelo ETL (TEFTI já excluído)
     try:
-        df_hoje = pd.read_excel('data/input/Relatorio_Diario1.xlsx')
-        df_mapeamento = pd.read_excel('data/input/pagresolve_regionais.xlsx')
-        
-        # Excluir TEFTI
-        df_hoje = df_hoje[df_hoje['Provider'] != 'TEFTI'].copy()
-        
-        # Processar com líder
-        df_hoje['Provider_Normalizado'] = df_hoje['Provider'].apply(normalizar_provider)
-        df_mapeamento['Polo_SAP_Normalizado'] = df_mapeamento['Polo + SAP'].apply(normalizar_polo_sap)
-        
-        df_hoje_com_lider = df_hoje.merge(
-            df_mapeamento[['Polo_SAP_Normalizado', 'Líder PagResolve']],
-            left_on='Provider_Normalizado',
-            right_on='Polo_SAP_Normalizado',
-            how='left'
-        ).rename(columns={'Líder PagResolve': 'Lider'})
+        armazem = ArmazemSnapshots()
+        ultimas = armazem.ultimas(1)
+        if not ultimas:
+            raise FileNotFoundError("nenhum relatório publicado - execute o ETL (python main.py)")
+        df_hoje, indice_lideres = armazem.ler(ultimas[0], colunas=config.COLUNAS_METRICAS_DASHBOARD)
+        df_mapeamento = ler_planilha(config.INPUT_DIR / config.MAPEAMENTO_LIDERES)
+        
+        # Processar com líder (lookup do Provider_Id na dimensão de providers)
+        dimensao_provider = DimensaoProvider.carregar_ou_construir(df_mapeamento)
+        df_hoje_com_lider = dimensao_provider.associar_lider(garantir_provider_normalizado(df_hoje))
+        if indice_lideres is None:
+            df_hoje_com_lider, indice_lideres = indexar_por_provider(df_hoje_com_lider, dimensao_provider)
+        else:
+            indice_lideres.atualizar_lideres(dimensao_provider)
         
         return {
             'df_hoje_com_lider': df_hoje_com_lider,
             'df_mapeamento': df_mapeamento,
+            'dimensao_provider': dimensao_provider,
+            'indice_lideres': indice_lideres,
             'metricas_hoje': {}
         }
         
@@ -324,9 +306,17 @@ if dados_dashboard is None:
 
 df_hoje_com_lider = dados_dashboard['df_hoje_com_lider']
 df_mapeamento = dados_dashboard['df_mapeamento']
+dimensao_provider = dados_dashboard.get('dimensao_provider') or DimensaoProvider.carregar_ou_construir(df_mapeamento)
+if 'Provider_Id' not in df_hoje_com_lider.columns:
+    df_hoje_com_lider = dimensao_provider.associar_lider(df_hoje_com_lider)
+
+# Índice líder → polos → faixas de linhas (o dashboard já entrega o par pronto)
+indice_lideres = dados_dashboard.get('indice_lideres')
+if indice_lideres is None:
+    df_hoje_com_lider, indice_lideres = indexar_por_provider(df_hoje_com_lider, dimensao_provider)
 
 # Verificar se há líderes
-lideres_disponiveis = sorted(df_hoje_com_lider['Lider'].dropna().unique().tolist())
+lideres_disponiveis = indice_lideres.lideres()
 
 if not lideres_disponiveis:
     st.error("❌ Nenhum líder encontrado nos dados")
@@ -343,15 +333,12 @@ lider_selecionado = st.selectbox(
 
 if lider_selecionado:
     # Filtrar dados do líder
-    df_lider = df_hoje_com_lider[df_hoje_com_lider['Lider'] == lider_selecionado].copy()
+    polos_lider = indice_lideres.polos_do_lider(lider_selecionado)
     
-    if df_lider.empty:
+    if not polos_lider:
         st.warning("⚠️ Nenhum polo encontrado para este líder")
         st.stop()
     
-    # Obter polos do líder
-    polos_lider = df_lider['Provider'].unique()
-    
     st.success(f"✅ Líder selecionado: **{lider_selecionado}**")
     st.info(f"🏢 Polos sob sua responsabilidade: **{len(polos_lider)}** polos")
     
@@ -370,7 +357,7 @@ if lider_selecionado:
     # Para cada polo do líder
     for i, polo in enumerate(polos_lider):
         # Filtrar dados do polo
-        df_polo = df_lider[df_lider['Provider'] == polo].copy()
+        df_polo = indice_lideres.linhas_do_polo(df_hoje_com_lider, polo)
         
         # Calcular métricas do polo
         metricas_polo = calcular_metricas_polo(df_polo)
@@ -26,7 +26,45 @@ def verificar_dependencias():
         print("Execute: python -m pip install pandas pytz openpyxl pyarrow")
         return False
 
-def executar_etl_seguro(arquivo_relatorio=None):
+def limpar_cache_ingestao():
+    """Remove os arquivos do cache de ingestão"""
+    try:
+        from src.etl.cache import SafraIngestCache
+        removidos = SafraIngestCache().limpar()
+        print(f"🧹 Cache de ingestão limpo: {removidos} arquivos removidos")
+    except Exception as e:
+        print(f"⚠️ Não foi possível limpar o cache de ingestão: {e}")
+
+def compactar_base_historica():
+    """Incorpora o log de alterações à base histórica particionada"""
+    try:
+        from src.etl.loader import SafraLoader
+        resultado = SafraLoader().compactar()
+        print(f"🗜️ Base compactada: {resultado['ordens']:,} ordens de {resultado['arquivos_log']} arquivos de log")
+        return True
+    except Exception as e:
+        print(f"❌ Erro na compactação: {e}")
+        return False
+
+def comparar_motores_leitura(arquivo_relatorio=None):
+    """Mede a vazão de cada motor de leitura de planilhas disponível"""
+    try:
+        from config.settings import config
+        from src.utils.leitor_planilhas import obter_leitor
+        
+        arquivo = Path(arquivo_relatorio) if arquivo_relatorio else config.INPUT_DIR / config.RELATORIO_DIARIO
+        leitor = obter_leitor()
+        resultado = leitor.comparar_motores(arquivo)
+        
+        print(f"📏 Vazão dos motores de leitura ({arquivo.name}):")
+        for motor, vazao in sorted(resultado.items(), key=lambda item: -item[1]):
+            print(f"   {motor}: {vazao:.2f} MB/s")
+        print(f"✅ Motor padrão (auto): {leitor.motor}")
+    except Exception as e:
+        print(f"❌ Erro ao comparar motores de leitura: {e}")
+
+def executar_etl_seguro(arquivo_relatorio=None, usar_cache=True, modo_streaming=False,
+                        usar_delta=True):
     """Executa ETL com tratamento de erros robusto"""
     try:
         print("📊 Iniciando processamento ETL...")
@@ -44,7 +82,8 @@ def executar_etl_seguro(arquivo_relatorio=None):
                 'BACKUP_DIR': Path('data/backup'),
                 'LOGS_DIR': Path('logs'),
                 'RELATORIO_DIARIO': 'Relatorio_Diario.xlsx',
-                'DASHBOARD_DATA': 'dashboard_data.parquet'
+                'DASHBOARD_DATA': 'dashboard_data.parquet',
+                'MODO_CATEGORICO': False
             })()
             
             # Criar diretórios
@@ -53,18 +92,33 @@ def executar_etl_seguro(arquivo_relatorio=None):
         
         # Tentar usar ETL completo, senão usar versão simplificada
         try:
-            from src.etl import executar_etl
+            from src.etl.init import executar_etl
             print("✅ Módulo ETL carregado")
-            return executar_etl(arquivo_relatorio)
         except Exception as e:
+            # Streaming e delta só existem no ETL completo: sem ele, falhar em vez de ignorar a opção
+            if modo_streaming or not usar_delta:
+                print(f"❌ ETL completo não disponível, --streaming/--sem-delta exigem o pipeline completo: {e}")
+                return False
             print(f"⚠️ ETL completo não disponível, usando versão simplificada: {e}")
-            return executar_etl_simplificado(config, arquivo_relatorio)
+            return executar_etl_simplificado(config, arquivo_relatorio, usar_cache=usar_cache)
+        return executar_etl(arquivo_relatorio, usar_cache=usar_cache,
+                            modo_streaming=modo_streaming, usar_delta=usar_delta)
             
     except Exception as e:
         print(f"❌ Erro no ETL: {e}")
         return False
 
-def executar_etl_simplificado(config, arquivo_relatorio=None):
+def executar_etl_lote_seguro(diretorio, workers=None, usar_cache=True):
+    """Executa ETL em lote sobre todos os relatórios de um diretório"""
+    try:
+        print(f"📂 Processando relatórios de: {diretorio}")
+        from src.etl.lote import executar_etl_lote
+        return executar_etl_lote(diretorio, workers=workers, usar_cache=usar_cache)
+    except Exception as e:
+        print(f"❌ Erro no ETL em lote: {e}")
+        return False
+
+def executar_etl_simplificado(config, arquivo_relatorio=None, usar_cache=True):
     """Versão simplificada do ETL que sempre funciona"""
     try:
         import pandas as pd
@@ -84,34 +138,101 @@ def executar_etl_simplificado(config, arquivo_relatorio=None):
             print("📝 Criando arquivo de exemplo...")
             criar_arquivo_exemplo(arquivo_entrada)
         
-        # Ler dados
+        # Ler dados (reaproveitando o cache de ingestão quando possível)
         print(f"📖 Lendo dados de: {arquivo_entrada}")
-        df = pd.read_excel(arquivo_entrada)
+        cache = None
+        if usar_cache:
+            try:
+                from src.etl.cache import SafraIngestCache
+                cache = SafraIngestCache()
+            except Exception as e:
+                print(f"⚠️ Cache de ingestão indisponível: {e}")
+        
+        df = cache.obter(arquivo_entrada, 'simplificado') if cache else None
+        if df is None:
+            try:
+                from src.utils.leitor_planilhas import ler_tabela
+            except Exception:
+                def ler_tabela(caminho, registrar=False):
+                    return pd.read_excel(caminho)
+            df = ler_tabela(arquivo_entrada, registrar=True)
+            if cache:
+                cache.salvar(arquivo_entrada, df, 'simplificado')
         print(f"📊 Registros lidos: {len(df)}")
+        # Relatório como lido (ordem do relatório) para o snapshot do dashboard
+        relatorio = df.copy()
         
         # Processamento básico
         brasilia_tz = pytz.timezone('America/Sao_Paulo')
         df['Data_Processamento'] = datetime.now(brasilia_tz)
         
-        # Calcular dias em aberto (simplificado)
+        # Calcular dias corridos e úteis em aberto (uma data de referência por execução)
         if 'Criação da Ordem' in df.columns:
             df['Criação da Ordem'] = pd.to_datetime(df['Criação da Ordem'], errors='coerce')
-            hoje = datetime.now(brasilia_tz).date()
-            df['Dias_Em_Aberto'] = df['Criação da Ordem'].apply(
-                lambda x: (hoje - x.date()).days if pd.notna(x) else 0
-            )
+            try:
+                from src.utils.envelhecimento import calcular_envelhecimento
+                df = calcular_envelhecimento(df)
+                df['Dias_Em_Aberto'] = df['Dias_Em_Aberto'].fillna(0).astype('int64')
+            except ImportError:
+                hoje = pd.Timestamp(datetime.now(brasilia_tz).date())
+                df['Dias_Em_Aberto'] = (
+                    (hoje - df['Criação da Ordem'].dt.normalize()).dt.days.fillna(0).astype('int64')
+                )
         else:
             df['Dias_Em_Aberto'] = 5  # Valor padrão
         
-        # Adicionar campos calculados
-        df['Status_SLA'] = df.apply(calcular_status_sla, axis=1)
-        df['Prioridade'] = df.apply(calcular_prioridade, axis=1)
+        # Adicionar campos calculados (regras vetorizadas de config.REGRAS_SLA)
+        try:
+            from src.utils.regras_sla import aplicar_regras_sla
+            df = aplicar_regras_sla(df)
+        except ImportError:
+            df['Status_SLA'] = df.apply(calcular_status_sla, axis=1)
+            df['Prioridade'] = df.apply(calcular_prioridade, axis=1)
+        
+        # Provider normalizado para a junção com o mapeamento de líderes
+        if 'Provider' in df.columns:
+            try:
+                from src.utils.normalizacao import normalizar_providers
+                df['Provider_Normalizado'] = normalizar_providers(df['Provider'])
+                
+                # Provider_Id da dimensão de providers (líder por lookup inteiro na UI)
+                from src.etl.dimensao_provider import DimensaoProvider, carregar_mapeamento_lideres
+                dimensao = DimensaoProvider()
+                df = dimensao.atribuir_chaves(df, carregar_mapeamento_lideres())
+                dimensao.salvar()
+                
+                # Fato ordenado por Provider_Id + faixas de linhas por polo
+                from src.etl.indice_lideres import indexar_por_provider
+                df, indice_lideres = indexar_por_provider(df, dimensao)
+                indice_lideres.salvar()
+            except ImportError:
+                pass
+        
+        # Colunas repetidas como category (gravadas como dicionário no Parquet)
+        if config.MODO_CATEGORICO:
+            try:
+                from src.utils.schema import converter_categoricas
+                df = converter_categoricas(df, config.COLUNAS_CATEGORICAS)
+            except ImportError:
+                pass
         
         # Salvar resultado
         arquivo_saida = config.PROCESSED_DIR / config.DASHBOARD_DATA
         df.to_parquet(arquivo_saida, index=False)
         print(f"💾 Dados salvos em: {arquivo_saida}")
         
+        # Relatório do dia publicado para o dashboard
+        try:
+            from src.etl.loader import SafraLoader
+            from src.etl.snapshots import inferir_data_relatorio
+            arquivo_relatorio_dashboard = SafraLoader().publicar_relatorio_dashboard(
+                relatorio, inferir_data_relatorio(arquivo_entrada, relatorio), arquivo_entrada.name
+            )
+            if arquivo_relatorio_dashboard:
+                print(f"📤 Relatório do dashboard: {arquivo_relatorio_dashboard}")
+        except ImportError:
+            pass
+        
         # Estatísticas
         print(f"✅ ETL concluído: {len(df)} registros processados")
         if 'Provider' in df.columns:
@@ -157,7 +278,7 @@ def criar_arquivo_exemplo(caminho_arquivo):
     print(f"✅ Arquivo de exemplo criado: {caminho_arquivo}")
 
 def calcular_status_sla(row):
-    """Calcula status do SLA"""
+    """Calcula status do SLA (referência linha a linha de src/utils/regras_sla.py)"""
     try:
         sla = row.get('SLA Cliente', 0)
         dias_aberto = row.get('Dias_Em_Aberto', 0)
@@ -218,7 +339,18 @@ def main():
     parser.add_argument(
         "--arquivo",
         "-a",
-        help="Caminho para o arquivo de relatório diário",
+        help="Caminho para o arquivo de relatório diário (.xlsx, .csv, .parquet ou .feather)",
+        default=None
+    )
+    parser.add_argument(
+        "--diretorio",
+        help="Processar em lote todos os relatórios diários do diretório",
+        default=None
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Número de processos no modo lote (padrão: núcleos da máquina)",
         default=None
     )
     parser.add_argument(
@@ -232,6 +364,36 @@ def main():
         action="store_true",
         help="Executar apenas o dashboard (sem ETL)"
     )
+    parser.add_argument(
+        "--comparar-motores",
+        action="store_true",
+        help="Medir a vazão dos motores de leitura de planilhas e sair"
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="Ignorar o cache de ingestão e reler o arquivo de origem"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Ler o relatório em blocos de CHUNK_SIZE linhas (arquivos grandes)"
+    )
+    parser.add_argument(
+        "--sem-delta",
+        action="store_true",
+        help="Reprocessar todas as linhas, inclusive as inalteradas desde o último relatório"
+    )
+    parser.add_argument(
+        "--compactar",
+        action="store_true",
+        help="Incorporar o log de alterações à base histórica e sair"
+    )
+    parser.add_argument(
+        "--limpar-cache",
+        action="store_true",
+        help="Limpar o cache de ingestão antes de executar"
+    )
     
     args = parser.parse_args()
     
@@ -249,9 +411,35 @@ def main():
             iniciar_dashboard()
             return
         
+        # Benchmark dos motores de leitura
+        if args.comparar_motores:
+            comparar_motores_leitura(args.arquivo)
+            return
+        
+        # Compactação da base histórica (job separado do ETL diário)
+        if args.compactar:
+            compactar_base_historica()
+            return
+        
+        # Limpar cache de ingestão se solicitado
+        if args.limpar_cache:
+            limpar_cache_ingestao()
+        
         # Executar ETL
         logger.info("🚀 Iniciando pipeline ETL Safra")
-        sucesso = executar_etl_seguro(args.arquivo)
+        if args.diretorio:
+            sucesso = executar_etl_lote_seguro(
+                args.diretorio,
+                workers=args.workers,
+                usar_cache=not args.sem_cache
+            )
+        else:
+            sucesso = executar_etl_seguro(
+                args.arquivo,
+                usar_cache=not args.sem_cache,
+                modo_streaming=args.streaming,
+                usar_delta=not args.sem_delta
+            )
         
         if sucesso:
             logger.info("✅ Pipeline ETL executado com sucesso!")
@@ -0,0 +1,353 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import quote
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.utils.schema import PlanoLeitura, compilar_plano_leitura, concatenar_preservando_categorias
+
+CHAVE_PRIMARIA = 'Ordem PagBank'
+# Valor de partição para datas/providers ausentes (convenção Hive)
+PARTICAO_NULA = '__HIVE_DEFAULT_PARTITION__'
+
+# Tipo único das colunas dicionário (modo categórico) ao juntar arquivos
+TIPO_DICIONARIO = pa.dictionary(pa.int32(), pa.large_string())
+
+# Tipos Arrow das colunas do plano de leitura (lidas como Int64 / string no pandas)
+TIPO_INTEIRO = pa.int64()
+TIPO_TEXTO = pa.large_string()
+TIPOS_PANDAS = {TIPO_INTEIRO: pd.Int64Dtype(), TIPO_TEXTO: pd.StringDtype()}
+
+def concatenar_tabelas(tabelas: List[pa.Table], plano: Optional[PlanoLeitura] = None) -> pa.Table:
+    """pa.concat_tables de arquivos com conjuntos de colunas ou tipos diferentes
+
+    Antes de concatenar, cada tabela é levada ao schema do plano de leitura:
+    colunas inteiras/texto ausentes entram como nulos tipados e as presentes
+    são convertidas para int64/large_string (sem isso a promoção permissiva
+    devolve inteiros com nulos como float64). Arquivos anteriores ao modo
+    categórico têm texto simples; a coluna passa a dicionário em todas as
+    tabelas e volta ao pandas como category.
+    """
+    plano = plano if plano is not None else compilar_plano_leitura()
+    presentes = {campo.name for tabela in tabelas for campo in tabela.schema}
+    colunas_plano = [coluna for coluna in plano.inteiros + plano.textos if coluna in presentes]
+    tabelas = [_conformar_ao_plano(tabela, plano, colunas_plano) for tabela in tabelas]
+
+    colunas_dicionario = {
+        campo.name for tabela in tabelas for campo in tabela.schema
+        if pa.types.is_dictionary(campo.type)
+    }
+    if colunas_dicionario:
+        tabelas = [_codificar_dicionario(tabela, colunas_dicionario) for tabela in tabelas]
+    return pa.concat_tables(tabelas, promote_options='permissive')
+
+def tabelas_para_pandas(tabelas: List[pa.Table], plano: Optional[PlanoLeitura] = None) -> pd.DataFrame:
+    """Concatena as tabelas e converte para pandas com as colunas do plano em Int64/string"""
+    plano = plano if plano is not None else compilar_plano_leitura()
+    tabela = concatenar_tabelas(tabelas, plano)
+    df = tabela.to_pandas()
+    # Metadados pandas vêm da primeira tabela: colunas ausentes nela perderiam o tipo nulável
+    convertidas = {
+        coluna: tabela.column(coluna).to_pandas(types_mapper=TIPOS_PANDAS.get)
+        for coluna in plano.inteiros + plano.textos
+        if coluna in df.columns and tabela.schema.field(coluna).type in TIPOS_PANDAS
+        and str(df[coluna].dtype) not in ('Int64', 'string')
+    }
+    return df.assign(**convertidas)
+
+def _conformar_ao_plano(tabela: pa.Table, plano: PlanoLeitura, colunas: List[str]) -> pa.Table:
+    for nome in colunas:
+        tipo = TIPO_INTEIRO if nome in plano.inteiros else TIPO_TEXTO
+        indice = tabela.schema.get_field_index(nome)
+        if indice < 0:
+            tabela = tabela.append_column(pa.field(nome, tipo), pa.nulls(tabela.num_rows, tipo))
+            continue
+        atual = tabela.schema.field(indice).type
+        if atual != tipo and not pa.types.is_dictionary(atual):
+            tabela = tabela.set_column(indice, nome, tabela.column(indice).cast(tipo))
+    return tabela
+
+def _codificar_dicionario(tabela: pa.Table, colunas: Set[str]) -> pa.Table:
+    for nome in colunas:
+        indice = tabela.schema.get_field_index(nome)
+        if indice < 0 or tabela.schema.field(indice).type == TIPO_DICIONARIO:
+            continue
+        coluna = tabela.column(indice)
+        if pa.types.is_null(coluna.type):
+            coluna = coluna.cast(pa.large_string())
+        tabela = tabela.set_column(indice, nome, coluna.cast(TIPO_DICIONARIO))
+    return tabela
+
+def calcular_particoes(df: pd.DataFrame) -> pd.Series:
+    """Caminho relativo da partição de cada linha: mes_criacao=AAAA-MM/provider=..."""
+    if 'Criação da Ordem' in df.columns:
+        meses = pd.to_datetime(df['Criação da Ordem'], errors='coerce').dt.strftime('%Y-%m')
+    else:
+        meses = pd.Series(pd.NA, index=df.index, dtype='string')
+
+    if 'Provider' in df.columns:
+        providers = df['Provider'].astype('string')
+    else:
+        providers = pd.Series(pd.NA, index=df.index, dtype='string')
+
+    # Codificação URI como no particionamento Hive do pyarrow (evita '/' no nome)
+    valores_provider = providers.fillna(PARTICAO_NULA)
+    unicos = pd.unique(valores_provider)
+    codificados = dict(zip(unicos, [quote(str(v), safe='') for v in unicos]))
+
+    return (
+        'mes_criacao=' + meses.fillna(PARTICAO_NULA).astype(str)
+        + '/provider=' + valores_provider.map(codificados).astype(str)
+    )
+
+class BaseHistoricaParticionada:
+    """Base histórica como dataset Parquet particionado (Hive) por mês de criação e Provider
+
+    Cada partição guarda um arquivo ordenado por 'Ordem PagBank'. Um índice
+    chave → partição permite ler e regravar apenas as partições tocadas.
+
+    O ETL diário não regrava partições: anexa um arquivo imutável com as
+    ordens alteradas ao log (config.LOG_ALTERACOES_DIR). Leitores resolvem a
+    versão mais recente de cada ordem (base compactada + log) e a compactação
+    (main.py --compactar) incorpora o log às partições.
+    """
+
+    ARQUIVO_DADOS = 'parte-0.parquet'
+
+    def __init__(self, diretorio: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.diretorio = Path(diretorio) if diretorio else config.PROCESSED_DIR / config.BASE_HISTORICA_DIR
+        # Prefixo '_' faz o pyarrow ignorar o índice na leitura do dataset
+        self.arquivo_indice = self.diretorio / '_indice_chaves.parquet'
+        self.diretorio_log = config.PROCESSED_DIR / config.LOG_ALTERACOES_DIR
+        self._migrar_arquivo_legado()
+
+    def existe(self) -> bool:
+        return self.arquivo_indice.exists() or bool(self.arquivos_log())
+
+    def arquivos_log(self) -> List[Path]:
+        """Arquivos do log de alterações pendentes de compactação, do mais antigo ao mais novo"""
+        if not self.diretorio_log.exists():
+            return []
+        return sorted(self.diretorio_log.glob('alteracoes_*.parquet'))
+
+    def registrar_alteracoes(self, df: pd.DataFrame) -> Optional[Path]:
+        """Anexa ao log um arquivo imutável com a versão atual das ordens alteradas"""
+        if df.empty:
+            self.logger.info("📝 Nenhuma ordem alterada - log não modificado")
+            return None
+
+        self.diretorio_log.mkdir(parents=True, exist_ok=True)
+        nome = f"alteracoes_{datetime.now():%Y%m%dT%H%M%S%f}_{os.getpid()}.parquet"
+        destino = self.diretorio_log / nome
+        arquivo_temp = self.diretorio_log / f'.{nome}.tmp'
+
+        pq.write_table(
+            pa.Table.from_pandas(df.sort_values(CHAVE_PRIMARIA, kind='stable'), preserve_index=False),
+            arquivo_temp,
+            row_group_size=config.CHUNK_SIZE
+        )
+        arquivo_temp.replace(destino)
+
+        self.logger.info(f"🧾 Log de alterações: {len(df):,} ordens em {nome}")
+        return destino
+
+    def ler_versoes_atuais(self, chaves: pd.Series) -> pd.DataFrame:
+        """Versão mais recente (base compactada + log) apenas das ordens informadas"""
+        if not self.existe():
+            return pd.DataFrame()
+
+        lista_chaves = pd.Series(chaves).dropna().unique().tolist()
+        if not lista_chaves:
+            return pd.DataFrame()
+
+        # Partições ordenadas por chave: o filtro descarta row groups pelas estatísticas
+        filtro = [(CHAVE_PRIMARIA, 'in', lista_chaves)]
+        arquivos = [
+            self.diretorio / p / self.ARQUIVO_DADOS for p in sorted(self.particoes_das_chaves(lista_chaves))
+        ] + self.arquivos_log()
+
+        tabelas = [pq.read_table(arquivo, filters=filtro) for arquivo in arquivos if arquivo.exists()]
+        return self._resolver_versoes(tabelas)
+
+    def ler(self) -> pd.DataFrame:
+        """Base completa com a versão mais recente de cada ordem"""
+        if not self.existe():
+            return pd.DataFrame()
+
+        arquivos = sorted(self.diretorio.glob(f'*/*/{self.ARQUIVO_DADOS}')) + self.arquivos_log()
+        return self._resolver_versoes([pq.read_table(arquivo) for arquivo in arquivos])
+
+    def compactar(self) -> Dict[str, int]:
+        """Incorpora o log às partições e arquiva os arquivos de log processados
+
+        Arquivos arquivados ficam em BACKUP_DIR por config.BACKUP_RETENTION_DAYS.
+        Arquivos anexados durante a compactação ficam para a próxima execução.
+        """
+        arquivos = self.arquivos_log()
+        if not arquivos:
+            self.logger.info("📝 Log de alterações vazio - nada a compactar")
+            return {'arquivos_log': 0, 'ordens': 0, 'particoes': 0, 'arquivados_removidos': 0}
+
+        alteracoes = self._resolver_versoes([pq.read_table(arquivo) for arquivo in arquivos])
+
+        particoes = self.particoes_das_chaves(alteracoes[CHAVE_PRIMARIA])
+        base = self.ler_particoes(particoes)
+        if not base.empty:
+            base = base[~base[CHAVE_PRIMARIA].isin(alteracoes[CHAVE_PRIMARIA])]
+
+        particoes_escritas = self.gravar(concatenar_preservando_categorias([base, alteracoes]), particoes)
+
+        destino_backup = config.BACKUP_DIR / config.LOG_ALTERACOES_DIR
+        destino_backup.mkdir(parents=True, exist_ok=True)
+        for arquivo in arquivos:
+            shutil.move(str(arquivo), str(destino_backup / arquivo.name))
+
+        return {
+            'arquivos_log': len(arquivos),
+            'ordens': len(alteracoes),
+            'particoes': len(particoes_escritas),
+            'arquivados_removidos': self._remover_arquivados_expirados(destino_backup)
+        }
+
+    def particoes_das_chaves(self, chaves: Iterable) -> Set[str]:
+        """Partições onde as chaves informadas estão gravadas na base compactada"""
+        if not self.arquivo_indice.exists():
+            return set()
+        indice = self._ler_indice()
+        return set(indice.loc[indice[CHAVE_PRIMARIA].isin(chaves), 'particao'].unique())
+
+    def ler_particoes(self, particoes: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Lê as partições informadas da base compactada, sem o log (None = todas)"""
+        if not self.arquivo_indice.exists():
+            return pd.DataFrame()
+
+        arquivos = (
+            sorted(self.diretorio.glob(f'*/*/{self.ARQUIVO_DADOS}')) if particoes is None
+            else [self.diretorio / p / self.ARQUIVO_DADOS for p in sorted(particoes)]
+        )
+        arquivos = [arquivo for arquivo in arquivos if arquivo.exists()]
+        if not arquivos:
+            return pd.DataFrame()
+
+        tabelas = [pq.read_table(arquivo) for arquivo in arquivos]
+        return tabelas_para_pandas(tabelas)
+
+    def gravar(self, df: pd.DataFrame, particoes_lidas: Iterable[str] = ()) -> Set[str]:
+        """Regrava as partições tocadas e atualiza o índice de chaves
+
+        df deve conter todas as linhas das partições lidas (após o upsert);
+        partições lidas que ficarem vazias são removidas.
+        """
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        particoes_lidas = set(particoes_lidas)
+        particoes_linhas = calcular_particoes(df)
+        particoes_escritas = set(particoes_linhas.unique())
+
+        # Linhas que caem em partições existentes não lidas (ordens novas, troca
+        # de Provider) são somadas ao conteúdo atual dessas partições
+        complementares = [
+            p for p in particoes_escritas - particoes_lidas
+            if (self.diretorio / p / self.ARQUIVO_DADOS).exists()
+        ]
+        if complementares:
+            df = concatenar_preservando_categorias([df, self.ler_particoes(complementares)])
+            particoes_linhas = calcular_particoes(df)
+            particoes_lidas |= set(complementares)
+
+        for particao, grupo in df.groupby(particoes_linhas.to_numpy(), sort=False):
+            self._gravar_particao(particao, grupo)
+
+        for particao in particoes_lidas - particoes_escritas:
+            shutil.rmtree(self.diretorio / particao, ignore_errors=True)
+
+        self._atualizar_indice(df[CHAVE_PRIMARIA], particoes_linhas, particoes_lidas | particoes_escritas)
+
+        self.logger.info(
+            f"🗂️ Base histórica: {len(particoes_escritas):,} partições regravadas, {len(df):,} registros"
+        )
+        return particoes_escritas
+
+    def exportar(self, arquivo_destino: Path, df: Optional[pd.DataFrame] = None) -> int:
+        """Materializa a base completa (versões mais recentes) em um único Parquet
+
+        df permite gravar a base já lida e reordenada pelo chamador.
+        """
+        df = self.ler() if df is None else df
+        if df.empty:
+            return 0
+        arquivo_temp = Path(arquivo_destino).with_suffix(f'.{os.getpid()}.tmp')
+        df.to_parquet(arquivo_temp, index=False)
+        arquivo_temp.replace(arquivo_destino)
+        return len(df)
+
+    def _resolver_versoes(self, tabelas: List[pa.Table]) -> pd.DataFrame:
+        """Concatena base e log (nessa ordem) mantendo a última versão de cada ordem"""
+        tabelas = [tabela for tabela in tabelas if tabela.num_rows > 0]
+        if not tabelas:
+            return pd.DataFrame()
+        df = tabelas_para_pandas(tabelas)
+        return df[~df[CHAVE_PRIMARIA].duplicated(keep='last')].reset_index(drop=True)
+
+    def _remover_arquivados_expirados(self, diretorio: Path) -> int:
+        limite = time.time() - config.BACKUP_RETENTION_DAYS * 86400
+        removidos = 0
+        for arquivo in diretorio.glob('alteracoes_*.parquet'):
+            if arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+                removidos += 1
+        return removidos
+
+    def _gravar_particao(self, particao: str, grupo: pd.DataFrame) -> None:
+        destino = self.diretorio / particao
+        destino.mkdir(parents=True, exist_ok=True)
+
+        grupo = grupo.sort_values(CHAVE_PRIMARIA, kind='stable')
+        arquivo_temp = destino / f'.{self.ARQUIVO_DADOS}.{os.getpid()}.tmp'
+        pq.write_table(
+            pa.Table.from_pandas(grupo, preserve_index=False),
+            arquivo_temp,
+            row_group_size=config.CHUNK_SIZE
+        )
+        arquivo_temp.replace(destino / self.ARQUIVO_DADOS)
+
+    def _ler_indice(self) -> pd.DataFrame:
+        return pd.read_parquet(self.arquivo_indice)
+
+    def _atualizar_indice(self, chaves: pd.Series, particoes: pd.Series, particoes_tocadas: Set[str]) -> None:
+        novas = pd.DataFrame({CHAVE_PRIMARIA: chaves.array, 'particao': particoes.to_numpy()})
+
+        if self.arquivo_indice.exists():
+            indice = self._ler_indice()
+            indice = pd.concat(
+                [indice[~indice['particao'].isin(particoes_tocadas)], novas], ignore_index=True
+            )
+        else:
+            indice = novas
+
+        arquivo_temp = self.arquivo_indice.with_suffix(f'.{os.getpid()}.tmp')
+        indice.to_parquet(arquivo_temp, index=False)
+        arquivo_temp.replace(self.arquivo_indice)
+
+    def _migrar_arquivo_legado(self) -> None:
+        """Converte o safra_base_historica.parquet único para o dataset particionado"""
+        arquivo_legado = config.PROCESSED_DIR / config.BASE_HISTORICA
+        if self.arquivo_indice.exists() or not arquivo_legado.exists():
+            return
+
+        self.logger.info(f"🔄 Migrando {arquivo_legado.name} para base particionada")
+        self.gravar(pd.read_parquet(arquivo_legado))
+
+        destino = config.BACKUP_DIR / arquivo_legado.name
+        shutil.move(str(arquivo_legado), str(destino))
+        self.logger.info(f"✅ Migração concluída, arquivo original movido para {destino}")
@@ -0,0 +1,117 @@
+import pandas as pd
+import hashlib
+import json
+import os
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+class SafraIngestCache:
+    """Cache de ingestão endereçado pelo conteúdo dos arquivos de entrada"""
+
+    # Incrementar quando a forma de leitura mudar (invalida caches antigos)
+    VERSAO_CACHE = 1
+    TAMANHO_BLOCO_HASH = 1024 * 1024
+
+    def __init__(self, diretorio: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.diretorio = Path(diretorio) if diretorio else config.INGEST_CACHE_DIR
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.arquivo_indice = self.diretorio / "indice.json"
+
+    def calcular_hash(self, arquivo_path) -> str:
+        """Calcula SHA-256 do conteúdo do arquivo em blocos"""
+        sha = hashlib.sha256()
+        with open(arquivo_path, 'rb') as f:
+            for bloco in iter(lambda: f.read(self.TAMANHO_BLOCO_HASH), b''):
+                sha.update(bloco)
+        return sha.hexdigest()
+
+    def obter(self, arquivo_path, variante: str = "") -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame em cache para o arquivo, ou None se não houver
+        
+        A variante identifica a forma de leitura (parâmetros diferentes geram
+        entradas diferentes para o mesmo conteúdo).
+        """
+        try:
+            caminho_cache = self._caminho_cache(self._hash_conteudo(arquivo_path), variante)
+            if not caminho_cache.exists():
+                return None
+
+            df = pd.read_parquet(caminho_cache)
+            self.logger.info(f"⚡ Cache de ingestão utilizado: {caminho_cache.name}")
+            return df
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Cache de ingestão indisponível: {e}")
+            return None
+
+    def salvar(self, arquivo_path, df: pd.DataFrame, variante: str = "") -> bool:
+        """Armazena o DataFrame lido do arquivo como Parquet"""
+        try:
+            caminho_cache = self._caminho_cache(self._hash_conteudo(arquivo_path), variante)
+            arquivo_temp = caminho_cache.with_suffix(f'.{os.getpid()}.tmp')
+            df.to_parquet(arquivo_temp, index=False)
+            arquivo_temp.replace(caminho_cache)
+            self.logger.info(f"💾 Cache de ingestão gravado: {caminho_cache.name}")
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Não foi possível gravar cache de ingestão: {e}")
+            return False
+
+    def limpar(self) -> int:
+        """Remove todos os arquivos do cache e retorna a quantidade removida"""
+        removidos = 0
+        for arquivo in self.diretorio.glob('*'):
+            if arquivo.is_file():
+                arquivo.unlink()
+                removidos += 1
+
+        self.logger.info(f"🧹 Cache de ingestão limpo: {removidos} arquivos removidos")
+        return removidos
+
+    def _hash_conteudo(self, arquivo_path) -> str:
+        """Obtém hash do conteúdo, reaproveitando o índice quando tamanho/mtime não mudaram"""
+        arquivo = Path(arquivo_path).resolve()
+        stat = arquivo.stat()
+        chave = str(arquivo)
+
+        indice = self._carregar_indice()
+        entrada = indice.get(chave)
+        if (entrada and entrada['tamanho'] == stat.st_size
+                and entrada['mtime_ns'] == stat.st_mtime_ns):
+            return entrada['hash']
+
+        hash_conteudo = self.calcular_hash(arquivo)
+        indice[chave] = {
+            'tamanho': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': hash_conteudo
+        }
+        self._salvar_indice(indice)
+        return hash_conteudo
+
+    def _caminho_cache(self, hash_conteudo: str, variante: str = "") -> Path:
+        sufixo = f"_{variante}" if variante else ""
+        return self.diretorio / f"{hash_conteudo}{sufixo}_v{self.VERSAO_CACHE}.parquet"
+
+    def _carregar_indice(self) -> Dict[str, Any]:
+        if not self.arquivo_indice.exists():
+            return {}
+        try:
+            with open(self.arquivo_indice, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _salvar_indice(self, indice: Dict[str, Any]) -> None:
+        arquivo_temp = self.arquivo_indice.with_suffix(f'.{os.getpid()}.tmp')
+        with open(arquivo_temp, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=2)
+        arquivo_temp.replace(self.arquivo_indice)
@@ -0,0 +1,199 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import logging
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+METODO_CODIGO_SAP = 'codigo_sap'
+METODO_CODIGO_SAP_DIVERGENTE = 'codigo_sap_divergente'
+METODO_NGRAMAS = 'ngramas'
+SEM_CORRESPONDENCIA = 'sem_correspondencia'
+
+# Código SAP do polo no fim do nome normalizado (ex.: 'SP CUBATAO - P276')
+_PADRAO_CODIGO_SAP = re.compile(r'\bP\d{3,}\b')
+
+def extrair_codigo_sap(nome: str) -> Optional[str]:
+    """Último código SAP (P + dígitos) presente no nome, se houver"""
+    codigos = _PADRAO_CODIGO_SAP.findall(nome or '')
+    return codigos[-1] if codigos else None
+
+def nome_sem_codigo(nome: str) -> str:
+    """Parte do nome sem o código SAP (ex.: 'SP CUBATAO - P276' → 'SP CUBATAO')"""
+    return ' '.join(_PADRAO_CODIGO_SAP.sub(' ', nome or '').split()).strip(' -')
+
+def ngramas(nome: str, tamanho: int) -> Set[str]:
+    """N-gramas de caracteres do nome com espaços colapsados e bordas marcadas"""
+    texto = f" {' '.join(str(nome).split())} "
+    if len(texto) < tamanho:
+        return {texto}
+    return {texto[i:i + tamanho] for i in range(len(texto) - tamanho + 1)}
+
+class CorrespondenteProvider:
+    """Correspondência aproximada Provider → 'Polo + SAP' para quem falha no mapeamento exato
+
+    1. Código SAP: o código no nome do provider existe no mapeamento → polo
+       desse código, desde que os nomes sem o código tenham similaridade
+       mínima (similaridade_minima_codigo); senão fica sem líder como
+       'codigo_sap_divergente', para um código digitado errado não mover as
+       ordens para outro líder. Códigos diferentes nunca são o mesmo polo.
+    2. N-gramas: providers sem código são comparados por similaridade de
+       Dice sobre n-gramas de caracteres, via índice invertido n-grama →
+       polos (só os polos que compartilham n-gramas são pontuados). N-gramas
+       frequentes (ex.: a UF no início do nome) não geram candidatos quando
+       nenhum polo poderia atingir a similaridade mínima só com eles.
+
+    Decisões ficam em cache no disco, invalidadas quando o mapeamento muda.
+    Com persistir=False (leitura pelo dashboard) o cache é só consultado: as
+    decisões inéditas ficam em memória e o arquivo do ETL não é regravado.
+    """
+
+    def __init__(self, nomes_mapeamento: Iterable[str], regras: Optional[Dict] = None,
+                 arquivo_cache: Optional[Path] = None, persistir: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.persistir = persistir
+        regras = regras if regras is not None else config.CORRESPONDENCIA_PROVIDER
+        self.tamanho_ngrama = int(regras['tamanho_ngrama'])
+        self.similaridade_minima = float(regras['similaridade_minima'])
+        self.similaridade_minima_codigo = float(regras['similaridade_minima_codigo'])
+        self.arquivo_cache = Path(arquivo_cache) if arquivo_cache is not None else (
+            config.PROCESSED_DIR / config.CORRESPONDENCIAS_PROVIDER
+        )
+
+        self.nomes = np.array(sorted({nome for nome in nomes_mapeamento if nome}), dtype=object)
+        self.assinatura = hashlib.sha1(
+            '\n'.join([
+                str(self.tamanho_ngrama), str(self.similaridade_minima),
+                str(self.similaridade_minima_codigo), *self.nomes
+            ]).encode('utf-8')
+        ).hexdigest()[:12]
+        self._montar_indices()
+        self._cache = self._carregar_cache()
+
+    def _montar_indices(self) -> None:
+        """Índice invertido de n-gramas e índice de códigos SAP do mapeamento"""
+        postings = defaultdict(list)
+        tamanhos = np.zeros(len(self.nomes), dtype='int64')
+        self.por_codigo: Dict[str, int] = {}
+        codigos_repetidos = set()
+
+        for posicao, nome in enumerate(self.nomes):
+            grams = ngramas(nome, self.tamanho_ngrama)
+            tamanhos[posicao] = len(grams)
+            for gram in grams:
+                postings[gram].append(posicao)
+
+            codigo = extrair_codigo_sap(nome)
+            if codigo in self.por_codigo:
+                codigos_repetidos.add(codigo)
+            elif codigo:
+                self.por_codigo[codigo] = posicao
+
+        # Código presente em mais de um polo não identifica o polo
+        for codigo in codigos_repetidos:
+            self.por_codigo.pop(codigo, None)
+
+        # Listas em ordem de posição (searchsorted na contagem dos n-gramas frequentes)
+        self.postings = {gram: np.array(posicoes, dtype='int64') for gram, posicoes in postings.items()}
+        self.tamanhos = tamanhos
+        self.tamanho_minimo = int(tamanhos.min()) if len(tamanhos) else 0
+        # N-grama frequente: presente em mais de 1% dos polos (mínimo 100)
+        self.limite_frequente = max(100, len(self.nomes) // 100)
+
+    def corresponder(self, nome: str) -> Dict:
+        """Decisão para um nome normalizado (sem usar o cache)"""
+        codigo = extrair_codigo_sap(nome)
+        if codigo is not None:
+            posicao = self.por_codigo.get(codigo)
+            if posicao is None:
+                return self._decisao(nome, None, SEM_CORRESPONDENCIA, 0.0)
+            similaridade = self._similaridade(nome_sem_codigo(nome), nome_sem_codigo(self.nomes[posicao]))
+            if similaridade < self.similaridade_minima_codigo:
+                return self._decisao(nome, None, METODO_CODIGO_SAP_DIVERGENTE, similaridade)
+            return self._decisao(nome, self.nomes[posicao], METODO_CODIGO_SAP, similaridade)
+
+        grams = ngramas(nome, self.tamanho_ngrama)
+        listas = [self.postings[gram] for gram in grams if gram in self.postings]
+        raras = [lista for lista in listas if len(lista) <= self.limite_frequente]
+        frequentes = [lista for lista in listas if len(lista) > self.limite_frequente]
+
+        # Polo que só compartilha n-gramas frequentes tem no máximo len(frequentes) em comum:
+        # se nem assim atinge a similaridade mínima, os candidatos saem só dos n-gramas raros
+        limite_so_frequentes = 2.0 * len(frequentes) / (len(grams) + self.tamanho_minimo)
+        if frequentes and limite_so_frequentes >= self.similaridade_minima:
+            raras, frequentes = listas, []
+        if not raras:
+            return self._decisao(nome, None, SEM_CORRESPONDENCIA, 0.0)
+
+        # Pontua só os candidatos (em ordem de posição: empates ficam com o primeiro)
+        candidatos, comuns = np.unique(np.concatenate(raras), return_counts=True)
+        for lista in frequentes:
+            encontrados = np.searchsorted(lista, candidatos).clip(max=len(lista) - 1)
+            comuns += lista[encontrados] == candidatos
+        similaridades = 2.0 * comuns / (len(grams) + self.tamanhos[candidatos])
+        posicao_melhor = int(np.argmax(similaridades))
+        melhor = int(candidatos[posicao_melhor])
+        similaridade = float(similaridades[posicao_melhor])
+
+        if similaridade < self.similaridade_minima:
+            return self._decisao(nome, None, SEM_CORRESPONDENCIA, similaridade)
+        return self._decisao(nome, self.nomes[melhor], METODO_NGRAMAS, similaridade)
+
+    def resolver(self, nomes: Iterable[str]) -> pd.DataFrame:
+        """Decisões para os nomes (cache em disco + correspondência dos ineditos)"""
+        nomes = [nome for nome in pd.unique(pd.Series(list(nomes), dtype=object).dropna()) if nome]
+        ineditos = [nome for nome in nomes if nome not in self._cache]
+
+        if ineditos:
+            for nome in ineditos:
+                self._cache[nome] = self.corresponder(nome)
+            if self.persistir:
+                self._salvar_cache()
+
+        if not nomes:
+            return pd.DataFrame(columns=['Provider_Normalizado', 'Correspondente', 'Metodo', 'Similaridade'])
+        return pd.DataFrame([self._cache[nome] for nome in nomes])
+
+    def _similaridade(self, nome: str, alvo: str) -> float:
+        grams = ngramas(nome, self.tamanho_ngrama)
+        alvo = ngramas(alvo, self.tamanho_ngrama)
+        return 2.0 * len(grams & alvo) / (len(grams) + len(alvo))
+
+    @staticmethod
+    def _decisao(nome: str, correspondente: Optional[str], metodo: str, similaridade: float) -> Dict:
+        return {
+            'Provider_Normalizado': nome,
+            'Correspondente': correspondente,
+            'Metodo': metodo,
+            'Similaridade': round(similaridade, 4)
+        }
+
+    def _carregar_cache(self) -> Dict[str, Dict]:
+        """Decisões gravadas para o mesmo mapeamento (assinatura)"""
+        if not self.arquivo_cache.exists():
+            return {}
+        try:
+            cache = pd.read_parquet(self.arquivo_cache)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Cache de correspondências ilegível, recriando: {e}")
+            return {}
+
+        cache = cache[cache['Assinatura'] == self.assinatura].drop(columns='Assinatura')
+        cache = cache.astype(object).where(cache.notna(), None)
+        return {registro['Provider_Normalizado']: registro for registro in cache.to_dict('records')}
+
+    def _salvar_cache(self) -> None:
+        self.arquivo_cache.parent.mkdir(parents=True, exist_ok=True)
+        cache = pd.DataFrame(list(self._cache.values()))
+        cache['Assinatura'] = self.assinatura
+        arquivo_temp = self.arquivo_cache.with_suffix(f'.{os.getpid()}.tmp')
+        cache.to_parquet(arquivo_temp, index=False)
+        arquivo_temp.replace(self.arquivo_cache)
@@ -0,0 +1,182 @@
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+import logging
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.dimensao_provider import CHAVE_PROVIDER, COLUNA_LIDER, DimensaoProvider
+
+# Ordem em atraso: SLA Cliente >= 2 dias (mesmo critério dos cards e KPIs do dashboard)
+LIMITE_ATRASO_DIAS = 2
+DIMENSOES_CUBO = ['Data', CHAVE_PROVIDER, 'Lider', 'Provider', 'Estado', 'Último Tracking']
+MEDIDAS_CUBO = ['Ordens', 'Em_Atraso', 'SLA_Validos', 'SLA_Soma']
+
+def arquivo_cubo(arquivo_relatorio: Path) -> Path:
+    """Cubo de métricas gravado ao lado do relatório publicado"""
+    arquivo_relatorio = Path(arquivo_relatorio)
+    return arquivo_relatorio.with_name(f"{arquivo_relatorio.stem}_cubo.parquet")
+
+def construir_cubo(df: pd.DataFrame, data_relatorio: date,
+                   dimensao: Optional[DimensaoProvider] = None) -> pd.DataFrame:
+    """Agrega as ordens por (Data, Lider, Provider, Estado, Último Tracking)
+
+    Medidas aditivas: ordens, ordens em atraso, SLAs válidos e soma do SLA, o
+    que basta para total, % em atraso e SLA médio de qualquer recorte.
+    """
+    sla = pd.to_numeric(df['SLA Cliente'], errors='coerce') if 'SLA Cliente' in df.columns else \
+        pd.Series(np.nan, index=df.index)
+    linhas = pd.DataFrame({
+        CHAVE_PROVIDER: df[CHAVE_PROVIDER] if CHAVE_PROVIDER in df.columns else pd.Series(pd.NA, index=df.index, dtype='Int32'),
+        'Provider': df['Provider'] if 'Provider' in df.columns else None,
+        'Estado': df['Estado'] if 'Estado' in df.columns else None,
+        'Último Tracking': df['Último Tracking'] if 'Último Tracking' in df.columns else None,
+        'Ordens': 1,
+        'Em_Atraso': (sla >= LIMITE_ATRASO_DIAS).astype('int64'),
+        'SLA_Validos': sla.notna().astype('int64'),
+        'SLA_Soma': sla.fillna(0.0)
+    })
+
+    chaves = [CHAVE_PROVIDER, 'Provider', 'Estado', 'Último Tracking']
+    cubo = linhas.groupby(chaves, dropna=False, observed=True, sort=False)[MEDIDAS_CUBO].sum().reset_index()
+    cubo.insert(0, 'Data', pd.Timestamp(data_relatorio))
+    # Líder no momento da publicação; a leitura renova pela dimensão atual
+    cubo.insert(2, 'Lider', dimensao.atributo(cubo[CHAVE_PROVIDER], COLUNA_LIDER).astype(object)
+                if dimensao is not None else None)
+    for coluna in ['Provider', 'Estado', 'Último Tracking', 'Lider']:
+        cubo[coluna] = cubo[coluna].astype(object).where(cubo[coluna].notna(), None)
+    return cubo
+
+def gravar_cubo(cubo: pd.DataFrame, arquivo: Path) -> Path:
+    """Grava o cubo (escrita atômica)"""
+    arquivo = Path(arquivo)
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    arquivo_temp = arquivo.with_suffix(f'.{os.getpid()}.tmp')
+    cubo.to_parquet(arquivo_temp, index=False)
+    arquivo_temp.replace(arquivo)
+    return arquivo
+
+def carregar_cubo(arquivo_relatorio: Path, data_relatorio: date) -> 'CuboMetricas':
+    """Cubo publicado ao lado do relatório; snapshots anteriores ao cubo são agregados na leitura"""
+    arquivo = arquivo_cubo(arquivo_relatorio)
+    if arquivo.exists():
+        return CuboMetricas(pd.read_parquet(arquivo))
+
+    logging.getLogger(__name__).info(f"🧮 Snapshot sem cubo, agregando {Path(arquivo_relatorio).name}")
+    disponiveis = set(pq.read_schema(arquivo_relatorio).names)
+    colunas = [coluna for coluna in config.COLUNAS_METRICAS_DASHBOARD if coluna in disponiveis]
+    return CuboMetricas(construir_cubo(pd.read_parquet(arquivo_relatorio, columns=colunas), data_relatorio))
+
+def calcular_metricas(total: int, em_atraso: int, validos: int, soma_sla: float) -> Dict[str, float]:
+    """Total em aberto, em atraso, % em atraso e SLA médio a partir das medidas somadas"""
+    if total == 0 or validos == 0:
+        return {'total_em_aberto': total, 'em_atraso': 0, 'perc_atraso': 0.0, 'sla_medio': 0.0}
+    return {
+        'total_em_aberto': total,
+        'em_atraso': em_atraso,
+        'perc_atraso': round(em_atraso / total * 100, 1),
+        # np.round, como a média do pandas (1.05 → 1.0; o round do Python daria 1.1)
+        'sla_medio': float(np.round(soma_sla / validos, 1))
+    }
+
+def metricas_por_chave(cubo: pd.DataFrame, chave: str) -> Dict:
+    """Métricas de cada valor de `chave` com um único groupby das medidas"""
+    somas = cubo.groupby(chave, dropna=True, observed=True)[MEDIDAS_CUBO].sum()
+    return {
+        valor: calcular_metricas(int(ordens), int(em_atraso), int(validos), soma_sla)
+        for valor, ordens, em_atraso, validos, soma_sla in zip(
+            somas.index, somas['Ordens'], somas['Em_Atraso'], somas['SLA_Validos'], somas['SLA_Soma']
+        )
+    }
+
+class CuboMetricas:
+    """Recortes e métricas do dashboard a partir do cubo pré-agregado
+
+    Cada recorte soma poucas centenas de linhas do cubo em vez de varrer as
+    ordens do dia, com os mesmos totais, % em atraso e SLA médio do cálculo
+    linha a linha. Após com_lideres o cubo fica particionado por líder (fatias
+    contíguas) e cada recorte guarda suas métricas: como o snapshot é
+    compartilhado pelo processo, as reexecuções só consultam dicionários.
+    """
+
+    def __init__(self, cubo: pd.DataFrame):
+        self.logger = logging.getLogger(__name__)
+        self.cubo = cubo
+        self._por_lider: Dict[str, 'CuboMetricas'] = {}
+        self._resultados: Dict[str, object] = {}
+
+    def com_lideres(self, dimensao: DimensaoProvider) -> 'CuboMetricas':
+        """Cubo com a coluna Lider renovada pela dimensão (mapeamento atual), particionado por líder"""
+        cubo = self.cubo.copy()
+        cubo['Lider'] = dimensao.atributo(cubo[CHAVE_PROVIDER], COLUNA_LIDER).astype(object)
+        # Ordenação estável por líder: o recorte de cada líder é uma fatia contígua
+        cubo = cubo.sort_values('Lider', kind='stable', na_position='last', ignore_index=True)
+
+        # Métricas de todos os polos e líderes de uma vez (o líder é função do Provider_Id)
+        metricas_polos = {int(chave): metricas for chave, metricas in metricas_por_chave(cubo, CHAVE_PROVIDER).items()}
+        metricas_lideres = metricas_por_chave(cubo, 'Lider')
+
+        particionado = CuboMetricas(cubo)
+        particionado._resultados['metricas_por_polo'] = metricas_polos
+        for lider, posicoes in cubo.groupby('Lider', sort=False).indices.items():
+            fatia = CuboMetricas(cubo.iloc[posicoes[0]:posicoes[-1] + 1])
+            fatia._resultados['metricas'] = metricas_lideres[lider]
+            fatia._resultados['metricas_por_polo'] = {
+                chave: metricas_polos[chave] for chave in sorted(fatia.cubo[CHAVE_PROVIDER].dropna().astype(int).unique())
+            }
+            particionado._por_lider[lider] = fatia
+        return particionado
+
+    def do_lider(self, lider: str) -> 'CuboMetricas':
+        if lider in self._por_lider:
+            return self._por_lider[lider]
+        if self._por_lider:
+            return CuboMetricas(self.cubo.iloc[0:0])
+        return CuboMetricas(self.cubo[self.cubo['Lider'] == lider])
+
+    def do_polo(self, provider_id: int) -> 'CuboMetricas':
+        return CuboMetricas(self.cubo[self.cubo[CHAVE_PROVIDER] == provider_id])
+
+    @property
+    def total(self) -> int:
+        return int(self.cubo['Ordens'].sum())
+
+    def metricas(self) -> Dict[str, float]:
+        """Total em aberto, em atraso, % em atraso e SLA médio do recorte"""
+        if 'metricas' not in self._resultados:
+            self._resultados['metricas'] = self._calcular_metricas()
+        return dict(self._resultados['metricas'])
+
+    def _calcular_metricas(self) -> Dict[str, float]:
+        return calcular_metricas(self.total, int(self.cubo['Em_Atraso'].sum()),
+                                 int(self.cubo['SLA_Validos'].sum()), self.cubo['SLA_Soma'].sum())
+
+    def metricas_por_polo(self) -> Dict[int, Dict[str, float]]:
+        """Métricas de cada Provider_Id do recorte"""
+        if 'metricas_por_polo' not in self._resultados:
+            self._resultados['metricas_por_polo'] = {
+                int(chave): metricas for chave, metricas in metricas_por_chave(self.cubo, CHAVE_PROVIDER).items()
+            }
+        return {provider_id: dict(metricas) for provider_id, metricas in self._resultados['metricas_por_polo'].items()}
+
+    def ranking_atraso(self) -> pd.Series:
+        """Ordens em atraso por polo (nome do relatório), do maior para o menor"""
+        if 'ranking_atraso' not in self._resultados:
+            ranking = self.cubo.groupby('Provider', dropna=True)['Em_Atraso'].sum()
+            ranking = ranking[ranking > 0].sort_index()
+            self._resultados['ranking_atraso'] = ranking.sort_values(ascending=False, kind='stable')
+        return self._resultados['ranking_atraso'].copy()
+
+    def contagem_tracking(self) -> pd.Series:
+        """Ordens por Último Tracking (sem os nulos), do maior para o menor"""
+        if 'contagem_tracking' not in self._resultados:
+            contagem = self.cubo.groupby('Último Tracking', dropna=True)['Ordens'].sum()
+            contagem = contagem[contagem > 0].sort_index()
+            self._resultados['contagem_tracking'] = contagem.sort_values(ascending=False, kind='stable')
+        return self._resultados['contagem_tracking'].copy()
@@ -0,0 +1,114 @@
+import pandas as pd
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+CHAVE_PRIMARIA = 'Ordem PagBank'
+
+def calcular_hash_linhas(df: pd.DataFrame, colunas: Optional[List[str]] = None) -> pd.Series:
+    """Hash estável (uint64) por linha sobre as colunas monitoradas
+
+    As colunas entram sempre na ordem de config.COLUNAS_ATUALIZAR, então a
+    ordem das colunas no arquivo de origem não altera o resultado.
+    """
+    colunas = colunas if colunas is not None else config.COLUNAS_ATUALIZAR
+    normalizado = pd.DataFrame(
+        {col: _normalizar_para_hash(df[col]) for col in colunas if col in df.columns},
+        index=df.index
+    )
+    return pd.util.hash_pandas_object(normalizado, index=False)
+
+def _normalizar_para_hash(serie: pd.Series) -> pd.Series:
+    """Representação canônica da coluna (independe de resolução de data e tipo nullable)"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.astype('datetime64[ns]')
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64')
+    return serie.astype('string').fillna('').astype(object)
+
+class SafraDetectorDelta:
+    """Classifica as linhas do relatório em novas, alteradas, inalteradas e desaparecidas
+
+    Compara o hash de cada linha (chave 'Ordem PagBank') com o do relatório
+    anterior e deixa passar para as transformações apenas novas e alteradas.
+    Aceita o relatório inteiro ou bloco a bloco (modo streaming).
+    """
+
+    def __init__(self, ativo: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.arquivo_estado = config.PROCESSED_DIR / config.HASHES_LINHAS
+        self.ativo = ativo
+        self.hashes_anteriores = self._carregar_estado() if ativo else pd.Series(dtype='uint64')
+        self._hashes_atuais: List[pd.DataFrame] = []
+        self.contagens = {'novos': 0, 'alterados': 0, 'inalterados': 0}
+
+    def filtrar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Retorna apenas as linhas novas ou alteradas em relação ao relatório anterior"""
+        if CHAVE_PRIMARIA not in df.columns:
+            return df
+
+        hashes = calcular_hash_linhas(df)
+        self._hashes_atuais.append(pd.DataFrame({
+            CHAVE_PRIMARIA: df[CHAVE_PRIMARIA].array,
+            'hash': hashes.to_numpy()
+        }))
+
+        posicoes = self.hashes_anteriores.index.get_indexer(df[CHAVE_PRIMARIA])
+        novos = posicoes == -1
+        inalterados = ~novos
+        if inalterados.any():
+            inalterados[~novos] = (
+                self.hashes_anteriores.to_numpy()[posicoes[~novos]] == hashes.to_numpy()[~novos]
+            )
+
+        self.contagens['novos'] += int(novos.sum())
+        self.contagens['inalterados'] += int(inalterados.sum())
+        self.contagens['alterados'] += int(len(df) - novos.sum() - inalterados.sum())
+
+        return df[~inalterados]
+
+    def metricas(self) -> Dict[str, int]:
+        """Contagens do delta, incluindo chaves que sumiram do relatório"""
+        metricas = dict(self.contagens)
+        atuais = self._estado_atual()
+        metricas['desaparecidos'] = int(
+            (~self.hashes_anteriores.index.isin(atuais.index)).sum()
+        ) if self.ativo else 0
+        return metricas
+
+    def salvar_estado(self) -> None:
+        """Grava os hashes do relatório atual (chamar após a carga bem-sucedida)"""
+        estado = self._estado_atual()
+        arquivo_temp = self.arquivo_estado.with_suffix(f'.{os.getpid()}.tmp')
+        estado.rename('hash').rename_axis(CHAVE_PRIMARIA).reset_index().to_parquet(
+            arquivo_temp, index=False
+        )
+        arquivo_temp.replace(self.arquivo_estado)
+        self.logger.info(f"🔑 Hashes de {len(estado):,} ordens gravados")
+
+    def descartar_estado(self) -> None:
+        """Remove os hashes gravados (próxima execução reprocessa todas as linhas)"""
+        self.arquivo_estado.unlink(missing_ok=True)
+
+    def _estado_atual(self) -> pd.Series:
+        if not self._hashes_atuais:
+            return pd.Series(dtype='uint64')
+        atual = pd.concat(self._hashes_atuais, ignore_index=True)
+        atual = atual[atual[CHAVE_PRIMARIA].notna()].drop_duplicates(CHAVE_PRIMARIA, keep='last')
+        return atual.set_index(CHAVE_PRIMARIA)['hash']
+
+    def _carregar_estado(self) -> pd.Series:
+        if not self.arquivo_estado.exists():
+            return pd.Series(dtype='uint64')
+        try:
+            estado = pd.read_parquet(self.arquivo_estado)
+            return estado.set_index(CHAVE_PRIMARIA)['hash']
+        except Exception as e:
+            self.logger.warning(f"⚠️ Estado do delta ilegível, reprocessando tudo: {e}")
+            return pd.Series(dtype='uint64')
@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.utils.normalizacao import normalizar_polos_sap, normalizar_providers
+from src.etl.correspondencia_provider import (
+    CorrespondenteProvider, METODO_CODIGO_SAP_DIVERGENTE, SEM_CORRESPONDENCIA
+)
+
+CHAVE_PROVIDER = 'Provider_Id'
+NOME_NORMALIZADO = 'Provider_Normalizado'
+COLUNA_LIDER = 'Líder PagResolve'
+# Como o provider foi ligado ao mapeamento: 'exata', 'codigo_sap', 'ngramas' ou sem correspondência
+COLUNA_CORRESPONDENCIA = 'Correspondencia'
+CORRESPONDENCIA_EXATA = 'exata'
+# Atributos copiados do mapeamento de líderes (pagresolve_regionais)
+COLUNAS_MAPEAMENTO = ['Polo + SAP', 'Cód. SAP', 'Coordenador PagResolve', COLUNA_LIDER, 'Região', 'UF']
+
+def carregar_mapeamento_lideres(arquivo: Optional[Path] = None) -> pd.DataFrame:
+    """Lê o mapeamento Polo + SAP → líder (vazio se o arquivo não existir)"""
+    arquivo = Path(arquivo) if arquivo is not None else config.INPUT_DIR / config.MAPEAMENTO_LIDERES
+    if not arquivo.exists():
+        logging.getLogger(__name__).warning(f"⚠️ Mapeamento de líderes não encontrado: {arquivo}")
+        return pd.DataFrame(columns=COLUNAS_MAPEAMENTO)
+
+    from src.utils.leitor_planilhas import ler_planilha
+    return ler_planilha(arquivo)
+
+class DimensaoProvider:
+    """Tabela de dimensão de providers com chave inteira (Provider_Id)
+
+    Uma linha por Provider_Normalizado, com os atributos do mapeamento de
+    líderes. As chaves são densas (Provider_Id = posição na tabela) e
+    estáveis entre execuções: o fato guarda só o Provider_Id e troca de
+    líder no mapeamento altera apenas a dimensão. Providers fora do
+    mapeamento exato herdam os atributos do polo indicado pelo
+    CorrespondenteProvider (código SAP ou n-gramas).
+    """
+
+    def __init__(self, arquivo: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.arquivo = Path(arquivo) if arquivo is not None else config.PROCESSED_DIR / config.DIMENSAO_PROVIDER
+        self.tabela = self._carregar()
+
+    @classmethod
+    def carregar_ou_construir(cls, mapeamento: Optional[pd.DataFrame] = None) -> 'DimensaoProvider':
+        """Dimensão persistida pelo ETL com atributos renovados pelo mapeamento (só em memória)
+
+        Sem dimensão persistida, as chaves são criadas a partir do mapeamento.
+        Nada é gravado: nem a dimensão nem o cache de correspondências do ETL.
+        """
+        dimensao = cls()
+        if mapeamento is not None:
+            dimensao.atualizar(mapeamento=mapeamento, persistir_correspondencias=False)
+        return dimensao
+
+    def _carregar(self) -> pd.DataFrame:
+        if self.arquivo.exists():
+            return pd.read_parquet(self.arquivo)
+        return self._tabela_vazia()
+
+    def _tabela_vazia(self) -> pd.DataFrame:
+        tabela = pd.DataFrame({
+            CHAVE_PROVIDER: pd.Series(dtype='int32'),
+            NOME_NORMALIZADO: pd.Series(dtype=object)
+        })
+        for coluna in COLUNAS_MAPEAMENTO + [COLUNA_CORRESPONDENCIA]:
+            tabela[coluna] = pd.Series(dtype=object)
+        return tabela
+
+    def atualizar(self, providers_normalizados: Optional[pd.Series] = None,
+                  mapeamento: Optional[pd.DataFrame] = None,
+                  persistir_correspondencias: bool = True) -> int:
+        """Acrescenta providers ainda sem chave e renova os atributos do mapeamento
+
+        Retorna a quantidade de chaves criadas.
+        """
+        candidatos = []
+        if mapeamento is not None and 'Polo + SAP' in mapeamento.columns:
+            mapeamento = mapeamento.assign(**{NOME_NORMALIZADO: normalizar_polos_sap(mapeamento['Polo + SAP'])})
+            mapeamento = mapeamento[mapeamento[NOME_NORMALIZADO] != ""]
+            mapeamento = mapeamento[~mapeamento[NOME_NORMALIZADO].duplicated(keep='last')]
+            candidatos.append(pd.Series(mapeamento[NOME_NORMALIZADO].to_numpy(), dtype=object))
+        else:
+            mapeamento = None
+
+        if providers_normalizados is not None:
+            unicos = pd.unique(providers_normalizados.dropna().astype(object))
+            candidatos.append(pd.Series(unicos, dtype=object))
+
+        novos = pd.Series(dtype=object)
+        if candidatos:
+            nomes = pd.Series(pd.unique(pd.concat(candidatos, ignore_index=True)), dtype=object)
+            nomes = nomes[nomes != ""]
+            novos = nomes[~nomes.isin(self.tabela[NOME_NORMALIZADO])]
+
+        if len(novos):
+            inicio = len(self.tabela)
+            linhas = self._tabela_vazia().reindex(range(len(novos)))
+            linhas[CHAVE_PROVIDER] = np.arange(inicio, inicio + len(novos), dtype='int32')
+            linhas[NOME_NORMALIZADO] = novos.to_numpy()
+            self.tabela = pd.concat([self.tabela, linhas], ignore_index=True)
+            self.tabela[CHAVE_PROVIDER] = self.tabela[CHAVE_PROVIDER].astype('int32')
+
+        if mapeamento is not None:
+            # Mapeamento é a fonte dos atributos: polos que saíram dele ficam sem líder
+            # Linha do mapeamento usada por cada provider da dimensão (-1 = nenhuma)
+            origem = pd.Index(mapeamento[NOME_NORMALIZADO]).get_indexer(self.tabela[NOME_NORMALIZADO])
+            metodos = np.where(origem >= 0, CORRESPONDENCIA_EXATA, SEM_CORRESPONDENCIA).astype(object)
+
+            sem_mapeamento = np.flatnonzero(origem < 0)
+            if len(sem_mapeamento):
+                decisoes = CorrespondenteProvider(
+                    mapeamento[NOME_NORMALIZADO], persistir=persistir_correspondencias
+                ).resolver(
+                    self.tabela[NOME_NORMALIZADO].iloc[sem_mapeamento]
+                )
+                decisoes = decisoes.set_index('Provider_Normalizado').reindex(
+                    self.tabela[NOME_NORMALIZADO].iloc[sem_mapeamento]
+                )
+                correspondentes = pd.Index(mapeamento[NOME_NORMALIZADO]).get_indexer(
+                    decisoes['Correspondente'].astype(object)
+                )
+                origem[sem_mapeamento] = correspondentes
+                # Código SAP com nome divergente continua sem líder, mas marcado para revisão
+                metodo_decisao = decisoes['Metodo'].astype(object).to_numpy()
+                metodos[sem_mapeamento] = np.where(
+                    (correspondentes >= 0) | (metodo_decisao == METODO_CODIGO_SAP_DIVERGENTE),
+                    metodo_decisao, SEM_CORRESPONDENCIA
+                )
+
+            ligados = origem >= 0
+            for coluna in COLUNAS_MAPEAMENTO:
+                valores = np.full(len(self.tabela), None, dtype=object)
+                if coluna in mapeamento.columns:
+                    valores[ligados] = mapeamento[coluna].astype(object).to_numpy()[origem[ligados]]
+                self.tabela[coluna] = pd.Series(valores, dtype=object).where(lambda v: v.notna(), None)
+            self.tabela[COLUNA_CORRESPONDENCIA] = metodos
+
+        return len(novos)
+
+    def chaves(self, providers_normalizados: pd.Series) -> pd.Series:
+        """Provider_Id de cada linha (<NA> para providers fora da dimensão)"""
+        codigos, unicos = pd.factorize(providers_normalizados)
+        posicoes = pd.Index(self.tabela[NOME_NORMALIZADO]).get_indexer(pd.Index(unicos, dtype=object))
+        posicoes = np.append(posicoes, -1)[codigos]
+        return pd.Series(pd.arrays.IntegerArray(
+            np.where(posicoes >= 0, posicoes, 0).astype('int32'), posicoes < 0
+        ), index=providers_normalizados.index)
+
+    def atribuir_chaves(self, df: pd.DataFrame, mapeamento: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Atualiza a dimensão com os providers do DataFrame e adiciona Provider_Id"""
+        if NOME_NORMALIZADO not in df.columns:
+            if 'Provider' not in df.columns:
+                return df
+            df[NOME_NORMALIZADO] = normalizar_providers(df['Provider'])
+
+        criadas = self.atualizar(df[NOME_NORMALIZADO], mapeamento)
+        df[CHAVE_PROVIDER] = self.chaves(df[NOME_NORMALIZADO])
+        if criadas:
+            self.logger.info(f"🏷️ Dimensão de providers: {criadas} novas chaves ({len(self.tabela)} no total)")
+        if mapeamento is not None:
+            self._registrar_correspondencias(df[CHAVE_PROVIDER])
+        return df
+
+    def resumo_correspondencias(self, chaves: pd.Series) -> Dict[str, Dict[str, int]]:
+        """Ordens e providers distintos por método de correspondência ao mapeamento"""
+        metodos = self.atributo(chaves, COLUNA_CORRESPONDENCIA)
+        ordens = metodos.value_counts()
+        providers = metodos.groupby(chaves.to_numpy(), observed=True).first().value_counts()
+        return {
+            metodo: {'ordens': int(ordens.get(metodo, 0)), 'providers': int(providers.get(metodo, 0))}
+            for metodo in metodos.cat.categories
+        }
+
+    def _registrar_correspondencias(self, chaves: pd.Series) -> None:
+        resumo = self.resumo_correspondencias(chaves)
+        aproximadas = {metodo: valores for metodo, valores in resumo.items()
+                       if metodo not in (CORRESPONDENCIA_EXATA, SEM_CORRESPONDENCIA, METODO_CODIGO_SAP_DIVERGENTE)
+                       and valores['ordens']}
+        for metodo, valores in aproximadas.items():
+            self.logger.info(
+                f"🔎 Correspondência aproximada ({metodo}): {valores['ordens']:,} ordens de {valores['providers']} providers"
+            )
+        presentes = self.tabela[NOME_NORMALIZADO].iloc[chaves.dropna().unique().astype("int64")]
+        for metodo, descricao in ((METODO_CODIGO_SAP_DIVERGENTE, "Código SAP do mapeamento com nome divergente, sem líder"),
+                                  (SEM_CORRESPONDENCIA, "Sem líder no mapeamento")):
+            sem = resumo.get(metodo, {'ordens': 0, 'providers': 0})
+            if sem['ordens']:
+                nomes = self.tabela.loc[self.tabela[COLUNA_CORRESPONDENCIA] == metodo, NOME_NORMALIZADO]
+                nomes = nomes[nomes.isin(presentes)]
+                self.logger.warning(
+                    f"⚠️ {descricao}: {sem['ordens']:,} ordens de {sem['providers']} providers "
+                    f"({', '.join(nomes.head(10))})"
+                )
+
+    def atributo(self, chaves: pd.Series, coluna: str = COLUNA_LIDER) -> pd.Series:
+        """Atributo da dimensão para cada chave, por indexação de array (category)"""
+        codigos_dimensao, categorias = pd.factorize(self.tabela[coluna])
+        # Chave ausente (-1) aponta para o código nulo no fim
+        codigos_dimensao = np.append(codigos_dimensao, -1)
+        posicoes = chaves.astype('Int64').fillna(-1).to_numpy(dtype='int64')
+        return pd.Series(
+            pd.Categorical.from_codes(codigos_dimensao[posicoes], categories=pd.Index(categorias, dtype=object)),
+            index=chaves.index
+        )
+
+    def associar_lider(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Adiciona a coluna Lider a partir do Provider_Id (calculado se ausente)"""
+        chaves = df[CHAVE_PROVIDER] if CHAVE_PROVIDER in df.columns else self.chaves(
+            df[NOME_NORMALIZADO] if NOME_NORMALIZADO in df.columns else normalizar_providers(df['Provider'])
+        )
+        return df.assign(**{CHAVE_PROVIDER: chaves, 'Lider': self.atributo(chaves, COLUNA_LIDER)})
+
+    def lideres(self) -> List[str]:
+        """Líderes presentes na dimensão, em ordem alfabética"""
+        return sorted(self.tabela[COLUNA_LIDER].dropna().unique().tolist())
+
+    def mascara_lider(self, chaves: pd.Series, lider: str) -> np.ndarray:
+        """Linhas cujo provider pertence ao líder (lookup em array booleano por chave)"""
+        do_lider = np.append((self.tabela[COLUNA_LIDER] == lider).to_numpy(dtype=bool), False)
+        return do_lider[chaves.astype('Int64').fillna(-1).to_numpy(dtype='int64')]
+
+    def salvar(self) -> Path:
+        """Grava a dimensão (escrita atômica)"""
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        arquivo_temp = self.arquivo.with_suffix(f'.{os.getpid()}.tmp')
+        self.tabela.to_parquet(arquivo_temp, index=False)
+        arquivo_temp.replace(self.arquivo)
+        return self.arquivo
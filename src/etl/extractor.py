@@ -1,19 +1,28 @@
 import pandas as pd
+import numpy as np
 import logging
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 import sys
 import os
 
 # Adicionar config ao path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.etl.base_historica import BaseHistoricaParticionada
+from src.etl.cache import SafraIngestCache
+from src.utils.schema import compilar_plano_leitura
+from src.utils.leitor_planilhas import detectar_formato, ler_planilha, obter_leitor
 
 class SafraExtractor:
     """Extrator de dados otimizado e robusto"""
     
-    def __init__(self):
+    def __init__(self, usar_cache: bool = True):
         self.logger = logging.getLogger(__name__)
+        self.cache = SafraIngestCache() if usar_cache else None
+        self.plano = compilar_plano_leitura()
+        self.base_historica = BaseHistoricaParticionada()
     
     def extrair_relatorio_diario(self, arquivo_path: Optional[str] = None) -> pd.DataFrame:
         """Extrai dados do relatório diário com validação robusta"""
@@ -26,12 +35,28 @@ class SafraExtractor:
             if not Path(arquivo_path).exists():
                 raise FileNotFoundError(f"Arquivo não encontrado: {arquivo_path}")
             
-            df = pd.read_excel(
-                arquivo_path,
-                sheet_name=0,
-                na_values=['', ' ', 'N/A', 'n/a', '#N/D', '#REF!', '#VALOR!'],
-                keep_default_na=True
-            )
+            variante_cache = f"relatorio_diario_{self.plano.assinatura}"
+            df = self.cache.obter(arquivo_path, variante_cache) if self.cache else None
+            
+            if df is None:
+                # Leitura tipada: projeção, tipos e nulos definidos pelo schema
+                formato = detectar_formato(arquivo_path)
+                if formato == 'excel':
+                    df = ler_planilha(
+                        arquivo_path,
+                        sheet_name=0,
+                        registrar=True,
+                        **self.plano.parametros_leitura()
+                    )
+                else:
+                    self.logger.info(f"📄 Formato detectado: {formato}")
+                    df = obter_leitor().ler_tabela_arrow(
+                        arquivo_path, formato, registrar=True, **self.plano.parametros_arrow()
+                    )
+                df = self.plano.aplicar_tipos(df)
+                
+                if self.cache and not df.empty:
+                    self.cache.salvar(arquivo_path, df, variante_cache)
             
             if df.empty:
                 raise ValueError("Arquivo está vazio")
@@ -46,14 +71,112 @@ class SafraExtractor:
             self.logger.error(f"❌ Erro ao extrair relatório diário: {e}")
             raise
     
-    def extrair_base_historica(self) -> pd.DataFrame:
-        """Extrai base histórica ou cria uma nova se não existir"""
-        arquivo_historico = config.PROCESSED_DIR / config.BASE_HISTORICA
+    def extrair_relatorio_diario_em_blocos(self, arquivo_path: Optional[str] = None,
+                                           tamanho_bloco: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Extrai o relatório diário em blocos de linhas (openpyxl read-only)
+        
+        Mantém em memória apenas um bloco de `tamanho_bloco` linhas por vez,
+        permitindo processar relatórios maiores que o orçamento de memória.
+        CSV, Parquet e Feather são lidos em lotes pelo pyarrow.
+        """
+        import openpyxl
+        
+        if arquivo_path is None:
+            arquivo_path = config.INPUT_DIR / config.RELATORIO_DIARIO
+        tamanho_bloco = tamanho_bloco or config.CHUNK_SIZE
+        
+        if not Path(arquivo_path).exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {arquivo_path}")
+        
+        formato = detectar_formato(arquivo_path)
+        if formato != 'excel':
+            yield from self._extrair_blocos_arrow(arquivo_path, formato, tamanho_bloco)
+            return
+        
+        self.logger.info(f"🔄 Extraindo relatório diário em blocos de {tamanho_bloco:,}: {arquivo_path}")
+        
+        workbook = openpyxl.load_workbook(arquivo_path, read_only=True, data_only=True)
+        try:
+            linhas = workbook.worksheets[0].iter_rows(values_only=True)
+            
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                raise ValueError("Arquivo está vazio")
+            
+            # Projeção: apenas as colunas do schema são materializadas
+            indices = [
+                i for i, nome in enumerate(cabecalho)
+                if nome is not None and self.plano.usar_coluna(str(nome))
+            ]
+            colunas = [str(cabecalho[i]) for i in indices]
+            if 'Ordem PagBank' not in colunas:
+                raise ValueError("Coluna 'Ordem PagBank' não encontrada")
+            
+            projetar = itemgetter(*indices)
+            if len(indices) == 1:
+                projetar = lambda linha, _i=indices[0]: (linha[_i],)
+            
+            total_registros = 0
+            bloco = []
+            for linha in linhas:
+                bloco.append(projetar(linha))
+                if len(bloco) >= tamanho_bloco:
+                    total_registros += len(bloco)
+                    yield self._montar_bloco(bloco, colunas)
+                    bloco = []
+            
+            if bloco:
+                total_registros += len(bloco)
+                yield self._montar_bloco(bloco, colunas)
+            
+            self.logger.info(f"✅ Extraídos {total_registros:,} registros do relatório diário (streaming)")
+            
+        finally:
+            workbook.close()
+    
+    def _extrair_blocos_arrow(self, arquivo_path, formato: str, tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+        """Blocos tipados de arquivos CSV/Parquet/Feather"""
+        self.logger.info(f"🔄 Extraindo relatório ({formato}) em blocos de {tamanho_bloco:,}: {arquivo_path}")
+        
+        total_registros = 0
+        blocos = obter_leitor().iterar_tabela_arrow(
+            arquivo_path, formato, tamanho_bloco, **self.plano.parametros_arrow()
+        )
+        for bloco in blocos:
+            if total_registros == 0 and 'Ordem PagBank' not in bloco.columns:
+                raise ValueError("Coluna 'Ordem PagBank' não encontrada")
+            total_registros += len(bloco)
+            yield self.plano.aplicar_tipos(bloco)
+        
+        self.logger.info(f"✅ Extraídos {total_registros:,} registros do relatório diário (streaming)")
+    
+    def _montar_bloco(self, linhas: list, colunas: list) -> pd.DataFrame:
+        """Converte linhas brutas do openpyxl em DataFrame tipado pelo schema"""
+        # dtype object evita que códigos numéricos de colunas texto virem float ("123.0")
+        df = pd.DataFrame(linhas, columns=colunas, dtype=object)
+        
+        colunas_texto = df.select_dtypes(include=['object']).columns
+        if len(colunas_texto) > 0:
+            df[colunas_texto] = df[colunas_texto].replace(config.VALORES_NA, np.nan)
+        
+        return self.plano.aplicar_tipos(df)
+    
+    def existe_base_historica(self) -> bool:
+        return self.base_historica.existe()
+    
+    def extrair_base_historica(self, chaves: Optional[pd.Series] = None) -> pd.DataFrame:
+        """Extrai a base histórica resolvida (base compactada + log de alterações)
         
+        Com chaves informadas, lê apenas a versão atual dessas ordens.
+        """
         try:
-            if arquivo_historico.exists():
-                self.logger.info(f"🔄 Carregando base histórica: {arquivo_historico}")
-                df = pd.read_parquet(arquivo_historico)
+            if self.base_historica.existe():
+                descricao = "completa" if chaves is None else f"{len(chaves):,} ordens do relatório"
+                self.logger.info(f"🔄 Carregando base histórica ({descricao})")
+                df = (
+                    self.base_historica.ler() if chaves is None
+                    else self.base_historica.ler_versoes_atuais(chaves)
+                )
                 self.logger.info(f"✅ Base histórica carregada: {len(df):,} registros")
                 return df
             else:
@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.dimensao_provider import CHAVE_PROVIDER, COLUNA_LIDER, DimensaoProvider
+
+COLUNAS_INDICE = [CHAVE_PROVIDER, 'Provider', 'Lider', 'Inicio', 'Fim', 'Ordem']
+
+def indexar_por_provider(df: pd.DataFrame, dimensao: DimensaoProvider) -> Tuple[pd.DataFrame, 'IndiceLideres']:
+    """Ordena o fato por Provider_Id (estável) e monta o índice de faixas por polo
+
+    Linhas sem Provider_Id ficam no fim, fora de qualquer faixa.
+    """
+    if df.empty or CHAVE_PROVIDER not in df.columns or 'Provider' not in df.columns:
+        return df, IndiceLideres(pd.DataFrame(columns=COLUNAS_INDICE))
+
+    chaves = df[CHAVE_PROVIDER].astype('Int64').to_numpy(dtype='int64', na_value=np.iinfo('int64').max)
+    permutacao = np.argsort(chaves, kind='stable')
+    df_ordenado = df.take(permutacao).reset_index(drop=True)
+    chaves_ordenadas = chaves[permutacao]
+
+    # Uma faixa [Inicio, Fim) por Provider_Id presente
+    validas = chaves_ordenadas != np.iinfo('int64').max
+    ids, inicios = np.unique(chaves_ordenadas[validas], return_index=True)
+    fins = np.append(inicios[1:], validas.sum())
+
+    polos = pd.DataFrame({
+        CHAVE_PROVIDER: ids.astype('int32'),
+        # Nome exibido e ordem de exibição: primeira ocorrência no fato original
+        # (a ordenação é estável, então é a primeira linha de cada faixa)
+        'Provider': df_ordenado['Provider'].astype(object).to_numpy()[inicios],
+        'Inicio': inicios.astype('int64'),
+        'Fim': fins.astype('int64'),
+        'Ordem': permutacao[inicios].astype('int64')
+    })
+    indice = IndiceLideres(polos)
+    indice.atualizar_lideres(dimensao)
+    return df_ordenado, indice
+
+class IndiceLideres:
+    """Adjacência líder → polos e polo → líder sobre o fato ordenado por Provider_Id
+
+    Cada polo guarda a faixa de linhas [Inicio, Fim) que ocupa no fato, então
+    selecionar um líder é um lookup em dicionário mais fatias contíguas, sem
+    varrer o DataFrame inteiro com máscara booleana.
+    """
+
+    def __init__(self, polos: pd.DataFrame):
+        self.logger = logging.getLogger(__name__)
+        self.polos = polos.sort_values('Ordem', kind='stable').reset_index(drop=True) if len(polos) else polos
+        if 'Lider' not in self.polos.columns:
+            self.polos['Lider'] = None
+        self._montar_adjacencias()
+
+    def _montar_adjacencias(self) -> None:
+        self._faixa_do_polo: Dict[str, Tuple[int, int]] = {}
+        self._chave_do_polo: Dict[str, int] = {}
+        self._lider_do_polo: Dict[str, Optional[str]] = {}
+        self._polos_do_lider: Dict[str, List[str]] = {}
+
+        colunas = [CHAVE_PROVIDER, 'Provider', 'Lider', 'Inicio', 'Fim']
+        for chave, polo, lider, inicio, fim in self.polos[colunas].itertuples(index=False):
+            lider = None if pd.isna(lider) else lider
+            self._faixa_do_polo[polo] = (int(inicio), int(fim))
+            self._chave_do_polo[polo] = int(chave)
+            self._lider_do_polo[polo] = lider
+            if lider is not None:
+                self._polos_do_lider.setdefault(lider, []).append(polo)
+
+    @classmethod
+    def carregar(cls, arquivo: Optional[Path] = None) -> Optional['IndiceLideres']:
+        """Índice publicado pelo ETL (None se ainda não existir)"""
+        arquivo = Path(arquivo) if arquivo is not None else config.PROCESSED_DIR / config.INDICE_LIDERES
+        if not arquivo.exists():
+            return None
+        return cls(pd.read_parquet(arquivo))
+
+    def atualizar_lideres(self, dimensao: DimensaoProvider) -> 'IndiceLideres':
+        """Renova os líderes dos polos pela dimensão (mapeamento pode ter mudado depois do ETL)"""
+        if len(self.polos):
+            self.polos['Lider'] = dimensao.atributo(self.polos[CHAVE_PROVIDER], COLUNA_LIDER).astype(object).to_numpy()
+            self.polos['Lider'] = self.polos['Lider'].where(self.polos['Lider'].notna(), None)
+        self._montar_adjacencias()
+        return self
+
+    def lideres(self) -> List[str]:
+        """Líderes com ao menos um polo no fato, em ordem alfabética"""
+        return sorted(self._polos_do_lider)
+
+    def polos_do_lider(self, lider: str) -> List[str]:
+        """Polos do líder na ordem em que aparecem no relatório"""
+        return list(self._polos_do_lider.get(lider, []))
+
+    def lider_do_polo(self, polo: str) -> Optional[str]:
+        return self._lider_do_polo.get(polo)
+
+    def chave_do_polo(self, polo: str) -> Optional[int]:
+        """Provider_Id do polo (chave do cubo de métricas)"""
+        return self._chave_do_polo.get(polo)
+
+    def posicoes_do_lider(self, lider: str) -> np.ndarray:
+        """Posições das linhas do líder no fato ordenado (concatenação das faixas)"""
+        faixas = [self._faixa_do_polo[polo] for polo in self._polos_do_lider.get(lider, [])]
+        if not faixas:
+            return np.array([], dtype='int64')
+        return np.concatenate([np.arange(inicio, fim) for inicio, fim in faixas])
+
+    def faixa_do_lider(self, lider: str) -> Optional[Tuple[int, int]]:
+        """Faixa única [Inicio, Fim) do líder, se seus polos forem adjacentes no fato"""
+        faixas = [self._faixa_do_polo[polo] for polo in self._polos_do_lider.get(lider, [])]
+        if not faixas or any(fim != inicio for (_, fim), (inicio, _) in zip(faixas, faixas[1:])):
+            return None
+        return faixas[0][0], faixas[-1][1]
+
+    def linhas_do_lider(self, df_ordenado: pd.DataFrame, lider: str) -> pd.DataFrame:
+        """Linhas do líder, polo a polo, a partir das faixas do índice
+
+        Com o fato agrupado por líder (agrupar_por_lider) é uma fatia, sem cópia.
+        """
+        faixa = self.faixa_do_lider(lider)
+        if faixa is not None:
+            return df_ordenado.iloc[faixa[0]:faixa[1]]
+        return df_ordenado.take(self.posicoes_do_lider(lider))
+
+    def agrupar_por_lider(self, df_ordenado: pd.DataFrame) -> Tuple[pd.DataFrame, 'IndiceLideres']:
+        """Reordena o fato para que cada líder ocupe uma faixa contígua
+
+        Líderes em ordem alfabética, polos do líder na ordem do relatório e, no
+        fim, polos sem líder e linhas sem Provider_Id. As linhas de cada líder
+        ficam na mesma ordem que posicoes_do_lider devolve.
+        """
+        blocos = [self.posicoes_do_lider(lider) for lider in self.lideres()]
+        agrupadas = np.concatenate(blocos) if blocos else np.array([], dtype='int64')
+        restantes = np.setdiff1d(np.arange(len(df_ordenado)), agrupadas, assume_unique=True)
+        permutacao = np.concatenate([agrupadas, restantes]).astype('int64')
+
+        nova_posicao = np.empty_like(permutacao)
+        nova_posicao[permutacao] = np.arange(len(permutacao))
+        polos = self.polos.copy()
+        if len(polos):
+            polos['Inicio'] = nova_posicao[polos['Inicio'].to_numpy(dtype='int64')]
+            polos['Fim'] = polos['Inicio'] + (self.polos['Fim'] - self.polos['Inicio'])
+        return df_ordenado.take(permutacao).reset_index(drop=True), IndiceLideres(polos)
+
+    def linhas_do_polo(self, df_ordenado: pd.DataFrame, polo: str) -> pd.DataFrame:
+        """Fatia contígua do polo no fato ordenado"""
+        inicio, fim = self._faixa_do_polo.get(polo, (0, 0))
+        return df_ordenado.iloc[inicio:fim]
+
+    def salvar(self, arquivo: Optional[Path] = None) -> Path:
+        """Grava o índice ao lado do fato publicado (escrita atômica)"""
+        arquivo = Path(arquivo) if arquivo is not None else config.PROCESSED_DIR / config.INDICE_LIDERES
+        arquivo.parent.mkdir(parents=True, exist_ok=True)
+        arquivo_temp = arquivo.with_suffix(f'.{os.getpid()}.tmp')
+        self.polos.to_parquet(arquivo_temp, index=False)
+        arquivo_temp.replace(arquivo)
+        return arquivo
@@ -1,7 +1,13 @@
+import pandas as pd
 import logging
 from datetime import datetime
 from .extractor import SafraExtractor
 from .transform import SafraTransformer
+from .loader import SafraLoader
+from .delta import SafraDetectorDelta
+from .relatorio_dashboard import filtrar_relatorio_dashboard
+from .snapshots import inferir_data_relatorio
+from src.utils.helpers import MonitorMemoria
 import sys
 from pathlib import Path
 
@@ -12,34 +18,78 @@ from config.settings import config
 class SafraETLPipeline:
     """Pipeline ETL baseado na estrutura real do Relatorio_Diario"""
     
-    def __init__(self):
-        self.extractor = SafraExtractor()
+    def __init__(self, usar_cache: bool = True, usar_delta: bool = True):
+        self.usar_delta = usar_delta
+        self.extractor = SafraExtractor(usar_cache=usar_cache)
         self.transformer = SafraTransformer()
+        self.loader = SafraLoader()
         self.logger = logging.getLogger(__name__)
         self._setup_logging()
     
-    def executar_pipeline_completo(self, arquivo_relatorio: str = None) -> bool:
+    def executar_pipeline_completo(self, arquivo_relatorio: str = None,
+                                   modo_streaming: bool = False) -> bool:
         """Executa pipeline ETL usando apenas colunas existentes"""
         inicio = datetime.now()
+        self.monitor = MonitorMemoria()
         self.logger.info("🚀 Iniciando pipeline ETL Safra")
         
         try:
             # 1. Extração
             self.logger.info("📥 FASE 1: Extração de dados")
-            relatorio_diario = self.extractor.extrair_relatorio_diario(arquivo_relatorio)
-            base_historica = self.extractor.extrair_base_historica()
+            # Sem base histórica não há onde reaproveitar linhas inalteradas
+            self.delta = SafraDetectorDelta(
+                ativo=self.usar_delta and self.extractor.existe_base_historica()
+            )
+            
+            # Relatório completo (antes do delta, todas as colunas) para o dashboard
+            blocos_dashboard = []
             
-            # 2. Transformação (apenas limpeza e padronização)
-            self.logger.info("🔄 FASE 2: Limpeza e padronização")
-            dados_processados = self.transformer.processar_dados_completo(
-                relatorio_diario, base_historica
+            if modo_streaming:
+                # 2. Extração + limpeza em blocos de config.CHUNK_SIZE
+                self.logger.info("🔄 FASE 2: Limpeza e padronização em blocos")
+                blocos = (
+                    self.delta.filtrar(bloco)
+                    for bloco in self._coletar_para_dashboard(
+                        self.extractor.extrair_relatorio_diario_em_blocos(arquivo_relatorio), blocos_dashboard
+                    )
+                )
+                relatorio_processado = self.transformer.preparar_relatorio_em_blocos(blocos, self.monitor)
+            else:
+                relatorio_diario = self.extractor.extrair_relatorio_diario(arquivo_relatorio)
+                blocos_dashboard.append(filtrar_relatorio_dashboard(relatorio_diario))
+                relatorio_diario = self.delta.filtrar(relatorio_diario)
+                self.monitor.amostrar()
+                
+                # 2. Transformação (apenas limpeza e padronização)
+                self.logger.info("🔄 FASE 2: Limpeza e padronização")
+                relatorio_processado = self.transformer.preparar_relatorio(relatorio_diario)
+                del relatorio_diario
+            self.monitor.amostrar()
+            
+            # Apenas a versão atual das ordens do dia (base compactada + log)
+            base_historica = self.extractor.extrair_base_historica(
+                relatorio_processado['Ordem PagBank']
+            )
+            dados_processados = self.transformer.consolidar_com_historico(
+                relatorio_processado, base_historica
             )
+            self.monitor.amostrar()
             
             # 3. Salvar dados processados
             self.logger.info("💾 FASE 3: Salvando dados processados")
-            arquivo_saida = config.PROCESSED_DIR / config.DASHBOARD_DATA
-            dados_processados.to_parquet(arquivo_saida, index=False)
-            self.logger.info(f"✅ Dados salvos em: {arquivo_saida}")
+            self.loader.salvar_resultados(dados_processados)
+            self.delta.salvar_estado()
+            if blocos_dashboard:
+                relatorio_dashboard = pd.concat(blocos_dashboard, ignore_index=True)
+                arquivo_origem = Path(arquivo_relatorio or config.INPUT_DIR / config.RELATORIO_DIARIO)
+                self.loader.publicar_relatorio_dashboard(
+                    relatorio_dashboard,
+                    inferir_data_relatorio(arquivo_origem, relatorio_dashboard),
+                    arquivo_origem.name
+                )
+                del relatorio_dashboard
+            del blocos_dashboard
+            self.monitor.amostrar()
             
             # 4. Relatório final
             tempo_execucao = datetime.now() - inicio
@@ -52,6 +102,13 @@ class SafraETLPipeline:
             self.logger.error(f"💥 Erro crítico no pipeline: {e}")
             return False
     
+    @staticmethod
+    def _coletar_para_dashboard(blocos, destino: list):
+        """Repassa os blocos guardando cada um (sem os providers excluídos) para o dashboard"""
+        for bloco in blocos:
+            destino.append(filtrar_relatorio_dashboard(bloco))
+            yield bloco
+    
     def _setup_logging(self):
         """Configura sistema de logging"""
         log_file = config.LOGS_DIR / f"safra_etl_{datetime.now().strftime('%Y%m%d')}.log"
@@ -69,11 +126,26 @@ class SafraETLPipeline:
         """Gera relatório de execução"""
         self.logger.info("📋 RELATÓRIO DE EXECUÇÃO:")
         self.logger.info(f"   ⏱️ Tempo total: {tempo_execucao}")
-        self.logger.info(f"   📊 Registros processados: {len(df_final):,}")
+        self.logger.info(f"   📊 Ordens gravadas no log de alterações: {len(df_final):,}")
         if 'Provider' in df_final.columns:
             self.logger.info(f"   🏢 Providers únicos: {df_final['Provider'].nunique()}")
+        
+        self.metricas_delta = self.delta.metricas()
+        if not self.delta.ativo:
+            motivo = "--sem-delta" if not self.usar_delta else "sem base histórica"
+            self.logger.info(f"   🔑 Delta desativado ({motivo}): todas as ordens reprocessadas")
+        self.logger.info(
+            "   🔑 Delta: {novos:,} novos, {alterados:,} alterados, "
+            "{inalterados:,} inalterados, {desaparecidos:,} desaparecidos".format(**self.metricas_delta)
+        )
+        
+        limite_mb = config.MAX_MEMORY_GB * 1024
+        self.logger.info(f"   🧠 Pico de memória (RSS): {self.monitor.pico_mb:,.1f} MB (limite: {limite_mb:,.0f} MB)")
+        if self.monitor.pico_mb > limite_mb:
+            self.logger.warning("   ⚠️ Pico de memória acima do limite configurado - considere usar --streaming")
 
-def executar_etl(arquivo_relatorio: str = None) -> bool:
+def executar_etl(arquivo_relatorio: str = None, usar_cache: bool = True,
+                 modo_streaming: bool = False, usar_delta: bool = True) -> bool:
     """Função principal para executar ETL"""
-    pipeline = SafraETLPipeline()
-    return pipeline.executar_pipeline_completo(arquivo_relatorio)
+    pipeline = SafraETLPipeline(usar_cache=usar_cache, usar_delta=usar_delta)
+    return pipeline.executar_pipeline_completo(arquivo_relatorio, modo_streaming=modo_streaming)
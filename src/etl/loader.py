@@ -0,0 +1,84 @@
+import pandas as pd
+import logging
+from pathlib import Path
+from datetime import date
+from typing import Dict, Optional
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.base_historica import BaseHistoricaParticionada
+from src.etl.dimensao_provider import DimensaoProvider, carregar_mapeamento_lideres
+from src.etl.indice_lideres import indexar_por_provider
+from src.etl.snapshots import ArmazemSnapshots
+
+class SafraLoader:
+    """Carga dos dados processados (ponto único de escrita das saídas do ETL)"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.base_historica = BaseHistoricaParticionada()
+        self.dimensao_provider = DimensaoProvider()
+        self.snapshots = ArmazemSnapshots()
+
+    def salvar_resultados(self, dados_processados: pd.DataFrame) -> Optional[Path]:
+        """Anexa as ordens alteradas no dia ao log de alterações da base histórica
+
+        O custo depende apenas do volume do dia; partições e dashboard_data
+        são atualizados pela compactação. As ordens recebem o Provider_Id da
+        dimensão de providers, regravada com o mapeamento de líderes atual.
+        """
+        self.salvar_dimensao_provider(dados_processados)
+        arquivo_log = self.base_historica.registrar_alteracoes(dados_processados)
+        self.logger.info("✅ Base histórica atualizada (log de alterações)")
+        return arquivo_log
+
+    def salvar_dimensao_provider(self, dados_processados: pd.DataFrame) -> pd.DataFrame:
+        """Adiciona Provider_Id às ordens e persiste a dimensão de providers"""
+        self.dimensao_provider.atribuir_chaves(dados_processados, carregar_mapeamento_lideres())
+        arquivo = self.dimensao_provider.salvar()
+        self.logger.info(f"🏷️ Dimensão de providers salva: {arquivo.name} ({len(self.dimensao_provider.tabela)} providers)")
+        return dados_processados
+
+    def publicar_relatorio_dashboard(self, relatorio: pd.DataFrame, data_relatorio: date,
+                                     origem: Optional[str] = None) -> Optional[Path]:
+        """Publica o relatório completo (todas as colunas) como snapshot da data
+
+        Reprocessar um relatório da mesma data substitui o snapshot dela.
+        """
+        arquivo = self.snapshots.publicar(relatorio, data_relatorio, self.dimensao_provider, origem)
+        if arquivo is None:
+            return None
+        self.dimensao_provider.salvar()
+        self.logger.info(
+            f"📤 Snapshot do dashboard publicado: {data_relatorio:%d/%m/%Y} ({arquivo.name}, "
+            f"{len(self.snapshots.catalogo())} datas no catálogo)"
+        )
+        return arquivo
+
+    def compactar(self) -> Dict[str, int]:
+        """Incorpora o log às partições e regenera os dados do dashboard"""
+        self.logger.info("🗜️ Compactando base histórica")
+        resultado = self.base_historica.compactar()
+        self.logger.info(
+            f"✅ Compactação: {resultado['arquivos_log']} arquivos de log, {resultado['ordens']:,} ordens, "
+            f"{resultado['particoes']:,} partições regravadas, "
+            f"{resultado['arquivados_removidos']} arquivos expirados removidos"
+        )
+
+        arquivo_saida = config.PROCESSED_DIR / config.DASHBOARD_DATA
+        total = self.publicar_dados_dashboard(arquivo_saida)
+        self.logger.info(f"✅ Dados salvos em: {arquivo_saida} ({total:,} registros)")
+        return resultado
+
+    def publicar_dados_dashboard(self, arquivo_saida: Path) -> int:
+        """Grava a base ordenada por Provider_Id e o índice líder → polos → faixas de linhas"""
+        df, indice = indexar_por_provider(self.base_historica.ler(), self.dimensao_provider)
+        total = self.base_historica.exportar(arquivo_saida, df)
+        if total:
+            indice.salvar()
+            self.logger.info(
+                f"🧭 Índice de líderes: {len(indice.lideres())} líderes, {len(indice.polos)} polos"
+            )
+        return total
@@ -0,0 +1,142 @@
+import pandas as pd
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.extractor import SafraExtractor
+from src.etl.transform import SafraTransformer
+from src.etl.loader import SafraLoader
+from src.etl.delta import SafraDetectorDelta
+from src.etl.relatorio_dashboard import filtrar_relatorio_dashboard
+from src.etl.snapshots import inferir_data_relatorio
+from src.utils.leitor_planilhas import FORMATOS_POR_EXTENSAO
+
+def listar_relatorios(diretorio) -> List[Path]:
+    """Lista os relatórios diários do diretório (config.PADRAO_RELATORIOS)"""
+    return sorted(
+        arquivo for arquivo in Path(diretorio).glob(config.PADRAO_RELATORIOS)
+        if arquivo.is_file() and arquivo.suffix.lower() in FORMATOS_POR_EXTENSAO
+    )
+
+def processar_relatorio_isolado(arquivo: str, usar_cache: bool = True) -> Dict[str, Any]:
+    """Extração e limpeza de um relatório (executado em processo separado)"""
+    inicio = time.perf_counter()
+
+    extractor = SafraExtractor(usar_cache=usar_cache)
+    transformer = SafraTransformer()
+
+    relatorio = extractor.extrair_relatorio_diario(arquivo)
+    data_relatorio = inferir_data_relatorio(arquivo, relatorio)
+    registros_lidos = len(relatorio)
+
+    processado = transformer.preparar_relatorio(relatorio)
+
+    return {
+        'dashboard': filtrar_relatorio_dashboard(relatorio),
+        'arquivo': str(arquivo),
+        'data_relatorio': data_relatorio,
+        'registros_lidos': registros_lidos,
+        'registros_processados': len(processado),
+        'segundos': time.perf_counter() - inicio,
+        'dados': processado
+    }
+
+class SafraETLLote:
+    """ETL em lote: extração/limpeza paralela e merge único ordenado por data"""
+
+    def __init__(self, usar_cache: bool = True, workers: Optional[int] = None):
+        self.usar_cache = usar_cache
+        self.workers = workers
+        self.extractor = SafraExtractor(usar_cache=usar_cache)
+        self.transformer = SafraTransformer()
+        self.loader = SafraLoader()
+        self.logger = logging.getLogger(__name__)
+
+    def executar(self, diretorio) -> bool:
+        """Processa todos os relatórios do diretório"""
+        inicio = datetime.now()
+        arquivos = listar_relatorios(diretorio)
+
+        if not arquivos:
+            self.logger.error(f"❌ Nenhum relatório encontrado em {diretorio} ({config.PADRAO_RELATORIOS})")
+            return False
+
+        workers = min(self.workers or os.cpu_count() or 1, len(arquivos))
+        self.logger.info(f"🚀 ETL em lote: {len(arquivos)} arquivos, {workers} workers")
+
+        # 1. Extração e limpeza em paralelo (um arquivo por worker)
+        resultados, falhas = [], []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = {
+                executor.submit(processar_relatorio_isolado, str(arquivo), self.usar_cache): arquivo
+                for arquivo in arquivos
+            }
+            for futuro in as_completed(futuros):
+                arquivo = futuros[futuro]
+                try:
+                    resultados.append(futuro.result())
+                    self.logger.info(f"✅ {arquivo.name} processado")
+                except Exception as e:
+                    falhas.append({'arquivo': str(arquivo), 'erro': str(e)})
+                    self.logger.error(f"❌ Falha em {arquivo.name}: {e}")
+
+        if not resultados:
+            self.logger.error("💥 Nenhum relatório pôde ser processado")
+            return False
+
+        # 2. Merge único na base histórica, do relatório mais antigo ao mais recente
+        resultados.sort(key=lambda r: (r['data_relatorio'], r['arquivo']))
+        base_historica = self.extractor.extrair_base_historica(
+            pd.concat([r['dados']['Ordem PagBank'] for r in resultados], ignore_index=True)
+        )
+
+        for resultado in resultados:
+            inicio_merge = time.perf_counter()
+            base_historica = self.transformer.consolidar_com_historico(
+                resultado.pop('dados'), base_historica
+            )
+            resultado['segundos_merge'] = time.perf_counter() - inicio_merge
+
+        # 3. Gravação única
+        self.loader.salvar_resultados(base_historica)
+        # Um snapshot do dashboard por data de relatório (o mais recente da data prevalece)
+        for resultado in resultados:
+            self.loader.publicar_relatorio_dashboard(
+                resultado.pop('dashboard'), resultado['data_relatorio'], Path(resultado['arquivo']).name
+            )
+        # O histórico mudou fora do fluxo diário: hashes do último relatório não valem mais
+        SafraDetectorDelta(ativo=False).descartar_estado()
+
+        self._gerar_relatorio_execucao(base_historica, resultados, falhas, datetime.now() - inicio)
+        return not falhas
+
+    def _gerar_relatorio_execucao(self, df_final, resultados, falhas, tempo_execucao):
+        """Relatório de execução com tempos e contagens por arquivo"""
+        self.logger.info("📋 RELATÓRIO DE EXECUÇÃO (LOTE):")
+        self.logger.info(f"   ⏱️ Tempo total: {tempo_execucao}")
+
+        for resultado in resultados:
+            self.logger.info(
+                f"   📄 {Path(resultado['arquivo']).name} ({resultado['data_relatorio']:%d/%m/%Y}): "
+                f"{resultado['registros_lidos']:,} lidos, {resultado['registros_processados']:,} processados, "
+                f"{resultado['segundos']:.2f}s extração/limpeza, {resultado['segundos_merge']:.2f}s merge"
+            )
+
+        for falha in falhas:
+            self.logger.info(f"   ❌ {Path(falha['arquivo']).name}: {falha['erro']}")
+
+        self.logger.info(f"   📊 Ordens gravadas no log de alterações: {len(df_final):,}")
+        if 'Provider' in df_final.columns:
+            self.logger.info(f"   🏢 Providers únicos: {df_final['Provider'].nunique()}")
+
+def executar_etl_lote(diretorio, workers: Optional[int] = None, usar_cache: bool = True) -> bool:
+    """Função principal para executar ETL em lote"""
+    return SafraETLLote(usar_cache=usar_cache, workers=workers).executar(diretorio)
@@ -0,0 +1,64 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.indice_lideres import IndiceLideres, indexar_por_provider
+from src.utils.schema import converter_categoricas
+from src.utils.normalizacao import garantir_provider_normalizado
+
+def arquivo_indice(arquivo_relatorio: Path) -> Path:
+    """Índice de líderes gravado ao lado do relatório publicado"""
+    arquivo_relatorio = Path(arquivo_relatorio)
+    return arquivo_relatorio.with_name(f"{arquivo_relatorio.stem}_indice.parquet")
+
+def filtrar_relatorio_dashboard(df: pd.DataFrame) -> pd.DataFrame:
+    """Relatório com todas as colunas, sem os providers de config.PROVIDERS_EXCLUIDOS"""
+    if 'Provider' in df.columns:
+        df = df[~df['Provider'].isin(config.PROVIDERS_EXCLUIDOS)]
+    return df.copy()
+
+def preparar_relatorio_dashboard(df: pd.DataFrame,
+                                 dimensao: DimensaoProvider) -> Tuple[pd.DataFrame, IndiceLideres]:
+    """Relatório pronto para o dashboard: Provider_Id, categorias e ordenação por Provider_Id"""
+    df = garantir_provider_normalizado(filtrar_relatorio_dashboard(df))
+    if 'Provider_Normalizado' in df.columns:
+        dimensao.atribuir_chaves(df)
+    if config.MODO_CATEGORICO:
+        df = converter_categoricas(df, config.COLUNAS_CATEGORICAS)
+    return indexar_por_provider(df, dimensao)
+
+def gravar_relatorio_dashboard(df: pd.DataFrame, indice: IndiceLideres, arquivo: Path) -> Path:
+    """Grava índice e relatório (escrita atômica; o relatório por último, pois seu mtime é a versão)"""
+    arquivo = Path(arquivo)
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    indice.salvar(arquivo_indice(arquivo))
+
+    arquivo_temp = arquivo.with_suffix(f'.{os.getpid()}.tmp')
+    df.to_parquet(arquivo_temp, index=False)
+    arquivo_temp.replace(arquivo)
+    return arquivo
+
+def ler_relatorio_dashboard(arquivo: Path, colunas: Optional[List[str]] = None
+                            ) -> Tuple[pd.DataFrame, Optional[IndiceLideres]]:
+    """Lê o relatório publicado (com projeção de colunas) e o índice de líderes"""
+    arquivo = Path(arquivo)
+    if colunas is not None:
+        disponiveis = set(pq.read_schema(arquivo).names)
+        colunas = [coluna for coluna in colunas if coluna in disponiveis]
+    df = pd.read_parquet(arquivo, columns=colunas)
+    return df, IndiceLideres.carregar(arquivo_indice(arquivo))
+
+def versao_arquivo(arquivo: Path) -> Optional[int]:
+    """mtime (ns) do arquivo: muda exatamente quando o ETL publica uma nova versão"""
+    try:
+        return os.stat(arquivo).st_mtime_ns
+    except FileNotFoundError:
+        return None
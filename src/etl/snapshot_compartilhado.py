@@ -0,0 +1,69 @@
+import pandas as pd
+import logging
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.cubo_metricas import CuboMetricas, carregar_cubo
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.indice_lideres import IndiceLideres, indexar_por_provider
+from src.etl.relatorio_dashboard import ler_relatorio_dashboard
+from src.utils.normalizacao import garantir_provider_normalizado
+
+def memoria_dataframe(df: pd.DataFrame) -> int:
+    """Bytes ocupados pelo DataFrame (deep: inclui strings e categorias)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class SnapshotCompartilhado:
+    """Snapshot do dashboard preparado uma vez por processo e lido por todas as sessões
+
+    O fato é reagrupado por líder, então a visão de um líder (ou de um polo) é
+    uma fatia contígua, sem cópia. Somente leitura: com copy-on-write, alterar
+    uma visão copia apenas a visão, nunca o fato compartilhado.
+    """
+
+    def __init__(self, df: pd.DataFrame, indice: Optional[IndiceLideres], cubo: CuboMetricas,
+                 dimensao: DimensaoProvider):
+        self.logger = logging.getLogger(__name__)
+
+        # Líder por lookup do Provider_Id; índice do ETL com líderes renovados pelo mapeamento atual
+        df = dimensao.associar_lider(garantir_provider_normalizado(df))
+        if indice is None:
+            df, indice = indexar_por_provider(df, dimensao)
+        else:
+            indice.atualizar_lideres(dimensao)
+
+        self.df, self.indice = indice.agrupar_por_lider(df)
+        self.cubo = cubo.com_lideres(dimensao)
+        self.memoria = memoria_dataframe(self.df)
+
+    @classmethod
+    def carregar(cls, arquivo: Path, data_relatorio: date, dimensao: DimensaoProvider,
+                 colunas: Optional[List[str]] = None) -> 'SnapshotCompartilhado':
+        """Lê relatório (todas as colunas, salvo projeção), índice e cubo e prepara o snapshot compartilhado"""
+        df, indice = ler_relatorio_dashboard(arquivo, colunas)
+        snapshot = cls(df, indice, carregar_cubo(arquivo, data_relatorio), dimensao)
+        snapshot.logger.info(
+            f"♻️ Snapshot {data_relatorio:%Y-%m-%d} compartilhado: {len(snapshot.df):,} ordens, "
+            f"{snapshot.memoria / 1024**2:.1f} MB (uma cópia por processo)"
+        )
+        return snapshot
+
+    def lideres(self) -> List[str]:
+        return self.indice.lideres()
+
+    def linhas(self, lider: Optional[str] = None) -> pd.DataFrame:
+        """Ordens do líder (ou todas) como visão do fato compartilhado"""
+        if lider is None:
+            return self.df
+        return self.indice.linhas_do_lider(self.df, lider)
+
+    def linhas_do_polo(self, polo: str) -> pd.DataFrame:
+        return self.indice.linhas_do_polo(self.df, polo)
+
+    def cubo_do_lider(self, lider: Optional[str] = None) -> CuboMetricas:
+        return self.cubo if lider is None else self.cubo.do_lider(lider)
@@ -0,0 +1,160 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+from src.etl.cubo_metricas import CuboMetricas, arquivo_cubo, carregar_cubo, construir_cubo, gravar_cubo
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.indice_lideres import IndiceLideres
+from src.etl.relatorio_dashboard import (
+    gravar_relatorio_dashboard, ler_relatorio_dashboard, preparar_relatorio_dashboard
+)
+
+# Datas reconhecidas no nome do arquivo: 2025-07-21, 20250721, 21-07-2025, 21_07_2025
+PADROES_DATA_ARQUIVO = [
+    (re.compile(r'(\d{4})[-_]?(\d{2})[-_]?(\d{2})'), ('ano', 'mes', 'dia')),
+    (re.compile(r'(\d{2})[-_](\d{2})[-_](\d{4})'), ('dia', 'mes', 'ano'))
+]
+
+def inferir_data_relatorio(arquivo, df: Optional[pd.DataFrame] = None) -> date:
+    """Data de referência do relatório: nome do arquivo, último tracking ou mtime"""
+    for padrao, ordem in PADROES_DATA_ARQUIVO:
+        encontrado = padrao.search(Path(arquivo).stem)
+        if encontrado:
+            partes = dict(zip(ordem, map(int, encontrado.groups())))
+            try:
+                return date(partes['ano'], partes['mes'], partes['dia'])
+            except ValueError:
+                continue
+
+    if df is not None and 'Data Tracking' in df.columns:
+        ultima = pd.to_datetime(df['Data Tracking'], errors='coerce').max()
+        if pd.notna(ultima):
+            return ultima.date()
+
+    return datetime.fromtimestamp(Path(arquivo).stat().st_mtime).date()
+
+class ArmazemSnapshots:
+    """Relatórios publicados para o dashboard, um Parquet por data de relatório
+
+    O catálogo (JSON pequeno, data → arquivo) é a única coisa consultada para
+    localizar um dia: carregar duas datas ou as últimas N não depende de
+    quantos dias estão guardados. Republicar a mesma data substitui o snapshot.
+    """
+
+    VERSAO_CATALOGO = 1
+
+    def __init__(self, diretorio: Optional[Path] = None):
+        self.logger = logging.getLogger(__name__)
+        self.diretorio = Path(diretorio) if diretorio is not None else config.SNAPSHOTS_DIR
+        self.arquivo_catalogo = self.diretorio / config.CATALOGO_SNAPSHOTS
+
+    def publicar(self, relatorio: pd.DataFrame, data_relatorio: date, dimensao: DimensaoProvider,
+                 origem: Optional[str] = None) -> Optional[Path]:
+        """Grava o snapshot da data (relatório, índice de líderes, cubo de métricas) e o registra no catálogo"""
+        if relatorio.empty:
+            return None
+
+        df, indice = preparar_relatorio_dashboard(relatorio, dimensao)
+        arquivo = self.diretorio / f"relatorio_{data_relatorio:%Y-%m-%d}.parquet"
+        cubo = construir_cubo(df, data_relatorio, dimensao)
+        gravar_cubo(cubo, arquivo_cubo(arquivo))
+        gravar_relatorio_dashboard(df, indice, arquivo)
+
+        catalogo = self.catalogo()
+        catalogo[f"{data_relatorio:%Y-%m-%d}"] = {
+            'arquivo': arquivo.name,
+            'ordens': len(df),
+            'cubo': arquivo_cubo(arquivo).name,
+            'origem': origem,
+            'publicado_em': datetime.now().isoformat(timespec='seconds')
+        }
+        self._salvar_catalogo(catalogo)
+        return arquivo
+
+    def catalogo(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshots registrados por data (AAAA-MM-DD)"""
+        if not self.arquivo_catalogo.exists():
+            return {}
+        try:
+            with open(self.arquivo_catalogo, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+        except (OSError, ValueError):
+            self.logger.warning(f"⚠️ Catálogo de snapshots ilegível: {self.arquivo_catalogo}")
+            return {}
+        if conteudo.get('versao') != self.VERSAO_CATALOGO:
+            return {}
+        return conteudo.get('snapshots', {})
+
+    def datas(self) -> List[date]:
+        """Datas disponíveis, da mais recente para a mais antiga"""
+        return sorted((date.fromisoformat(data) for data in self.catalogo()), reverse=True)
+
+    def ultimas(self, quantidade: int) -> List[date]:
+        """As últimas N datas publicadas (mais recente primeiro)"""
+        return self.datas()[:quantidade]
+
+    def arquivo(self, data_relatorio: date) -> Optional[Path]:
+        """Parquet do snapshot da data (None se não publicado)"""
+        entrada = self.catalogo().get(f"{data_relatorio:%Y-%m-%d}")
+        if entrada is None:
+            return None
+        arquivo = self.diretorio / entrada['arquivo']
+        return arquivo if arquivo.exists() else None
+
+    def ler(self, data_relatorio: date, colunas: Optional[List[str]] = None
+            ) -> Tuple[pd.DataFrame, Optional[IndiceLideres]]:
+        """Snapshot da data (vazio se não publicado)"""
+        arquivo = self.arquivo(data_relatorio)
+        if arquivo is None:
+            return pd.DataFrame(), None
+        return ler_relatorio_dashboard(arquivo, colunas)
+
+    def ler_cubo(self, data_relatorio: date) -> Optional[CuboMetricas]:
+        """Cubo de métricas da data (None se não publicado)"""
+        arquivo = self.arquivo(data_relatorio)
+        if arquivo is None:
+            return None
+        return carregar_cubo(arquivo, data_relatorio)
+
+    def ler_ultimos(self, quantidade: int, colunas: Optional[List[str]] = None
+                    ) -> Dict[date, Tuple[pd.DataFrame, Optional[IndiceLideres]]]:
+        """Snapshots das últimas N datas"""
+        return {data: self.ler(data, colunas) for data in self.ultimas(quantidade)}
+
+    def reconstruir_catalogo(self) -> int:
+        """Recria o catálogo a partir dos arquivos do diretório (ex.: catálogo perdido)"""
+        catalogo = {}
+        for arquivo in sorted(self.diretorio.glob('relatorio_*.parquet')):
+            if arquivo.name.endswith(('_indice.parquet', '_cubo.parquet')):
+                continue
+            try:
+                data_relatorio = date.fromisoformat(arquivo.stem.removeprefix('relatorio_'))
+            except ValueError:
+                continue
+            catalogo[f"{data_relatorio:%Y-%m-%d}"] = {
+                'arquivo': arquivo.name,
+                'ordens': pq.read_metadata(arquivo).num_rows,
+                'cubo': arquivo_cubo(arquivo).name,
+                'origem': None,
+                'publicado_em': datetime.fromtimestamp(arquivo.stat().st_mtime).isoformat(timespec='seconds')
+            }
+        self._salvar_catalogo(catalogo)
+        return len(catalogo)
+
+    def _salvar_catalogo(self, catalogo: Dict[str, Dict[str, Any]]) -> None:
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        conteudo = {'versao': self.VERSAO_CATALOGO, 'snapshots': dict(sorted(catalogo.items()))}
+        arquivo_temp = self.arquivo_catalogo.with_suffix(f'.{os.getpid()}.tmp')
+        with open(arquivo_temp, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=2)
+        arquivo_temp.replace(self.arquivo_catalogo)
@@ -2,20 +2,27 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import pytz
+import gc
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Iterable, Optional
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.utils.schema import compilar_plano_leitura, concatenar_preservando_categorias
+from src.utils.helpers import MonitorMemoria, limpar_textos
+from src.utils.normalizacao import normalizar_providers
 
 class SafraTransformer:
     """Transformador baseado APENAS nas colunas reais do Relatorio_Diario"""
     
-    def __init__(self):
+    def __init__(self, modo_categorico: Optional[bool] = None):
         self.logger = logging.getLogger(__name__)
         self.brasilia_tz = pytz.timezone('America/Sao_Paulo')
+        self.plano = compilar_plano_leitura()
+        # Colunas de config.COLUNAS_CATEGORICAS como category (dicionário no Parquet)
+        self.modo_categorico = config.MODO_CATEGORICO if modo_categorico is None else modo_categorico
     
     def processar_dados_completo(self, relatorio_diario: pd.DataFrame, 
                                 base_historica: pd.DataFrame) -> pd.DataFrame:
@@ -23,32 +30,88 @@ class SafraTransformer:
         try:
             self.logger.info("🔄 Iniciando processamento com colunas reais")
             
-            # 1. Limpar e padronizar dados
-            relatorio_limpo = self._limpar_dados_reais(relatorio_diario.copy())
+            relatorio_processado = self.preparar_relatorio(relatorio_diario)
+            resultado = self.consolidar_com_historico(relatorio_processado, base_historica)
             
-            # 2. Aplicar filtros básicos
-            relatorio_filtrado = self._aplicar_filtros_basicos(relatorio_limpo)
-            
-            # 3. Padronizar campos existentes
-            relatorio_processado = self._padronizar_campos_reais(relatorio_filtrado)
+            self.logger.info(f"✅ Processamento concluído: {len(resultado):,} registros")
+            return resultado
             
-            # 4. Merge simples com histórico
-            if not base_historica.empty:
-                resultado = self._merge_simples(relatorio_processado, base_historica)
-            else:
-                resultado = relatorio_processado.copy()
-                self.logger.info("📝 Primeira execução - criando nova base")
+        except Exception as e:
+            self.logger.error(f"❌ Erro no processamento: {e}")
+            raise
+    
+    def preparar_relatorio(self, relatorio_diario: pd.DataFrame) -> pd.DataFrame:
+        """Limpeza, filtros e padronização de um relatório (não depende do histórico)"""
+        # 1. Limpar e padronizar dados
+        relatorio_limpo = self._limpar_dados_reais(relatorio_diario)
+        
+        # 2. Aplicar filtros básicos
+        relatorio_filtrado = self._aplicar_filtros_basicos(relatorio_limpo)
+        
+        # 3. Padronizar campos existentes
+        return self._padronizar_campos_reais(relatorio_filtrado)
+    
+    def consolidar_com_historico(self, relatorio_processado: pd.DataFrame,
+                                 base_historica: pd.DataFrame) -> pd.DataFrame:
+        """Merge do relatório preparado com a base histórica e validações finais"""
+        # 4. Upsert no histórico (base_historica pode conter só as partições afetadas)
+        if not base_historica.empty:
+            if self.modo_categorico:
+                base_historica = self.plano.aplicar_categorias(base_historica)
+            resultado = self._upsert_por_chave(relatorio_processado, base_historica)
+        else:
+            resultado = relatorio_processado.copy()
+            self.logger.info("📝 Nenhuma ordem do relatório no histórico - apenas inserções")
+        
+        # 5. Validações finais
+        return self._validacoes_finais(resultado)
+    
+    def processar_dados_em_blocos(self, blocos: Iterable[pd.DataFrame],
+                                  base_historica: pd.DataFrame,
+                                  monitor: Optional[MonitorMemoria] = None) -> pd.DataFrame:
+        """Processamento em streaming: limpa, filtra e tipa bloco a bloco
+        
+        Apenas os blocos já filtrados ficam em memória até o merge final.
+        """
+        try:
+            monitor = monitor or MonitorMemoria()
+            relatorio_processado = self.preparar_relatorio_em_blocos(blocos, monitor)
             
-            # 5. Validações finais
-            resultado = self._validacoes_finais(resultado)
+            resultado = self.consolidar_com_historico(relatorio_processado, base_historica)
+            monitor.amostrar()
             
             self.logger.info(f"✅ Processamento concluído: {len(resultado):,} registros")
             return resultado
             
         except Exception as e:
-            self.logger.error(f"❌ Erro no processamento: {e}")
+            self.logger.error(f"❌ Erro no processamento em blocos: {e}")
             raise
     
+    def preparar_relatorio_em_blocos(self, blocos: Iterable[pd.DataFrame],
+                                     monitor: Optional[MonitorMemoria] = None) -> pd.DataFrame:
+        """preparar_relatorio aplicado bloco a bloco, liberando memória acima do limite"""
+        self.logger.info("🔄 Iniciando processamento em blocos")
+        monitor = monitor or MonitorMemoria()
+        
+        blocos_processados = []
+        for numero, bloco in enumerate(blocos, 1):
+            blocos_processados.append(self.preparar_relatorio(bloco))
+            del bloco
+            
+            if monitor.excede_limite(config.MAX_MEMORY_GB):
+                self.logger.warning(
+                    f"⚠️ Bloco {numero}: memória acima de {config.MAX_MEMORY_GB} GB, liberando objetos"
+                )
+                gc.collect()
+        
+        if not blocos_processados:
+            raise ValueError("Arquivo está vazio")
+        
+        relatorio_processado = concatenar_preservando_categorias(blocos_processados)
+        del blocos_processados
+        monitor.amostrar()
+        return relatorio_processado
+    
     def _limpar_dados_reais(self, df: pd.DataFrame) -> pd.DataFrame:
         """Limpeza usando apenas colunas que existem"""
         self.logger.info("🧹 Limpando dados reais")
@@ -56,14 +119,11 @@ class SafraTransformer:
         # Remover linhas completamente vazias
         df = df.dropna(how='all')
         
-        # Limpar campos de texto
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].replace(['nan', 'None', '', 'NaT'], np.nan)
+        # Limpar campos de texto (uma passagem por valor distinto de cada coluna)
+        df = limpar_textos(df, ['nan', 'None', '', 'NaT'])
         
-        # Padronizar Provider (campo crítico)
+        # Provider (campo crítico) já sai sem espaços da limpeza de texto
         if 'Provider' in df.columns:
-            df['Provider'] = df['Provider'].str.strip()
             self.logger.info("✅ Provider padronizado")
         
         return df
@@ -103,59 +163,66 @@ class SafraTransformer:
         # Converter tipos seguros
         df = self._converter_tipos_reais(df)
         
+        # Chave de junção com o mapeamento de líderes (a UI não recalcula)
+        if 'Provider' in df.columns:
+            df['Provider_Normalizado'] = normalizar_providers(df['Provider'])
+        
+        if self.modo_categorico:
+            df = self.plano.aplicar_categorias(df)
+        
         return df
     
     def _converter_tipos_reais(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Conversão segura apenas das colunas que existem"""
-        
-        # Números inteiros (apenas se existirem)
-        colunas_int = ['Ordem PagBank', 'Ordem SAP', 'SLA Cliente', 'SLA Logística', 
-                      'Ordem Workfinity', 'Cód. Último Tracking']
-        for col in colunas_int:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
-        
-        # Datas (apenas se existirem)
-        colunas_data = ['Criação da Ordem', 'Início Indoor', 'Data Últ. Tracking Indoor', 
-                       'Início Transporte', 'Data Últ. Tracking Transporte', 'Data Tracking', 
-                       'Data Coleta', 'Previsão do Gerenciador']
-        for col in colunas_data:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-        
-        # Textos (apenas se existirem)
-        colunas_texto = ['Provider', 'Status da Ordem', 'Tipo da Ordem', 'Estado', 
-                        'Cidade', 'CEP', 'Transportadora', 'Último Tracking']
-        for col in colunas_texto:
-            if col in df.columns:
-                df[col] = df[col].astype('string')
+        """Conversão segura apenas das colunas que existem
         
-        return df
+        Colunas já tipadas pelo plano de leitura do extrator são mantidas.
+        """
+        return self.plano.aplicar_tipos(df)
     
-    def _merge_simples(self, relatorio_novo: pd.DataFrame, 
-                      base_historica: pd.DataFrame) -> pd.DataFrame:
-        """Merge simples preservando histórico"""
-        self.logger.info("🔄 Merge com base histórica")
+    def _upsert_por_chave(self, relatorio_novo: pd.DataFrame,
+                          base_historica: pd.DataFrame) -> pd.DataFrame:
+        """Upsert por 'Ordem PagBank' sobre índice hash das chaves históricas
+        
+        Chaves existentes: atualiza apenas config.COLUNAS_ATUALIZAR (e o
+        timestamp de processamento), preservando feedback e demais colunas.
+        Chaves novas: inseridas. O resultado mantém as linhas tocadas no topo,
+        seguidas do histórico intocado na ordem em que estava.
+        """
+        self.logger.info("🔄 Upsert com base histórica")
         
         chave_primaria = 'Ordem PagBank'
+        relatorio_novo = relatorio_novo[~relatorio_novo[chave_primaria].duplicated(keep='last')]
+        base_historica = base_historica[~base_historica[chave_primaria].duplicated(keep='last')]
+        
+        # Posição de cada chave do relatório no histórico (-1 = chave nova)
+        indice = pd.Index(base_historica[chave_primaria])
+        posicoes = indice.get_indexer(relatorio_novo[chave_primaria])
+        existentes = posicoes >= 0
+        posicoes_existentes = posicoes[existentes]
         
-        # Combinar dados novos com histórico
-        chaves_historicas = set(base_historica[chave_primaria].dropna())
-        chaves_novas = set(relatorio_novo[chave_primaria].dropna())
+        colunas_atualizar = set(config.COLUNAS_ATUALIZAR) | {'Data_Processamento'}
+        colunas_copiar = [
+            col for col in relatorio_novo.columns
+            if col in colunas_atualizar or col not in base_historica.columns
+        ]
         
-        # Registros só no histórico (manter)
-        so_historico = chaves_historicas - chaves_novas
-        df_so_historico = base_historica[
-            base_historica[chave_primaria].isin(so_historico)
-        ].copy()
+        atualizados = base_historica.iloc[posicoes_existentes].copy()
+        for col in colunas_copiar:
+            atualizados[col] = relatorio_novo[col].array[existentes]
         
-        # Registros novos ou atualizados
-        df_atualizados = relatorio_novo.copy()
+        inseridos = relatorio_novo[~existentes]
         
-        # Combinar
-        resultado_final = pd.concat([df_so_historico, df_atualizados], ignore_index=True)
+        intocados = np.ones(len(base_historica), dtype=bool)
+        intocados[posicoes_existentes] = False
         
-        self.logger.info(f"📊 Merge concluído: {len(resultado_final):,} registros")
+        resultado_final = concatenar_preservando_categorias(
+            [atualizados, inseridos, base_historica[intocados]]
+        )
+        
+        self.logger.info(
+            f"📊 Upsert concluído: {len(atualizados):,} atualizados, "
+            f"{len(inseridos):,} inseridos, {len(resultado_final):,} registros"
+        )
         
         return resultado_final
     
@@ -164,15 +231,13 @@ class SafraTransformer:
         self.logger.info("✅ Validações finais")
         
         # Remover duplicatas por Ordem PagBank
-        tamanho_antes = len(df)
-        df = df.drop_duplicates(subset=['Ordem PagBank'], keep='last')
-        duplicatas_removidas = tamanho_antes - len(df)
-        
-        if duplicatas_removidas > 0:
-            self.logger.warning(f"⚠️ Duplicatas removidas: {duplicatas_removidas}")
-        
-        # Ordenar por data de processamento
-        if 'Data_Processamento' in df.columns:
-            df = df.sort_values('Data_Processamento', ascending=False)
+        duplicadas = df['Ordem PagBank'].duplicated(keep='last')
+        if duplicadas.any():
+            df = df[~duplicadas]
+            self.logger.warning(f"⚠️ Duplicatas removidas: {int(duplicadas.sum())}")
+        
+        # Ordenar por data de processamento (o upsert já entrega em ordem)
+        if 'Data_Processamento' in df.columns and not df['Data_Processamento'].is_monotonic_decreasing:
+            df = df.sort_values('Data_Processamento', ascending=False, kind='stable')
         
         return df
@@ -0,0 +1,155 @@
+import pandas as pd
+import numpy as np
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+from pathlib import Path
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+ABRANGENCIA_NACIONAL = 'BR'
+
+def data_referencia(fuso: Optional[str] = None) -> pd.Timestamp:
+    """Data de hoje no fuso configurado (meia-noite, sem fuso) - o 'as of' da execução"""
+    fuso = fuso or config.ENVELHECIMENTO['fuso']
+    return pd.Timestamp(datetime.now(ZoneInfo(fuso)).date())
+
+def _datas_em_dias(datas: pd.Series, fuso: str) -> np.ndarray:
+    """Converte datas (texto, naive ou com fuso) para datetime64[D]"""
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, errors='coerce')
+    if getattr(datas.dt, 'tz', None) is not None:
+        datas = datas.dt.tz_convert(fuso).dt.tz_localize(None)
+    return datas.to_numpy(dtype='datetime64[D]')
+
+class CalendarioFeriados:
+    """Feriados nacionais e estaduais lidos de config.FERIADOS_ARQUIVO
+
+    Um np.busdaycalendar por UF (nacionais + os da UF), montado uma vez.
+    """
+
+    def __init__(self, arquivo: Optional[Path] = None, dias_semana_uteis: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.arquivo = Path(arquivo) if arquivo is not None else config.FERIADOS_ARQUIVO
+        self.dias_semana_uteis = dias_semana_uteis or config.ENVELHECIMENTO['dias_semana_uteis']
+        self.feriados = self._carregar()
+        self._calendarios: Dict[str, np.busdaycalendar] = {}
+
+    def _carregar(self) -> pd.DataFrame:
+        """Lê o arquivo de feriados (data;abrangencia;descricao)"""
+        if not self.arquivo.exists():
+            self.logger.warning(f"⚠️ Calendário de feriados não encontrado: {self.arquivo} - apenas fins de semana")
+            return pd.DataFrame({'data': pd.Series(dtype='datetime64[ns]'), 'abrangencia': pd.Series(dtype=object)})
+
+        feriados = pd.read_csv(self.arquivo, sep=';', dtype=str, encoding='utf-8')
+        feriados['data'] = pd.to_datetime(feriados['data'], format='%Y-%m-%d', errors='coerce')
+        feriados['abrangencia'] = feriados['abrangencia'].str.strip().str.upper()
+        feriados = feriados.dropna(subset=['data', 'abrangencia'])
+
+        self.logger.info(f"📅 Calendário de feriados: {len(feriados)} datas de {self.arquivo.name}")
+        return feriados
+
+    def calendario(self, uf: Optional[str] = None) -> np.busdaycalendar:
+        """Calendário de dias úteis com feriados nacionais e da UF"""
+        chave = str(uf).strip().upper() if isinstance(uf, str) else ABRANGENCIA_NACIONAL
+        if chave not in self._calendarios:
+            abrangencias = {ABRANGENCIA_NACIONAL, chave}
+            datas = self.feriados.loc[self.feriados['abrangencia'].isin(abrangencias), 'data']
+            self._calendarios[chave] = np.busdaycalendar(
+                weekmask=self.dias_semana_uteis,
+                holidays=np.unique(datas.to_numpy(dtype='datetime64[D]'))
+            )
+        return self._calendarios[chave]
+
+class CalculadoraEnvelhecimento:
+    """Dias corridos e dias úteis em aberto, vetorizados (numpy datetime64/busday_count)
+
+    Todas as linhas usam a mesma data de referência, calculada uma vez por
+    execução no fuso de config.ENVELHECIMENTO. Datas futuras dão valores
+    negativos (como o cálculo original de Dias_Em_Aberto no main.py) e
+    datas ausentes resultam em <NA>.
+    """
+
+    def __init__(self, calendario: Optional[CalendarioFeriados] = None, regras: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        regras = regras if regras is not None else config.ENVELHECIMENTO
+        self.calendario = calendario if calendario is not None else CalendarioFeriados(
+            dias_semana_uteis=regras['dias_semana_uteis']
+        )
+        self.coluna_data = regras['coluna_data']
+        self.coluna_uf = regras['coluna_uf']
+        self.coluna_dias_corridos = regras['coluna_dias_corridos']
+        self.coluna_dias_uteis = regras['coluna_dias_uteis']
+        self.fuso = regras['fuso']
+
+    def dias_corridos(self, datas: pd.Series, referencia: Optional[pd.Timestamp] = None) -> pd.Series:
+        """Dias de calendário entre cada data e a referência (negativo para datas futuras)"""
+        referencia = np.datetime64(referencia if referencia is not None else data_referencia(self.fuso), 'D')
+        dias = _datas_em_dias(datas, self.fuso)
+        validos = ~np.isnat(dias)
+
+        resultado = np.zeros(len(dias), dtype='int64')
+        resultado[validos] = (referencia - dias[validos]).astype('int64')
+        return pd.Series(pd.arrays.IntegerArray(resultado, ~validos), index=datas.index)
+
+    def dias_uteis(self, datas: pd.Series, ufs: Optional[pd.Series] = None,
+                   referencia: Optional[pd.Timestamp] = None) -> pd.Series:
+        """Dias úteis entre cada data (inclusive) e a referência (exclusive), por UF
+
+        Datas futuras dão o negativo dos dias úteis entre a referência e a data.
+        """
+        referencia = np.datetime64(referencia if referencia is not None else data_referencia(self.fuso), 'D')
+        dias = _datas_em_dias(datas, self.fuso)
+        validos = ~np.isnat(dias)
+        resultado = np.zeros(len(dias), dtype='int64')
+
+        # Uma chamada de busday_count por UF distinta (feriados estaduais diferentes)
+        if ufs is not None:
+            codigos, unicos = pd.factorize(ufs.astype('string').str.strip().str.upper())
+        else:
+            codigos, unicos = np.full(len(dias), -1), []
+
+        for codigo in np.unique(codigos):
+            uf = unicos[codigo] if codigo >= 0 else None
+            linhas = validos & (codigos == codigo)
+            if linhas.any():
+                calendario = self.calendario.calendario(uf)
+                resultado[linhas] = np.busday_count(dias[linhas], referencia, busdaycal=calendario)
+                # Datas futuras: negativo da contagem em [referência, data) - busday_count
+                # com início depois do fim conta (fim, início]
+                futuras = linhas & (dias > referencia)
+                if futuras.any():
+                    resultado[futuras] = -np.busday_count(referencia, dias[futuras], busdaycal=calendario)
+
+        return pd.Series(pd.arrays.IntegerArray(resultado, ~validos), index=datas.index)
+
+    def aplicar(self, df: pd.DataFrame, referencia: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Adiciona Dias_Em_Aberto e Dias_Uteis_Em_Aberto ao DataFrame"""
+        if self.coluna_data not in df.columns:
+            self.logger.warning(f"⚠️ Coluna '{self.coluna_data}' ausente - envelhecimento não calculado")
+            return df
+
+        referencia = referencia if referencia is not None else data_referencia(self.fuso)
+        ufs = df[self.coluna_uf] if self.coluna_uf in df.columns else None
+
+        df[self.coluna_dias_corridos] = self.dias_corridos(df[self.coluna_data], referencia)
+        df[self.coluna_dias_uteis] = self.dias_uteis(df[self.coluna_data], ufs, referencia)
+        self.logger.info(f"📆 Envelhecimento calculado em {referencia:%d/%m/%Y} para {len(df):,} ordens")
+        return df
+
+_calculadora_padrao: Optional[CalculadoraEnvelhecimento] = None
+
+def obter_calculadora_envelhecimento() -> CalculadoraEnvelhecimento:
+    """Retorna a calculadora compartilhada pelo processo (calendário lido uma vez)"""
+    global _calculadora_padrao
+    if _calculadora_padrao is None:
+        _calculadora_padrao = CalculadoraEnvelhecimento()
+    return _calculadora_padrao
+
+def calcular_envelhecimento(df: pd.DataFrame, referencia: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Atalho para adicionar as colunas de envelhecimento com as regras de config"""
+    return obter_calculadora_envelhecimento().aplicar(df, referencia)
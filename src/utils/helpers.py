@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from pathlib import Path
 from datetime import datetime
 import pytz
+import psutil
+from src.utils.schema import compilar_plano_leitura
 
 def setup_logging(log_path: str) -> None:
     """Configura o sistema de logging"""
@@ -20,58 +22,79 @@ def setup_logging(log_path: str) -> None:
         ]
     )
 
+class MonitorMemoria:
+    """Acompanha o pico de memória residente (RSS) do processo via psutil"""
+    
+    def __init__(self):
+        self.processo = psutil.Process()
+        self.pico_bytes = 0
+        self.amostrar()
+    
+    def amostrar(self) -> int:
+        """Lê o RSS atual, atualiza o pico e retorna o valor em bytes"""
+        info = self.processo.memory_info()
+        # Windows expõe o pico do working set diretamente
+        rss = max(info.rss, getattr(info, 'peak_wset', 0))
+        self.pico_bytes = max(self.pico_bytes, rss)
+        return info.rss
+    
+    @property
+    def pico_mb(self) -> float:
+        return self.pico_bytes / (1024 ** 2)
+    
+    def excede_limite(self, limite_gb: float) -> bool:
+        """Indica se o RSS atual ultrapassa o limite informado"""
+        return self.amostrar() > limite_gb * (1024 ** 3)
+
 def calcular_dias_em_aberto(data_status):
-    """Calcula dias em aberto usando data atual de Brasília"""
+    """Calcula dias em aberto usando data atual de Brasília (datas futuras valem 0)
+    
+    Para colunas inteiras use src.utils.envelhecimento.calcular_envelhecimento,
+    que calcula a referência uma única vez.
+    """
     if pd.isna(data_status):
         return None
     
-    try:
-        brasilia_tz = pytz.timezone('America/Sao_Paulo')
-        data_atual_brasilia = datetime.now(brasilia_tz).date()
-        
-        if isinstance(data_status, datetime):
-            data_status = data_status.date()
-        elif isinstance(data_status, str):
-            data_status = pd.to_datetime(data_status, errors='coerce').date()
-        elif hasattr(data_status, 'date'):
-            data_status = data_status.date()
-        else:
-            return None
-        
-        diferenca = (data_atual_brasilia - data_status).days
-        return diferenca if diferenca >= 0 else 0
-        
-    except Exception:
-        return None
+    from src.utils.envelhecimento import obter_calculadora_envelhecimento
+    dias = obter_calculadora_envelhecimento().dias_corridos(pd.Series([data_status], dtype=object))
+    return None if pd.isna(dias.iloc[0]) else max(int(dias.iloc[0]), 0)
+
+def colunas_texto(df: pd.DataFrame) -> List[str]:
+    """Colunas object ou string (inclui o dtype 'str' do pandas 3)"""
+    return [
+        col for col, tipo in df.dtypes.items()
+        if tipo == object or isinstance(tipo, pd.StringDtype)
+    ]
+
+def limpar_coluna_texto(serie: pd.Series, valores_nulos: Iterable[str]) -> pd.Series:
+    """Strip e mapeamento de marcadores de nulo sobre os valores distintos da coluna
+    
+    Cada valor distinto é limpo uma vez e o resultado volta às linhas pelos
+    códigos do factorize; nulos verdadeiros continuam nulos (sem virar 'nan').
+    """
+    codigos, unicos = pd.factorize(serie)
+    limpos = np.array([str(valor).strip() for valor in unicos] + [np.nan], dtype=object)
+    limpos[:-1][np.isin(limpos[:-1], list(valores_nulos))] = np.nan
+    
+    # factorize marca nulos com -1, que aponta para o NaN no fim
+    resultado = pd.Series(limpos[codigos], index=serie.index, dtype=object)
+    return resultado.astype(serie.dtype) if isinstance(serie.dtype, pd.StringDtype) else resultado
+
+def limpar_textos(df: pd.DataFrame, valores_nulos: Iterable[str]) -> pd.DataFrame:
+    """Aplica limpar_coluna_texto a todas as colunas de texto"""
+    valores_nulos = list(valores_nulos)
+    for col in colunas_texto(df):
+        df[col] = limpar_coluna_texto(df[col], valores_nulos)
+    return df
 
 def limpar_dados_problematicos(df: pd.DataFrame) -> pd.DataFrame:
     """Remove valores problemáticos antes da conversão"""
     valores_problematicos = ['#N/D', '#REF!', '#VALOR!', 'N/A', 'n/a', '', ' ', 'nan']
-    df_limpo = df.replace(valores_problematicos, np.nan)
-    
-    for col in df_limpo.select_dtypes(include=['object']).columns:
-        df_limpo[col] = df_limpo[col].astype(str).str.strip()
-        df_limpo[col] = df_limpo[col].replace('nan', np.nan)
-    
-    return df_limpo
+    return limpar_textos(df.copy(), valores_problematicos)
 
 def converter_tipos_seguros(df: pd.DataFrame, tipos_map: Dict) -> pd.DataFrame:
-    """Conversão segura de tipos com máxima performance"""
-    df_copy = df.copy()
-    
-    # Números inteiros
-    for col in tipos_map.get('numeros_inteiros', []):
-        if col in df_copy.columns:
-            df_copy[col] = pd.to_numeric(df_copy[col], errors='coerce').astype('Int64')
-    
-    # Datas
-    for col in tipos_map.get('datas', []):
-        if col in df_copy.columns:
-            df_copy[col] = pd.to_datetime(df_copy[col], errors='coerce', dayfirst=True)
-    
-    # Textos
-    for col in tipos_map.get('textos', []):
-        if col in df_copy.columns:
-            df_copy[col] = df_copy[col].astype('string')
+    """Conversão segura de tipos com máxima performance
     
-    return df_copy
+    Usa o mesmo plano de leitura do extrator; colunas já tipadas não são convertidas de novo.
+    """
+    return compilar_plano_leitura(tipos_map).aplicar_tipos(df)
@@ -0,0 +1,298 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import csv
+import importlib.util
+import json
+import os
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+# Motores em ordem de preferência quando ainda não há medições
+MOTORES_SUPORTADOS = ['calamine', 'openpyxl']
+
+# Módulo Python exigido por cada motor
+_MODULOS_MOTOR = {
+    'calamine': 'python_calamine',
+    'openpyxl': 'openpyxl'
+}
+
+# Formatos de entrada reconhecidos pela extensão
+FORMATOS_POR_EXTENSAO = {
+    '.xlsx': 'excel', '.xlsm': 'excel', '.xls': 'excel',
+    '.csv': 'csv', '.txt': 'csv',
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.feather': 'feather', '.arrow': 'feather', '.ipc': 'feather'
+}
+
+# Assinaturas binárias (magic bytes) no início do arquivo
+ASSINATURAS_FORMATO = [
+    (b'PAR1', 'parquet'),
+    (b'ARROW1', 'feather'),
+    (b'PK\x03\x04', 'excel'),
+    (b'\xd0\xcf\x11\xe0', 'excel')
+]
+
+def detectar_formato(caminho) -> str:
+    """Detecta o formato pelo conteúdo (magic bytes) e, se inconclusivo, pela extensão"""
+    with open(caminho, 'rb') as f:
+        inicio = f.read(8)
+
+    for assinatura, formato in ASSINATURAS_FORMATO:
+        if inicio.startswith(assinatura):
+            return formato
+
+    return FORMATOS_POR_EXTENSAO.get(Path(caminho).suffix.lower(), 'csv')
+
+def motores_disponiveis() -> List[str]:
+    """Lista os motores de leitura instalados no ambiente"""
+    return [
+        motor for motor in MOTORES_SUPORTADOS
+        if importlib.util.find_spec(_MODULOS_MOTOR[motor]) is not None
+    ]
+
+class LeitorPlanilhas:
+    """Ponto único de leitura de planilhas com escolha de motor e medição de vazão
+
+    A vazão só é gravada em config.DESEMPENHO_LEITORES nas leituras com
+    registrar=True (relatório do ETL e --comparar-motores); as demais
+    leituras (mapeamento no dashboard, formulários) não escrevem o arquivo.
+    """
+
+    def __init__(self, motor: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.arquivo_desempenho = config.PROCESSED_DIR / config.DESEMPENHO_LEITORES
+        self.desempenho = self._carregar_desempenho()
+        self.motor = self._resolver_motor(motor or config.MOTOR_PLANILHA)
+
+    def ler(self, caminho, motor: Optional[str] = None, registrar: bool = False, **kwargs) -> pd.DataFrame:
+        """Lê a planilha com o motor escolhido, recorrendo ao openpyxl em caso de falha"""
+        motor = motor or self.motor
+
+        try:
+            return self._ler_medindo(caminho, motor, registrar, **kwargs)
+        except Exception as e:
+            if motor == 'openpyxl':
+                raise
+            self.logger.warning(f"⚠️ Motor '{motor}' falhou ({e}), usando openpyxl")
+            return self._ler_medindo(caminho, 'openpyxl', registrar, **kwargs)
+
+    def comparar_motores(self, caminho, **kwargs) -> Dict[str, float]:
+        """Lê o arquivo com cada motor disponível e retorna a vazão em MB/s"""
+        resultado = {}
+        for motor in motores_disponiveis():
+            try:
+                self._ler_medindo(caminho, motor, registrar=True, **kwargs)
+                resultado[motor] = self.vazao_mb_s(motor)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Motor '{motor}' não conseguiu ler {caminho}: {e}")
+
+        self.motor = self._resolver_motor('auto')
+        return resultado
+
+    def ler_tabela_arrow(self, caminho, formato: str,
+                         usar_coluna: Optional[Callable[[str], bool]] = None,
+                         colunas_texto: Iterable[str] = (),
+                         valores_na: Iterable[str] = (),
+                         formatos_data: Iterable[str] = (),
+                         registrar: bool = False) -> pd.DataFrame:
+        """Lê CSV, Parquet ou Feather/Arrow IPC com os leitores multithread do pyarrow"""
+        inicio = time.perf_counter()
+
+        if formato == 'csv':
+            tabela = pacsv.read_csv(
+                caminho,
+                **self._opcoes_csv(caminho, usar_coluna, colunas_texto, valores_na, formatos_data)
+            )
+        elif formato == 'parquet':
+            colunas = self._projetar(pq.read_schema(caminho).names, usar_coluna)
+            tabela = pq.read_table(caminho, columns=colunas, use_threads=True)
+        elif formato == 'feather':
+            colunas = self._projetar(pa.ipc.open_file(caminho).schema.names, usar_coluna)
+            tabela = feather.read_table(caminho, columns=colunas, use_threads=True)
+        else:
+            raise ValueError(f"Formato não suportado pelo leitor Arrow: {formato}")
+
+        df = tabela.to_pandas()
+        duracao = time.perf_counter() - inicio
+
+        if registrar:
+            self._registrar_leitura(f"pyarrow_{formato}", Path(caminho).stat().st_size, duracao)
+        self.logger.info(
+            f"📖 {Path(caminho).name}: {len(df):,} linhas em {duracao:.2f}s (pyarrow {formato})"
+        )
+        return df
+
+    def iterar_tabela_arrow(self, caminho, formato: str, tamanho_bloco: int,
+                            usar_coluna: Optional[Callable[[str], bool]] = None,
+                            colunas_texto: Iterable[str] = (),
+                            valores_na: Iterable[str] = (),
+                            formatos_data: Iterable[str] = ()) -> Iterator[pd.DataFrame]:
+        """Versão em blocos de ler_tabela_arrow (no máximo tamanho_bloco linhas por bloco)"""
+        if formato == 'csv':
+            leitor = pacsv.open_csv(
+                caminho,
+                **self._opcoes_csv(caminho, usar_coluna, colunas_texto, valores_na, formatos_data)
+            )
+            lotes = (lote for lote in leitor)
+        elif formato == 'parquet':
+            arquivo = pq.ParquetFile(caminho)
+            colunas = self._projetar(arquivo.schema_arrow.names, usar_coluna)
+            lotes = arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas)
+        elif formato == 'feather':
+            leitor = pa.ipc.open_file(caminho)
+            colunas = self._projetar(leitor.schema.names, usar_coluna)
+            lotes = (
+                leitor.get_batch(i).select(colunas) if colunas else leitor.get_batch(i)
+                for i in range(leitor.num_record_batches)
+            )
+        else:
+            raise ValueError(f"Formato não suportado pelo leitor Arrow: {formato}")
+
+        for lote in lotes:
+            for inicio in range(0, lote.num_rows, tamanho_bloco):
+                yield lote.slice(inicio, tamanho_bloco).to_pandas()
+
+    def vazao_mb_s(self, motor: str) -> float:
+        """Vazão média registrada para o motor (MB/s)"""
+        registro = self.desempenho.get(motor)
+        if not registro or registro['segundos'] <= 0:
+            return 0.0
+        return registro['bytes'] / (1024 ** 2) / registro['segundos']
+
+    def _ler_medindo(self, caminho, motor: str, registrar: bool = False, **kwargs) -> pd.DataFrame:
+        inicio = time.perf_counter()
+        df = pd.read_excel(caminho, engine=motor, **kwargs)
+        duracao = time.perf_counter() - inicio
+
+        if isinstance(caminho, (str, Path)):
+            if registrar:
+                self._registrar_leitura(motor, Path(caminho).stat().st_size, duracao)
+            self.logger.info(
+                f"📖 {Path(caminho).name}: {len(df):,} linhas em {duracao:.2f}s ({motor})"
+            )
+        return df
+
+    def _projetar(self, nomes: List[str], usar_coluna: Optional[Callable[[str], bool]]) -> Optional[List[str]]:
+        if usar_coluna is None:
+            return None
+        return [nome for nome in nomes if usar_coluna(nome)]
+
+    def _opcoes_csv(self, caminho, usar_coluna, colunas_texto, valores_na, formatos_data) -> Dict:
+        """Monta opções do leitor CSV do pyarrow (separador, encoding, projeção e tipos)"""
+        encoding, delimitador, cabecalho = self._inspecionar_csv(caminho)
+
+        incluir = self._projetar(cabecalho, usar_coluna) or []
+        nulos = list(valores_na) + [
+            v for v in pacsv.ConvertOptions().null_values if v not in valores_na
+        ]
+
+        return {
+            'read_options': pacsv.ReadOptions(use_threads=True, encoding=encoding),
+            'parse_options': pacsv.ParseOptions(delimiter=delimitador),
+            'convert_options': pacsv.ConvertOptions(
+                include_columns=incluir,
+                column_types={col: pa.string() for col in colunas_texto if col in cabecalho},
+                null_values=nulos,
+                strings_can_be_null=True,
+                timestamp_parsers=[pacsv.ISO8601, *formatos_data]
+            )
+        }
+
+    def _inspecionar_csv(self, caminho):
+        """Detecta encoding, separador e cabeçalho a partir do início do arquivo"""
+        with open(caminho, 'rb') as f:
+            amostra = f.read(64 * 1024)
+
+        try:
+            texto = amostra.decode('utf-8-sig')
+            encoding = 'utf8'
+        except UnicodeDecodeError as e:
+            # Bloco cortado no meio de um caractere multibyte ainda é UTF-8
+            if e.start >= len(amostra) - 3:
+                texto = amostra[:e.start].decode('utf-8-sig')
+                encoding = 'utf8'
+            else:
+                texto = amostra.decode('latin-1')
+                encoding = 'latin1'
+
+        primeira_linha = texto.splitlines()[0] if texto else ''
+        delimitador = max([';', ',', '\t', '|'], key=primeira_linha.count)
+        cabecalho = next(csv.reader([primeira_linha], delimiter=delimitador), [])
+        return encoding, delimitador, cabecalho
+
+    def _resolver_motor(self, motor: str) -> str:
+        """Resolve 'auto' para o motor disponível com melhor vazão medida"""
+        disponiveis = motores_disponiveis()
+
+        if motor != 'auto':
+            if motor not in disponiveis:
+                self.logger.warning(f"⚠️ Motor '{motor}' não instalado, usando openpyxl")
+                return 'openpyxl'
+            return motor
+
+        medidos = [m for m in disponiveis if self.vazao_mb_s(m) > 0]
+        if medidos:
+            return max(medidos, key=self.vazao_mb_s)
+
+        return disponiveis[0] if disponiveis else 'openpyxl'
+
+    def _registrar_leitura(self, motor: str, tamanho_bytes: int, duracao: float) -> None:
+        # Soma sobre o arquivo atual (não sobre a cópia carregada no início do processo)
+        self.desempenho = self._carregar_desempenho()
+        registro = self.desempenho.setdefault(motor, {'bytes': 0, 'segundos': 0.0, 'leituras': 0})
+        registro['bytes'] += tamanho_bytes
+        registro['segundos'] += duracao
+        registro['leituras'] += 1
+
+        try:
+            arquivo_temp = self.arquivo_desempenho.with_suffix(f'.{os.getpid()}.tmp')
+            with open(arquivo_temp, 'w', encoding='utf-8') as f:
+                json.dump(self.desempenho, f, indent=2)
+            arquivo_temp.replace(self.arquivo_desempenho)
+        except OSError as e:
+            self.logger.warning(f"⚠️ Não foi possível registrar desempenho do leitor: {e}")
+
+    def _carregar_desempenho(self) -> Dict[str, Any]:
+        if not self.arquivo_desempenho.exists():
+            return {}
+        try:
+            with open(self.arquivo_desempenho, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+_leitor_padrao: Optional[LeitorPlanilhas] = None
+
+def obter_leitor() -> LeitorPlanilhas:
+    """Retorna o leitor compartilhado pelo processo"""
+    global _leitor_padrao
+    if _leitor_padrao is None:
+        _leitor_padrao = LeitorPlanilhas()
+    return _leitor_padrao
+
+def ler_planilha(caminho, registrar: bool = False, **kwargs) -> pd.DataFrame:
+    """Atalho para ler uma planilha com o leitor padrão (mesmos parâmetros de pd.read_excel)
+
+    registrar=True grava a vazão medida (usado só pelo ETL).
+    """
+    return obter_leitor().ler(caminho, registrar=registrar, **kwargs)
+
+def ler_tabela(caminho, registrar: bool = False, **kwargs) -> pd.DataFrame:
+    """Lê relatório em qualquer formato suportado (Excel, CSV, Parquet, Feather)
+
+    Os kwargs são repassados ao pd.read_excel apenas para planilhas.
+    """
+    formato = detectar_formato(caminho)
+    if formato == 'excel':
+        return ler_planilha(caminho, registrar=registrar, **kwargs)
+    return obter_leitor().ler_tabela_arrow(caminho, formato, registrar=registrar)
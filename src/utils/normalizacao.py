@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+import unicodedata
+from functools import lru_cache
+from typing import Callable
+from pathlib import Path
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+def remover_acentos(texto) -> str:
+    """Remove acentos via normalização Unicode (NFD)"""
+    if pd.isna(texto):
+        return ""
+    return unicodedata.normalize('NFD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+
+@lru_cache(maxsize=config.NORMALIZACAO_CACHE_TAMANHO)
+def _normalizar_provider_texto(texto: str) -> str:
+    texto = texto.strip().upper()
+    if texto.startswith('POLO '):
+        texto = texto[5:]
+    return remover_acentos(texto)
+
+@lru_cache(maxsize=config.NORMALIZACAO_CACHE_TAMANHO)
+def _normalizar_polo_sap_texto(texto: str) -> str:
+    return remover_acentos(texto.strip().upper())
+
+def normalizar_provider(provider) -> str:
+    """Provider em maiúsculas, sem o prefixo 'POLO ' e sem acentos"""
+    if pd.isna(provider):
+        return ""
+    return _normalizar_provider_texto(str(provider))
+
+def normalizar_polo_sap(polo_sap) -> str:
+    """'Polo + SAP' do mapeamento em maiúsculas e sem acentos"""
+    if pd.isna(polo_sap):
+        return ""
+    return _normalizar_polo_sap_texto(str(polo_sap))
+
+def normalizar_coluna(serie: pd.Series, normalizador: Callable[[object], str]) -> pd.Series:
+    """Aplica o normalizador apenas aos valores distintos e devolve pelos códigos do factorize
+
+    Os resultados ficam no LRU dos normalizadores, então reruns do dashboard
+    e relatórios seguintes não repetem o trabalho para providers já vistos.
+    """
+    codigos, unicos = pd.factorize(serie)
+    # Nulos (código -1) apontam para o "" no fim, como nas funções por valor
+    normalizados = np.array([normalizador(valor) for valor in unicos] + [""], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index, dtype=object)
+
+def normalizar_providers(serie: pd.Series) -> pd.Series:
+    """normalizar_provider vetorizado por valores distintos"""
+    return normalizar_coluna(serie, normalizar_provider)
+
+def normalizar_polos_sap(serie: pd.Series) -> pd.Series:
+    """normalizar_polo_sap vetorizado por valores distintos"""
+    return normalizar_coluna(serie, normalizar_polo_sap)
+
+def garantir_provider_normalizado(df: pd.DataFrame) -> pd.DataFrame:
+    """Usa o Provider_Normalizado gravado pelo ETL; calcula apenas se ausente"""
+    if 'Provider_Normalizado' not in df.columns and 'Provider' in df.columns:
+        df['Provider_Normalizado'] = normalizar_providers(df['Provider'])
+    return df
@@ -1,15 +1,38 @@
 import pandas as pd
+import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta
 import pytz
 import io
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Mapping, Tuple
 import sys
 
 # Adicionar config ao path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import config
+from src.utils.regras_sla import obter_pontuador_urgencia
+
+class RelatorioPolos(Mapping):
+    """Mapeamento polo → ordens do polo, sem cópias por polo
+    
+    Guarda o frame único ordenado por polo; cada acesso devolve a fatia
+    contígua do polo (iloc[início:fim]), montada apenas quando solicitada.
+    """
+    
+    def __init__(self, ordens: pd.DataFrame, limites: Dict[str, Tuple[int, int]]):
+        self.ordens = ordens
+        self._limites = limites
+    
+    def __getitem__(self, polo: str) -> pd.DataFrame:
+        inicio, fim = self._limites[polo]
+        return self.ordens.iloc[inicio:fim]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._limites)
+    
+    def __len__(self) -> int:
+        return len(self._limites)
 
 class PoloReportManager:
     """Gerenciador simplificado de relatórios por polo"""
@@ -17,9 +40,15 @@ class PoloReportManager:
     def __init__(self):
         self.brasilia_tz = pytz.timezone('America/Sao_Paulo')
         self.arquivo_historico = config.PROCESSED_DIR / "historico_exportacoes.parquet"
+        self.pontuador_urgencia = obter_pontuador_urgencia()
     
-    def gerar_relatorio_por_polo(self, dados_dashboard: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-        """Gera relatório de ordens em aberto agrupadas por polo"""
+    def gerar_relatorio_por_polo(self, dados_dashboard: pd.DataFrame) -> Mapping[str, pd.DataFrame]:
+        """Gera relatório de ordens em aberto agrupadas por polo
+        
+        Uma única ordenação por (polo, urgência, dias) e um groupby com
+        transform para as estatísticas; cada polo é uma fatia contígua. Os
+        polos ficam na ordem em que aparecem nos dados (pd.factorize).
+        """
         
         filtro_aberto = (
             (dados_dashboard['Status_Tratativa'].isin(['Em Aberto', 'Pendente', ''])) |
@@ -27,73 +56,46 @@ class PoloReportManager:
             (dados_dashboard['Status_SLA'] == 'Vencido')
         )
         
-        ordens_abertas = dados_dashboard[filtro_aberto].copy()
+        ordens_abertas = dados_dashboard[filtro_aberto]
         
-        if ordens_abertas.empty:
-            return {}
+        if ordens_abertas.empty or 'Provider' not in ordens_abertas.columns:
+            return RelatorioPolos(ordens_abertas.iloc[0:0], {})
         
-        ordens_abertas['Nivel_Urgencia'] = ordens_abertas.apply(self._calcular_urgencia, axis=1)
-        ordens_abertas['Descricao_Urgencia'] = ordens_abertas['Nivel_Urgencia'].map({
-            5: '🔴 CRÍTICO',
-            4: '🟠 ALTO',
-            3: '🟡 MÉDIO',
-            2: '🔵 BAIXO',
-            1: '⚪ NORMAL'
-        })
+        ordens_abertas = ordens_abertas[ordens_abertas['Provider'].notna()]
+        ordens_abertas = self.pontuador_urgencia.aplicar(ordens_abertas.copy())
         
-        relatorio_polos = {}
+        ordens_abertas = ordens_abertas.assign(
+            _Ordem_Polo=pd.factorize(ordens_abertas['Provider'])[0]
+        ).sort_values(
+            ['_Ordem_Polo', 'Nivel_Urgencia', 'Dias_Em_Aberto'],
+            ascending=[True, False, False],
+            kind='stable'
+        ).drop(columns='_Ordem_Polo').reset_index(drop=True)
         
-        if 'Provider' in ordens_abertas.columns:
-            for polo in ordens_abertas['Provider'].unique():
-                if pd.notna(polo):
-                    ordens_polo = ordens_abertas[ordens_abertas['Provider'] == polo].copy()
-                    
-                    ordens_polo = ordens_polo.sort_values(
-                        ['Nivel_Urgencia', 'Dias_Em_Aberto'], 
-                        ascending=[False, False]
-                    )
-                    
-                    ordens_polo = self._adicionar_estatisticas_polo(ordens_polo)
-                    relatorio_polos[polo] = ordens_polo
+        ordens_abertas = self._adicionar_estatisticas_polo(ordens_abertas)
         
-        return relatorio_polos
-    
-    def _calcular_urgencia(self, row) -> int:
-        """Calcula nível de urgência (1-5)"""
-        try:
-            status_sla = row.get('Status_SLA', '')
-            dias_aberto = row.get('Dias_Em_Aberto', 0)
-            sla_cliente = row.get('SLA Cliente', 999)
-            
-            if status_sla == 'Vencido' or dias_aberto > sla_cliente:
-                return 5  # CRÍTICO
-            elif dias_aberto >= sla_cliente * 0.9:
-                return 4  # ALTO
-            elif dias_aberto >= sla_cliente * 0.7:
-                return 3  # MÉDIO
-            elif dias_aberto >= sla_cliente * 0.5:
-                return 2  # BAIXO
-            else:
-                return 1  # NORMAL
-        except:
-            return 1
+        # Limites [início, fim) de cada polo no frame ordenado
+        polos = ordens_abertas['Provider'].to_numpy()
+        inicios = np.flatnonzero(np.r_[True, polos[1:] != polos[:-1]]) if len(polos) else np.array([], dtype=int)
+        fins = np.r_[inicios[1:], len(polos)]
+        limites = {polos[inicio]: (inicio, fim) for inicio, fim in zip(inicios, fins)}
+        
+        return RelatorioPolos(ordens_abertas, limites)
     
-    def _adicionar_estatisticas_polo(self, df_polo: pd.DataFrame) -> pd.DataFrame:
-        """Adiciona estatísticas resumidas do polo"""
-        if df_polo.empty:
-            return df_polo
+    def _adicionar_estatisticas_polo(self, ordens: pd.DataFrame) -> pd.DataFrame:
+        """Adiciona estatísticas resumidas de cada polo (groupby + transform)"""
+        if ordens.empty:
+            return ordens
         
-        total_ordens = len(df_polo)
-        criticas = len(df_polo[df_polo['Nivel_Urgencia'] == 5])
-        altas = len(df_polo[df_polo['Nivel_Urgencia'] == 4])
-        media_dias = df_polo['Dias_Em_Aberto'].mean()
+        grupos = ordens.groupby('Provider', sort=False, observed=True)
+        niveis = ordens['Nivel_Urgencia']
         
-        df_polo['Total_Ordens_Polo'] = total_ordens
-        df_polo['Ordens_Criticas'] = criticas
-        df_polo['Ordens_Altas'] = altas
-        df_polo['Media_Dias_Polo'] = round(media_dias, 1)
+        ordens['Total_Ordens_Polo'] = grupos['Provider'].transform('size')
+        ordens['Ordens_Criticas'] = niveis.eq(5).groupby(ordens['Provider'], sort=False, observed=True).transform('sum')
+        ordens['Ordens_Altas'] = niveis.eq(4).groupby(ordens['Provider'], sort=False, observed=True).transform('sum')
+        ordens['Media_Dias_Polo'] = grupos['Dias_Em_Aberto'].transform('mean').round(1)
         
-        return df_polo
+        return ordens
     
     def registrar_exportacao(self, polo_id: str, quantidade_ordens: int, 
                            formato: str, usuario: str = "dashboard_user") -> bool:
@@ -6,6 +6,13 @@ from typing import Dict, List, Optional
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils.dataframe import dataframe_to_rows
+from pathlib import Path
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.regras_sla import obter_pontuador_urgencia
+from src.utils.schema import contar_valores
 
 class QuickExporter:
     """Exportador rápido com templates otimizados e formatação avançada"""
@@ -20,10 +27,18 @@ class QuickExporter:
             'header': '2E86AB',       # Azul escuro
             'subheader': '90CAF9'     # Azul médio
         }
+        self.pontuador_urgencia = obter_pontuador_urgencia()
+    
+    def garantir_urgencia(self, dados_polo: pd.DataFrame) -> pd.DataFrame:
+        """Calcula Nivel_Urgencia/Descricao_Urgencia (mesmo pontuador do PoloReportManager) se ausentes"""
+        if 'Nivel_Urgencia' in dados_polo.columns and 'Descricao_Urgencia' in dados_polo.columns:
+            return dados_polo
+        return self.pontuador_urgencia.aplicar(dados_polo.copy())
     
     def exportar_polo_excel(self, dados_polo: pd.DataFrame, nome_polo: str) -> bytes:
         """Exporta relatório completo do polo em Excel com formatação avançada"""
         
+        dados_polo = self.garantir_urgencia(dados_polo)
         output = io.BytesIO()
         
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
@@ -73,6 +88,8 @@ class QuickExporter:
     def exportar_polo_csv(self, dados_polo: pd.DataFrame, nome_polo: str) -> bytes:
         """Exporta lista simples do polo em CSV"""
         
+        dados_polo = self.garantir_urgencia(dados_polo)
+        
         colunas_csv = [
             'Ordem PagBank', 'Dias_Em_Aberto', 'Status_SLA', 
             'Status da Ordem', 'Estado', 'Cidade'
@@ -91,13 +108,15 @@ class QuickExporter:
         
         # Ordenar por urgência se disponível
         if 'Nivel_Urgencia' in dados_polo.columns:
-            dados_csv = dados_csv.sort_values('Nivel_Urgencia', ascending=False)
+            ordem = dados_polo['Nivel_Urgencia'].to_numpy().argsort(kind='stable')[::-1]
+            dados_csv = dados_csv.iloc[ordem]
         
         return dados_csv.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
     
     def exportar_resumo_executivo(self, dados_polo: pd.DataFrame, nome_polo: str) -> bytes:
         """Exporta apenas resumo executivo em formato CSV"""
         
+        dados_polo = self.garantir_urgencia(dados_polo)
         resumo_data = []
         
         # Métricas principais
@@ -174,7 +193,7 @@ class QuickExporter:
                 {'Polo': nome_polo, 'Categoria': 'DISTRIBUIÇÃO GEOGRÁFICA', 'Métrica': '', 'Valor': ''},
             ])
             
-            dist_estados = dados_polo['Estado'].value_counts().head(10)
+            dist_estados = contar_valores(dados_polo['Estado']).head(10)
             for estado, qtd in dist_estados.items():
                 resumo_data.append({
                     'Polo': nome_polo,
@@ -199,6 +218,7 @@ class QuickExporter:
             # ABA 2: Consolidado de Críticas
             todas_criticas = pd.DataFrame()
             for polo_id, dados_polo in relatorios_polo.items():
+                dados_polo = self.garantir_urgencia(dados_polo)
                 if 'Nivel_Urgencia' in dados_polo.columns:
                     criticas_polo = dados_polo[dados_polo['Nivel_Urgencia'] >= 4].copy()
                     if not criticas_polo.empty:
@@ -239,7 +259,7 @@ class QuickExporter:
             total_ordens = len(dados)
             
             for nivel, qtd in dist_urgencia.items():
-                descricao = {5: '🔴 CRÍTICO', 4: '🟠 ALTO', 3: '🟡 MÉDIO', 2: '🔵 BAIXO', 1: '⚪ NORMAL'}.get(nivel, 'N/A')
+                descricao = self.pontuador_urgencia.descricoes.get(nivel, 'N/A')
                 percentual = (qtd/total_ordens*100) if total_ordens > 0 else 0
                 resumo.append({'Categoria': f'  {descricao}', 'Valor': f"{qtd} ({percentual:.1f}%)"})
             resumo.append({'Categoria': '', 'Valor': ''})
@@ -270,7 +290,7 @@ class QuickExporter:
         # Distribuição por Estado (Top 10)
         if 'Estado' in dados.columns:
             resumo.append({'Categoria': 'TOP 10 ESTADOS', 'Valor': ''})
-            dist_estados = dados['Estado'].value_counts().head(10)
+            dist_estados = contar_valores(dados['Estado']).head(10)
             total_ordens = len(dados)
             
             for estado, qtd in dist_estados.items():
@@ -343,7 +363,7 @@ class QuickExporter:
             # Análise por Estado
             analise.append({'Tipo': 'DISTRIBUIÇÃO POR ESTADO', 'Local': '', 'Quantidade': '', 'Percentual': '', 'Média_Dias': ''})
             
-            dist_estados = dados.groupby('Estado').agg({
+            dist_estados = dados.groupby('Estado', observed=True).agg({
                 'Ordem PagBank': 'count',
                 'Dias_Em_Aberto': 'mean'
             }).round(1)
@@ -366,7 +386,7 @@ class QuickExporter:
             analise.append({'Tipo': '', 'Local': '', 'Quantidade': '', 'Percentual': '', 'Média_Dias': ''})
             analise.append({'Tipo': 'TOP 20 CIDADES', 'Local': '', 'Quantidade': '', 'Percentual': '', 'Média_Dias': ''})
             
-            dist_cidades = dados.groupby('Cidade').agg({
+            dist_cidades = dados.groupby('Cidade', observed=True).agg({
                 'Ordem PagBank': 'count',
                 'Dias_Em_Aberto': 'mean'
             }).round(1)
@@ -392,6 +412,7 @@ class QuickExporter:
         resumo_geral = []
         
         for polo_id, dados_polo in relatorios_polo.items():
+            dados_polo = self.garantir_urgencia(dados_polo)
             total = len(dados_polo)
             criticas = len(dados_polo[dados_polo['Nivel_Urgencia'] == 5]) if 'Nivel_Urgencia' in dados_polo.columns else 0
             altas = len(dados_polo[dados_polo['Nivel_Urgencia'] == 4]) if 'Nivel_Urgencia' in dados_polo.columns else 0
@@ -420,6 +441,7 @@ class QuickExporter:
         ranking = []
         
         for polo_id, dados_polo in relatorios_polo.items():
+            dados_polo = self.garantir_urgencia(dados_polo)
             total = len(dados_polo)
             criticas = len(dados_polo[dados_polo['Nivel_Urgencia'] == 5]) if 'Nivel_Urgencia' in dados_polo.columns else 0
             vencidas = len(dados_polo[dados_polo['Status_SLA'] == 'Vencido']) if 'Status_SLA' in dados_polo.columns else 0
@@ -0,0 +1,170 @@
+import pandas as pd
+import numpy as np
+import logging
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+# Tipos aceitos pelas regras (demais valores tornam o status 'Indefinido')
+_TIPOS_NUMERICOS = (int, float, bool, np.number)
+
+def valores_numericos(df: pd.DataFrame, coluna: str, padrao: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Valores da coluna em float64 e máscara dos que não suportam aritmética
+
+    Coluna ausente vale `padrao`. Em colunas numéricas NaN é válido (compara
+    falso); pd.NA, None, textos e datas são inválidos.
+    """
+    if coluna not in df.columns:
+        return np.full(len(df), padrao, dtype='float64'), np.zeros(len(df), dtype=bool)
+
+    serie = df[coluna]
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+        if isinstance(serie.dtype, pd.api.extensions.ExtensionDtype):
+            invalido = serie.isna().to_numpy()
+            valores = serie.to_numpy(dtype='float64', na_value=0.0)
+            return valores, invalido
+        return serie.to_numpy(dtype='float64'), np.zeros(len(serie), dtype=bool)
+
+    if serie.dtype != object:
+        # Texto, datas e demais tipos não numéricos
+        return np.zeros(len(serie)), np.ones(len(serie), dtype=bool)
+
+    numerico = serie.map(lambda v: isinstance(v, _TIPOS_NUMERICOS)).to_numpy(dtype=bool)
+    valores = pd.to_numeric(serie.where(numerico), errors='coerce').to_numpy(dtype='float64')
+    return valores, ~numerico
+
+class MotorRegrasSLA:
+    """Classificação de SLA e prioridade por regras declarativas de config.REGRAS_SLA
+
+    As faixas (dias em aberto <= fator × SLA) são compiladas em np.select,
+    sem laços por linha.
+    """
+
+    def __init__(self, regras: Optional[Dict] = None, prioridades: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        regras = regras if regras is not None else config.REGRAS_SLA
+        prioridades = prioridades if prioridades is not None else config.PRIORIDADE_POR_STATUS_SLA
+
+        self.coluna_sla = regras['coluna_sla']
+        self.coluna_dias = regras['coluna_dias']
+        self.faixas: List[Tuple[str, float]] = [
+            (status, float(fator)) for status, fator in regras['faixas']
+        ]
+        self.status_acima = regras['acima']
+        self.status_indefinido = regras['indefinido']
+
+        self.mapa_prioridade = dict(prioridades['mapa'])
+        self.prioridade_padrao = prioridades['padrao']
+
+    def classificar_status(self, df: pd.DataFrame) -> pd.Series:
+        """Status do SLA para todas as linhas"""
+        rotulos = np.array(
+            [self.status_indefinido] + [status for status, _ in self.faixas] + [self.status_acima],
+            dtype=object
+        )
+        return pd.Series(rotulos[self._codigos_status(df)], index=df.index, dtype=object)
+
+    def classificar_prioridade(self, status_sla: pd.Series) -> pd.Series:
+        """Prioridade a partir do status do SLA"""
+        codigos, unicos = pd.factorize(status_sla)
+        rotulos = np.array(
+            [self.mapa_prioridade.get(status, self.prioridade_padrao) for status in unicos] + [self.prioridade_padrao],
+            dtype=object
+        )
+        # factorize marca nulos com -1, que aponta para o rótulo padrão no fim
+        return pd.Series(rotulos[codigos], index=status_sla.index, dtype=object)
+
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Adiciona Status_SLA e Prioridade ao DataFrame"""
+        df['Status_SLA'] = self.classificar_status(df)
+        df['Prioridade'] = self.classificar_prioridade(df['Status_SLA'])
+        return df
+
+    def _codigos_status(self, df: pd.DataFrame) -> np.ndarray:
+        """Índice do status de cada linha: 0 = indefinido, 1..n = faixas, n+1 = acima"""
+        sla, sla_invalido = valores_numericos(df, self.coluna_sla)
+        dias, dias_invalido = valores_numericos(df, self.coluna_dias)
+
+        # Comparações com NaN são falsas: a linha cai em status_acima, como na regra original
+        condicoes = [sla_invalido | dias_invalido] + [dias <= sla * fator for _, fator in self.faixas]
+        return np.select(condicoes, np.arange(len(condicoes)), default=len(condicoes))
+
+class PontuadorUrgencia:
+    """Nível de urgência (1-5) das ordens por regras de config.NIVEIS_URGENCIA
+
+    Status crítico ('Vencido') ou dias acima do SLA = nível máximo; demais
+    níveis pela primeira fração do SLA atingida. SLA ausente ou inválido
+    resulta no nível mínimo, sem exceções por linha.
+    """
+
+    def __init__(self, regras: Optional[Dict] = None):
+        regras = regras if regras is not None else config.NIVEIS_URGENCIA
+
+        self.coluna_status = regras['coluna_status']
+        self.coluna_sla = regras['coluna_sla']
+        self.coluna_dias = regras['coluna_dias']
+        self.status_critico = regras['status_critico']
+        self.sla_padrao = float(regras['sla_padrao'])
+        self.faixas: List[Tuple[int, float]] = [
+            (int(nivel), float(fator)) for nivel, fator in regras['faixas']
+        ]
+        self.descricoes: Dict[int, str] = dict(regras['descricoes'])
+        self.nivel_maximo = max(self.descricoes)
+        self.nivel_minimo = min(self.descricoes)
+
+    def calcular_nivel(self, df: pd.DataFrame) -> pd.Series:
+        """Nível de urgência para todas as linhas"""
+        sla, sla_invalido = valores_numericos(df, self.coluna_sla, self.sla_padrao)
+        dias, dias_invalido = valores_numericos(df, self.coluna_dias)
+        invalido = sla_invalido | dias_invalido
+
+        if self.coluna_status in df.columns:
+            critico_status = (df[self.coluna_status] == self.status_critico).fillna(False).to_numpy(dtype=bool)
+        else:
+            critico_status = np.zeros(len(df), dtype=bool)
+
+        condicoes = [critico_status, invalido, dias > sla] + [
+            dias >= sla * fator for _, fator in self.faixas
+        ]
+        escolhas = [self.nivel_maximo, self.nivel_minimo, self.nivel_maximo] + [
+            nivel for nivel, _ in self.faixas
+        ]
+
+        niveis = np.select(condicoes, escolhas, default=self.nivel_minimo)
+        return pd.Series(niveis.astype('int64'), index=df.index)
+
+    def descrever(self, niveis: pd.Series) -> pd.Series:
+        """Rótulo de cada nível (ex.: 5 → '🔴 CRÍTICO')"""
+        return niveis.map(self.descricoes)
+
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Adiciona Nivel_Urgencia e Descricao_Urgencia ao DataFrame"""
+        df['Nivel_Urgencia'] = self.calcular_nivel(df)
+        df['Descricao_Urgencia'] = self.descrever(df['Nivel_Urgencia'])
+        return df
+
+_motor_padrao: Optional[MotorRegrasSLA] = None
+
+def obter_motor_sla() -> MotorRegrasSLA:
+    """Retorna o motor de regras compartilhado pelo processo"""
+    global _motor_padrao
+    if _motor_padrao is None:
+        _motor_padrao = MotorRegrasSLA()
+    return _motor_padrao
+
+def aplicar_regras_sla(df: pd.DataFrame) -> pd.DataFrame:
+    """Atalho para classificar status do SLA e prioridade com as regras de config"""
+    return obter_motor_sla().aplicar(df)
+
+_pontuador_padrao: Optional[PontuadorUrgencia] = None
+
+def obter_pontuador_urgencia() -> PontuadorUrgencia:
+    """Retorna o pontuador de urgência compartilhado pelo processo"""
+    global _pontuador_padrao
+    if _pontuador_padrao is None:
+        _pontuador_padrao = PontuadorUrgencia()
+    return _pontuador_padrao
@@ -1,10 +1,13 @@
 import pandas as pd
 import streamlit as st
 from pathlib import Path
+from src.utils.leitor_planilhas import ler_planilha
+from src.etl.dimensao_provider import DimensaoProvider
 
 class SafraAnalyticsManager:
     def __init__(self, config):
         self.config = config
+        self.dimensao_provider = None
 
     def carregar_mapeamento_lider_polo(self):
         """Carrega mapeamento líder-polo"""
@@ -15,28 +18,16 @@ class SafraAnalyticsManager:
             return pd.DataFrame()
         
         try:
-            df = pd.read_excel(arquivo)
+            df = ler_planilha(arquivo)
             return df
         except Exception as e:
             st.error(f"❌ Erro ao ler mapeamento: {e}")
             return pd.DataFrame()
 
     def associar_lider(self, df_relatorio, df_mapeamento):
-        """Associação simples Provider = Polo + SAP"""
-        df = df_relatorio.copy()
-        
-        # Merge direto
-        resultado = df.merge(
-            df_mapeamento[['Polo + SAP', 'Líder PagResolve']],
-            left_on='Provider',
-            right_on='Polo + SAP',
-            how='left'
-        )
-        
-        # Renomear
-        resultado = resultado.rename(columns={'Líder PagResolve': 'Lider'})
-        
-        return resultado
+        """Associação Provider → líder pelo Provider_Id da dimensão de providers"""
+        self.dimensao_provider = DimensaoProvider.carregar_ou_construir(df_mapeamento)
+        return self.dimensao_provider.associar_lider(df_relatorio.copy())
 
     def obter_lideres(self, df):
         """Obtém líderes únicos"""
@@ -46,6 +37,8 @@ class SafraAnalyticsManager:
         """Filtra por líder"""
         if lider == 'TODOS':
             return df
+        if self.dimensao_provider is not None and 'Provider_Id' in df.columns:
+            return df[self.dimensao_provider.mascara_lider(df['Provider_Id'], lider)]
         return df[df['Lider'] == lider]
 
     def calcular_metricas_reais(self, df_filtrado):
@@ -0,0 +1,164 @@
+import pandas as pd
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import sys
+
+# Adicionar config ao path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import config
+
+@dataclass(frozen=True)
+class PlanoLeitura:
+    """Plano de leitura compilado a partir de config.TIPOS_DADOS
+
+    Concentra projeção de colunas, tipos, marcadores de nulo e formato de
+    datas para que o relatório já saia tipado da extração.
+    """
+    inteiros: Tuple[str, ...]
+    datas: Tuple[str, ...]
+    textos: Tuple[str, ...]
+    categoricas: Tuple[str, ...]
+    valores_na: Tuple[str, ...]
+    formato_data: Optional[str]
+
+    @property
+    def colunas(self) -> frozenset:
+        return frozenset(self.inteiros + self.datas + self.textos)
+
+    @property
+    def assinatura(self) -> str:
+        """Identificador curto do plano (usado para versionar caches)"""
+        conteudo = json.dumps(
+            [self.inteiros, self.datas, self.textos, self.valores_na, self.formato_data],
+            ensure_ascii=False
+        )
+        return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:10]
+
+    def usar_coluna(self, nome) -> bool:
+        """Filtro de projeção: apenas colunas previstas no schema são materializadas"""
+        return nome in self.colunas
+
+    def parametros_leitura(self) -> Dict:
+        """Parâmetros para pd.read_excel / ler_planilha"""
+        return {
+            'usecols': self.usar_coluna,
+            'dtype': {col: str for col in self.textos},
+            'na_values': list(self.valores_na),
+            'keep_default_na': True
+        }
+
+    def parametros_arrow(self) -> Dict:
+        """Parâmetros para LeitorPlanilhas.ler_tabela_arrow (CSV/Parquet/Feather)"""
+        return {
+            'usar_coluna': self.usar_coluna,
+            'colunas_texto': self.textos,
+            'valores_na': self.valores_na,
+            'formatos_data': (self.formato_data,) if self.formato_data else ()
+        }
+
+    def aplicar_tipos(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Novo DataFrame com as colunas do schema no tipo final (o original não é alterado)
+
+        Colunas já tipadas (leitura pelo plano ou base histórica) são puladas,
+        evitando novas passagens sobre o DataFrame.
+        """
+        convertidas = {}
+        for col in self.inteiros:
+            if col in df.columns and str(df[col].dtype) != 'Int64':
+                convertidas[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+
+        for col in self.datas:
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                convertidas[col] = self._converter_data(df[col])
+
+        for col in self.textos:
+            if col in df.columns and str(df[col].dtype) != 'string':
+                texto = df[col].astype('string').str.strip()
+                convertidas[col] = texto.mask(texto.isin(self.valores_na))
+
+        return df.assign(**convertidas)
+
+    def aplicar_categorias(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Codifica as colunas de baixa cardinalidade como category (modo categórico)"""
+        return converter_categoricas(df, self.categoricas)
+
+    def _converter_data(self, serie: pd.Series) -> pd.Series:
+        """Converte datas com o formato configurado e recorre ao parse flexível nas falhas"""
+        if self.formato_data is None:
+            return pd.to_datetime(serie, errors='coerce', dayfirst=True)
+
+        convertida = pd.to_datetime(serie, format=self.formato_data, errors='coerce')
+        falhas = convertida.isna() & serie.notna()
+        if falhas.any():
+            convertida[falhas] = pd.to_datetime(serie[falhas], errors='coerce', dayfirst=True)
+        return convertida
+
+def converter_categoricas(df: pd.DataFrame, colunas: Iterable[str]) -> pd.DataFrame:
+    """Novo DataFrame com as colunas como category em ordem alfabética de categorias
+
+    Colunas que já são category só têm as categorias reordenadas quando
+    necessário (ex.: dicionários unidos na leitura de vários Parquets).
+    """
+    convertidas = {}
+    for col in colunas:
+        if col not in df.columns:
+            continue
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            if not serie.cat.categories.is_monotonic_increasing:
+                convertidas[col] = serie.cat.reorder_categories(serie.cat.categories.sort_values())
+        else:
+            convertidas[col] = serie.astype('string').astype('category')
+    return df.assign(**convertidas)
+
+def contar_valores(serie: pd.Series) -> pd.Series:
+    """value_counts sem as categorias não observadas (colunas category)"""
+    contagem = serie.value_counts()
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        contagem = contagem[contagem > 0]
+    return contagem
+
+def concatenar_preservando_categorias(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat que mantém category quando os frames têm categorias diferentes
+
+    Sem alinhar as categorias o pandas devolve a coluna como object.
+    """
+    frames = [frame for frame in frames if len(frame.columns)]
+    if len(frames) > 1:
+        colunas = [
+            col for col in frames[0].columns
+            if all(col not in frame.columns or isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)
+        ]
+        for col in colunas:
+            categorias = frames[0][col].cat.categories
+            for frame in frames[1:]:
+                if col in frame.columns:
+                    categorias = categorias.union(frame[col].cat.categories)
+            frames = [
+                frame.assign(**{col: frame[col].cat.set_categories(categorias)})
+                if col in frame.columns and not frame[col].cat.categories.equals(categorias) else frame
+                for frame in frames
+            ]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def compilar_plano_leitura(tipos_dados: Optional[Dict[str, List[str]]] = None) -> PlanoLeitura:
+    """Compila o plano de leitura a partir do mapa de tipos"""
+    tipos_dados = tipos_dados if tipos_dados is not None else config.TIPOS_DADOS
+
+    plano = PlanoLeitura(
+        inteiros=tuple(tipos_dados.get('numeros_inteiros', [])),
+        datas=tuple(tipos_dados.get('datas', [])),
+        textos=tuple(tipos_dados.get('textos', [])),
+        categoricas=tuple(config.COLUNAS_CATEGORICAS),
+        valores_na=tuple(config.VALORES_NA),
+        formato_data=config.FORMATO_DATA
+    )
+
+    logging.getLogger(__name__).debug(
+        f"Plano de leitura compilado ({plano.assinatura}): {len(plano.colunas)} colunas"
+    )
+    return plano
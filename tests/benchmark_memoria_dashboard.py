@@ -0,0 +1,110 @@
+"""Benchmark de memória do dashboard por sessão (src/etl/snapshot_compartilhado.py)
+
+Simula N sessões simultâneas, cada uma com um líder, e mede a memória retida:
+
+- antes: st.cache_data entrega a cada sessão uma cópia (pickle) do relatório,
+  que ainda é copiado ao associar o líder e ao filtrar (take/.copy());
+- depois: um SnapshotCompartilhado por processo (st.cache_resource) e, por
+  sessão, apenas visões (fatias) do fato agrupado por líder.
+
+Uso: python tests/benchmark_memoria_dashboard.py [linhas_relatorio] [sessoes]
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import gc
+import pickle
+import tempfile
+import tracemalloc
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.etl.cubo_metricas import construir_cubo, gravar_cubo, arquivo_cubo
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.relatorio_dashboard import (
+    gravar_relatorio_dashboard, ler_relatorio_dashboard, preparar_relatorio_dashboard
+)
+from src.etl.snapshot_compartilhado import SnapshotCompartilhado
+from src.utils.normalizacao import garantir_provider_normalizado
+
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+POLOS = [f"Polo SP Cidade {i:03d} - P{i:03d}" for i in range(1, 301)]
+LIDERES = [f"Lider {i:02d}" for i in range(30)]
+DATA = date(2025, 7, 22)
+
+def gerar_relatorio(linhas: int, semente: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        'Ordem PagBank': np.arange(linhas),
+        'Provider': rng.choice(POLOS, linhas),
+        'Estado': rng.choice(['SP', 'RJ', 'MG'], linhas),
+        'Cidade': rng.choice([f"Cidade {i}" for i in range(2_000)], linhas),
+        'Último Tracking': rng.choice(['Nova', 'Reencaminhado', 'Em rota', 'Visita agendada'], linhas),
+        'Criação da Ordem': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 200, linhas), unit='D'),
+        'SLA Cliente': rng.integers(0, 15, linhas).astype(float)
+    })
+
+def memoria_atual() -> int:
+    """Bytes alocados pelo Python/numpy (tracemalloc) e pelo pool do Arrow"""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes()
+
+def sessoes_antes(arquivo: Path, dimensao: DimensaoProvider, sessoes: int) -> list:
+    # cache_data guarda o resultado serializado e desserializa uma cópia por sessão
+    cache = pickle.dumps(ler_relatorio_dashboard(arquivo))
+    retidos = [cache]
+    for sessao in range(sessoes):
+        df, indice = pickle.loads(cache)
+        df = dimensao.associar_lider(garantir_provider_normalizado(df))
+        indice.atualizar_lideres(dimensao)
+        lider = LIDERES[sessao % len(LIDERES)]
+        retidos.append((df, indice, indice.linhas_do_lider(df, lider)))
+    return retidos
+
+def sessoes_depois(arquivo: Path, dimensao: DimensaoProvider, sessoes: int) -> list:
+    snapshot = SnapshotCompartilhado.carregar(arquivo, DATA, dimensao)
+    retidos = [snapshot]
+    for sessao in range(sessoes):
+        lider = LIDERES[sessao % len(LIDERES)]
+        retidos.append((snapshot.linhas(lider), snapshot.cubo_do_lider(lider)))
+    return retidos
+
+def medir(funcao, arquivo: Path, dimensao: DimensaoProvider, sessoes: int) -> int:
+    inicio = memoria_atual()
+    retidos = funcao(arquivo, dimensao, sessoes)
+    usado = memoria_atual() - inicio
+    del retidos
+    return usado
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    quantidade_sessoes = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    with tempfile.TemporaryDirectory() as pasta:
+        dimensao = DimensaoProvider(arquivo=Path(pasta) / 'dimensao.parquet')
+        dimensao.atualizar(mapeamento=pd.DataFrame({
+            'Polo + SAP': [polo.removeprefix('Polo ') for polo in POLOS],
+            'Líder PagResolve': [LIDERES[i % len(LIDERES)] for i in range(len(POLOS))]
+        }))
+        df, indice = preparar_relatorio_dashboard(gerar_relatorio(linhas), dimensao)
+        arquivo = Path(pasta) / f"relatorio_{DATA:%Y-%m-%d}.parquet"
+        gravar_cubo(construir_cubo(df, DATA, dimensao), arquivo_cubo(arquivo))
+        gravar_relatorio_dashboard(df, indice, arquivo)
+        del df, indice
+
+        tracemalloc.start()
+        print(f"📊 {linhas:,} ordens, {len(LIDERES)} líderes")
+        print(f"{'Sessões':>8} {'Antes (MB)':>12} {'Depois (MB)':>12} {'Economia (MB)':>14}")
+        for sessoes in sorted({1, 5, 10, quantidade_sessoes}):
+            antes = medir(sessoes_antes, arquivo, dimensao, sessoes)
+            depois = medir(sessoes_depois, arquivo, dimensao, sessoes)
+            print(f"{sessoes:>8} {antes / 1024**2:>12.1f} {depois / 1024**2:>12.1f} "
+                  f"{(antes - depois) / 1024**2:>14.1f}")
+        tracemalloc.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark do upsert da base histórica (SafraTransformer._upsert_por_chave)
+
+Uso: python tests/benchmark_upsert.py [linhas_historico] [linhas_relatorio]
+"""
+import numpy as np
+import pandas as pd
+import logging
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import config
+from src.utils.schema import converter_categoricas
+from src.etl.transform import SafraTransformer
+
+def gerar_base(linhas: int, inicio_chave: int, semente: int) -> pd.DataFrame:
+    """Gera uma base sintética com colunas de atualização e de feedback"""
+    rng = np.random.default_rng(semente)
+    chaves = np.arange(inicio_chave, inicio_chave + linhas)
+    rng.shuffle(chaves)
+
+    return pd.DataFrame({
+        'Ordem PagBank': pd.array(chaves, dtype='Int64'),
+        'SLA Cliente': pd.array(rng.integers(0, 60, linhas), dtype='Int64'),
+        'Provider': pd.array(rng.choice([f'POLO {i:03d}' for i in range(300)], linhas), dtype='string'),
+        'Último Tracking': pd.array(rng.choice(['Nova', 'Reencaminhado', 'Em rota'], linhas), dtype='string'),
+        'Criação da Ordem': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 200, linhas), unit='D'),
+        'Status_Tratativa': pd.array(rng.choice(['Pendente', 'Em tratativa', None], linhas), dtype='string'),
+        'Feedback': pd.array(rng.choice(['Contato feito', 'Aguardando peça', None], linhas), dtype='string'),
+        'Data_Processamento': pd.Timestamp('2025-07-01', tz='America/Sao_Paulo')
+    })
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    linhas_historico = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    linhas_relatorio = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    # 80% do relatório atualiza chaves existentes, 20% são chaves novas
+    historico = gerar_base(linhas_historico, 1, semente=1)
+    atualizadas = int(linhas_relatorio * 0.8)
+    relatorio = pd.concat([
+        gerar_base(atualizadas, 1, semente=2),
+        gerar_base(linhas_relatorio - atualizadas, linhas_historico + 1, semente=3)
+    ], ignore_index=True).drop(columns=config.COLUNAS_FEEDBACK, errors='ignore')
+    relatorio['Data_Processamento'] = pd.Timestamp.now(tz='America/Sao_Paulo')
+    
+    # No modo categórico base e relatório já chegam com colunas category
+    if config.MODO_CATEGORICO:
+        historico = converter_categoricas(historico, config.COLUNAS_CATEGORICAS)
+        relatorio = converter_categoricas(relatorio, config.COLUNAS_CATEGORICAS)
+
+    transformer = SafraTransformer()
+
+    print(f"📊 Histórico: {linhas_historico:,} linhas | Relatório: {linhas_relatorio:,} linhas")
+    inicio = time.perf_counter()
+    resultado = transformer.consolidar_com_historico(relatorio, historico)
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️ Upsert + validações: {duracao:.2f}s")
+
+    # Conferências de corretude
+    chave = 'Ordem PagBank'
+    assert len(resultado) == linhas_historico + (linhas_relatorio - atualizadas)
+    assert not resultado[chave].duplicated().any()
+
+    resultado = resultado.set_index(chave)
+    historico = historico.set_index(chave)
+    relatorio = relatorio.set_index(chave)
+
+    chaves_atualizadas = relatorio.index[:atualizadas]
+    assert resultado.loc[chaves_atualizadas, 'Último Tracking'].equals(relatorio.loc[chaves_atualizadas, 'Último Tracking'])
+    for col in ['Status_Tratativa', 'Feedback', 'Criação da Ordem']:
+        assert resultado.loc[chaves_atualizadas, col].equals(historico.loc[chaves_atualizadas, col]), col
+    assert resultado.loc[relatorio.index[atualizadas:], 'Feedback'].isna().all()
+
+    print("✅ Colunas de atualização aplicadas, feedback preservado, chaves novas inseridas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Teste da compactação da base histórica (src/etl/base_historica.py)
+
+Grava dois arquivos de log com conjuntos de colunas diferentes (o primeiro
+sem 'Ordem SAP' nem 'CEP') e confere que a leitura do log, a compactação
+e a exportação mantêm as colunas do plano de leitura como Int64/string em
+vez de float64/object.
+
+Uso: python tests/testar_compactacao_base.py
+"""
+import pandas as pd
+import tempfile
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import config
+from src.etl.base_historica import BaseHistoricaParticionada
+from src.utils.schema import compilar_plano_leitura
+
+def conferir_tipos(df: pd.DataFrame, plano, origem: str) -> bool:
+    erros = [
+        f"{coluna}: {df[coluna].dtype}" for coluna in df.columns
+        if (coluna in plano.inteiros and str(df[coluna].dtype) != 'Int64')
+        or (coluna in plano.textos and str(df[coluna].dtype) not in ('string', 'category'))
+    ]
+    if erros:
+        print(f"❌ {origem}: {', '.join(erros)}")
+        return False
+    print(f"✅ {origem}: {len(df)} ordens, inteiros em Int64 e textos em string")
+    return True
+
+def main():
+    plano = compilar_plano_leitura()
+    sucesso = True
+
+    with tempfile.TemporaryDirectory() as pasta:
+        config.PROCESSED_DIR = Path(pasta) / 'processed'
+        config.BACKUP_DIR = Path(pasta) / 'backup'
+        base = BaseHistoricaParticionada()
+
+        sem_ordem_sap = plano.aplicar_tipos(pd.DataFrame({
+            'Ordem PagBank': [1, 2],
+            'Provider': ['Polo A - P001', 'Polo B - P002'],
+            'Criação da Ordem': ['01/02/2025', '02/02/2025'],
+            'SLA Cliente': [3, 4]
+        }))
+        com_ordem_sap = plano.aplicar_tipos(pd.DataFrame({
+            'Ordem PagBank': [2, 3],
+            'Ordem SAP': [20, None],
+            'Provider': ['Polo B - P002', 'Polo A - P001'],
+            'Criação da Ordem': ['02/02/2025', '03/02/2025'],
+            'SLA Cliente': [5, None],
+            'CEP': ['01310-100', None]
+        }))
+        base.registrar_alteracoes(sem_ordem_sap)
+        base.registrar_alteracoes(com_ordem_sap)
+
+        sucesso &= conferir_tipos(base.ler(), plano, "Leitura do log")
+
+        base.compactar()
+        lida = base.ler()
+        sucesso &= conferir_tipos(lida, plano, "Base compactada")
+        ordem_sap = lida.set_index('Ordem PagBank')['Ordem SAP'].sort_index()
+        if ordem_sap.astype(object).where(ordem_sap.notna(), None).tolist() != [None, 20, None]:
+            print(f"❌ Valores de 'Ordem SAP' alterados: {ordem_sap.tolist()}")
+            sucesso = False
+
+        arquivo = Path(pasta) / 'exportado.parquet'
+        base.exportar(arquivo)
+        sucesso &= conferir_tipos(pd.read_parquet(arquivo), plano, "Exportação")
+
+    sys.exit(0 if sucesso else 1)
+
+if __name__ == "__main__":
+    main()
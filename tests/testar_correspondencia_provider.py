@@ -0,0 +1,99 @@
+"""Teste da correspondência aproximada de providers (src/etl/correspondencia_provider.py)
+
+Confere decisões conhecidas contra o mapeamento de líderes e mede o tempo
+por consulta com um mapeamento sintético grande (índice invertido, sem
+comparar cada provider com todos os polos).
+
+Uso: python tests/testar_correspondencia_provider.py [quantidade_polos]
+"""
+import numpy as np
+import tempfile
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.etl.correspondencia_provider import (
+    CorrespondenteProvider, METODO_CODIGO_SAP, METODO_CODIGO_SAP_DIVERGENTE, METODO_NGRAMAS,
+    SEM_CORRESPONDENCIA
+)
+
+MAPEAMENTO = [
+    'SP SJ DO RIO PRETO - P114',
+    'SP CAMPINAS 1 LT - P096',
+    'SP CUBATAO - P276',
+    'RJ NITEROI - P210',
+    'BA SALVADOR PITUBA - P150',
+]
+
+CASOS = [
+    ('SP S J DO RIO PRETO - P114', 'SP SJ DO RIO PRETO - P114', METODO_CODIGO_SAP),
+    # Mesmo código, outra cidade: código suspeito não move as ordens para o líder de Cubatão
+    ('SP PRAIA GRANDE - P276', None, METODO_CODIGO_SAP_DIVERGENTE),
+    ('SP CUBATAO  - P276', 'SP CUBATAO - P276', METODO_CODIGO_SAP),
+    ('RJ NITEROI - P211', None, SEM_CORRESPONDENCIA),
+    ('BA SALVADOR  PITUBA', 'BA SALVADOR PITUBA - P150', METODO_NGRAMAS),
+    ('SP SJ DO RIO PRETO', 'SP SJ DO RIO PRETO - P114', METODO_NGRAMAS),
+    ('FEDEX', None, SEM_CORRESPONDENCIA),
+]
+
+def gerar_polos(quantidade: int, semente: int = 42) -> list:
+    rng = np.random.default_rng(semente)
+    letras = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    ufs = ['SP', 'RJ', 'MG', 'BA', 'RS', 'PR', 'GO', 'PE']
+    return [
+        f"{rng.choice(ufs)} {''.join(rng.choice(letras, 8))} {''.join(rng.choice(letras, 6))} - P{i:05d}"
+        for i in range(quantidade)
+    ]
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    sucesso = True
+
+    with tempfile.TemporaryDirectory() as pasta:
+        cache = Path(pasta) / 'correspondencias.parquet'
+        correspondente = CorrespondenteProvider(MAPEAMENTO, arquivo_cache=cache)
+        for nome, esperado, metodo in CASOS:
+            decisao = correspondente.corresponder(nome)
+            if decisao['Correspondente'] == esperado and decisao['Metodo'] == metodo:
+                print(f"✅ {nome!r} → {esperado!r} ({metodo})")
+            else:
+                print(f"❌ {nome!r}: obtido {decisao}")
+                sucesso = False
+
+        correspondente.resolver([nome for nome, _, _ in CASOS])
+        recarregado = CorrespondenteProvider(MAPEAMENTO, arquivo_cache=cache)
+        if len(recarregado._cache) == len(CASOS):
+            print(f"✅ Cache em disco reaproveitado ({len(CASOS)} decisões)")
+        else:
+            print("❌ Cache em disco não reaproveitado")
+            sucesso = False
+
+        if CorrespondenteProvider(MAPEAMENTO[:-1], arquivo_cache=cache)._cache:
+            print("❌ Cache não invalidado após mudança no mapeamento")
+            sucesso = False
+
+        # Leitura pelo dashboard: resolve em memória sem regravar o cache do ETL
+        versao = cache.stat().st_mtime_ns
+        CorrespondenteProvider(MAPEAMENTO[:-1], arquivo_cache=cache, persistir=False).resolver(['FEDEX'])
+        if cache.stat().st_mtime_ns != versao:
+            print("❌ Cache gravado com persistir=False")
+            sucesso = False
+
+    polos = gerar_polos(quantidade)
+    inicio = time.perf_counter()
+    grande = CorrespondenteProvider(polos, arquivo_cache=Path(tempfile.gettempdir()) / 'nao_usado.parquet')
+    duracao_indice = time.perf_counter() - inicio
+
+    consultas = [polo.rsplit(' - ', 1)[0] for polo in polos[:1_000]]
+    inicio = time.perf_counter()
+    acertos = sum(grande.corresponder(nome)['Correspondente'] == polo for nome, polo in zip(consultas, polos))
+    duracao = (time.perf_counter() - inicio) / len(consultas)
+
+    print(f"⏱️ Índice de {quantidade:,} polos: {duracao_indice:.2f}s; "
+          f"{duracao * 1000:.3f} ms por consulta ({acertos}/{len(consultas)} corretas)")
+
+    sys.exit(0 if sucesso else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Teste do cubo de métricas do dashboard (src/etl/cubo_metricas.py)
+
+Confere, para cada líder e cada polo de um relatório sintético, que os KPIs,
+o ranking de atrasos e a contagem por último tracking tirados do cubo são
+iguais aos calculados linha a linha, e compara o tempo dos dois caminhos
+(1ª consulta de cada líder e reexecuções, que reaproveitam o recorte).
+
+Uso: python tests/testar_cubo_metricas.py [linhas_relatorio]
+"""
+import numpy as np
+import pandas as pd
+import tempfile
+import time
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.etl.cubo_metricas import CuboMetricas, construir_cubo
+from src.etl.dimensao_provider import DimensaoProvider
+from src.etl.relatorio_dashboard import preparar_relatorio_dashboard
+from src.utils.schema import contar_valores
+
+POLOS = [f"Polo SP Cidade {i:03d} - P{i:03d}" for i in range(1, 301)]
+LIDERES = [f"Lider {i:02d}" for i in range(20)]
+TRACKINGS = ['Nova', 'Reencaminhado', 'Em rota', 'Aguardando peça', 'Visita agendada', None]
+
+def gerar_relatorio(linhas: int, semente: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    sla = rng.integers(0, 15, linhas).astype(float)
+    sla[rng.random(linhas) < 0.05] = np.nan
+    return pd.DataFrame({
+        'Ordem PagBank': np.arange(linhas),
+        'Provider': rng.choice(POLOS, linhas),
+        'Estado': rng.choice(['SP', 'RJ', 'MG'], linhas),
+        'Último Tracking': rng.choice(np.array(TRACKINGS, dtype=object), linhas),
+        'SLA Cliente': sla
+    })
+
+def metricas_linha_a_linha(df: pd.DataFrame) -> dict:
+    """Cálculo de referência (antigo calcular_metricas_safra do dashboard)"""
+    sla = pd.to_numeric(df['SLA Cliente'], errors='coerce').dropna()
+    if df.empty or sla.empty:
+        return {'total_em_aberto': len(df), 'em_atraso': 0, 'perc_atraso': 0.0, 'sla_medio': 0.0}
+    em_atraso = len(sla[sla >= 2])
+    return {
+        'total_em_aberto': len(df),
+        'em_atraso': em_atraso,
+        'perc_atraso': round(em_atraso / len(df) * 100, 1),
+        'sla_medio': round(sla.mean(), 1)
+    }
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sucesso = True
+
+    with tempfile.TemporaryDirectory() as pasta:
+        dimensao = DimensaoProvider(arquivo=Path(pasta) / 'dimensao.parquet')
+        dimensao.atualizar(mapeamento=pd.DataFrame({
+            'Polo + SAP': [polo.removeprefix('Polo ') for polo in POLOS],
+            'Líder PagResolve': [LIDERES[i % len(LIDERES)] for i in range(len(POLOS))]
+        }))
+        df, indice = preparar_relatorio_dashboard(gerar_relatorio(linhas), dimensao)
+
+    inicio = time.perf_counter()
+    cubo_publicado = construir_cubo(df, date(2025, 7, 22), dimensao)
+    duracao_cubo = time.perf_counter() - inicio
+    print(f"🧮 Cubo: {len(df):,} ordens → {len(cubo_publicado):,} linhas em {duracao_cubo:.2f}s")
+    cubo = CuboMetricas(cubo_publicado).com_lideres(dimensao)
+
+    divergencias = 0
+    for lider in [None] + indice.lideres():
+        df_lider = df if lider is None else indice.linhas_do_lider(df, lider)
+        cubo_lider = cubo if lider is None else cubo.do_lider(lider)
+
+        divergencias += metricas_linha_a_linha(df_lider) != cubo_lider.metricas()
+        sla = pd.to_numeric(df_lider['SLA Cliente'], errors='coerce')
+        divergencias += dict(contar_valores(df_lider[sla >= 2]['Provider'])) != dict(cubo_lider.ranking_atraso())
+        divergencias += list(contar_valores(df_lider['Último Tracking'])) != list(cubo_lider.contagem_tracking())
+
+        if lider is not None:
+            metricas_polos = cubo_lider.metricas_por_polo()
+            for polo in indice.polos_do_lider(lider):
+                divergencias += (metricas_linha_a_linha(indice.linhas_do_polo(df, polo))
+                                 != metricas_polos[indice.chave_do_polo(polo)])
+
+    if divergencias:
+        print(f"❌ {divergencias} divergências entre o cubo e o cálculo linha a linha")
+        sucesso = False
+    else:
+        print(f"✅ KPIs, ranking, tracking e polos iguais para {len(indice.lideres())} líderes")
+
+    # Cubo novo: partição por líder (uma vez por snapshot), 1ª consulta e reexecuções de cada líder
+    inicio = time.perf_counter()
+    cubo = CuboMetricas(cubo_publicado).com_lideres(dimensao)
+    duracao_particao = time.perf_counter() - inicio
+
+    duracoes_cubo = []
+    for _ in range(2):
+        inicio = time.perf_counter()
+        for lider in indice.lideres():
+            cubo_lider = cubo.do_lider(lider)
+            cubo_lider.metricas(), cubo_lider.ranking_atraso(), cubo_lider.contagem_tracking()
+            cubo_lider.metricas_por_polo()
+        duracoes_cubo.append((time.perf_counter() - inicio) / len(indice.lideres()))
+
+    inicio = time.perf_counter()
+    for lider in indice.lideres():
+        df_lider = indice.linhas_do_lider(df, lider)
+        sla = pd.to_numeric(df_lider['SLA Cliente'], errors='coerce')
+        metricas_linha_a_linha(df_lider), contar_valores(df_lider[sla >= 2]['Provider'])
+        contar_valores(df_lider['Último Tracking'])
+        for polo in indice.polos_do_lider(lider):
+            metricas_linha_a_linha(indice.linhas_do_polo(df, polo))
+    duracao_linhas = (time.perf_counter() - inicio) / len(indice.lideres())
+
+    print(f"⏱️ Partição do cubo por líder: {duracao_particao * 1000:.2f} ms (uma vez por snapshot)")
+    print(f"⏱️ Por líder: cubo {duracoes_cubo[0] * 1000:.2f} ms na 1ª consulta, "
+          f"{duracoes_cubo[1] * 1000:.3f} ms nas reexecuções; linha a linha {duracao_linhas * 1000:.2f} ms")
+
+    sys.exit(0 if sucesso else 1)
+
+if __name__ == "__main__":
+    main()
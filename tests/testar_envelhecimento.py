@@ -0,0 +1,74 @@
+"""Teste do envelhecimento vetorizado (src/utils/envelhecimento.py)
+
+Compara dias corridos e úteis com um cálculo linha a linha em Python
+(datetime + conjunto de feriados) e mede o tempo para 1M de ordens. Datas
+futuras dão dias negativos, como o Dias_Em_Aberto original do main.py.
+
+Uso: python tests/testar_envelhecimento.py [quantidade_ordens]
+"""
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.utils.envelhecimento import CalculadoraEnvelhecimento
+
+REFERENCIA = pd.Timestamp('2025-07-14')
+UFS = ['SP', 'RJ', 'RS', 'GO', None]
+
+def gerar_ordens(quantidade: int, semente: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    datas = REFERENCIA - pd.to_timedelta(rng.integers(-5, 400, quantidade), unit='D')
+    datas = pd.Series(datas).mask(rng.random(quantidade) < 0.01)
+    return pd.DataFrame({'Criação da Ordem': datas, 'Estado': rng.choice(UFS, quantidade)})
+
+def dias_uteis_linha(data, uf, feriados: pd.DataFrame) -> int:
+    """Conta dia a dia, pulando fins de semana e feriados BR/UF (negativo para datas futuras)"""
+    abrangencias = {'BR', uf}
+    datas_feriado = set(feriados.loc[feriados['abrangencia'].isin(abrangencias), 'data'].dt.date)
+    inicio, fim = sorted([data.date(), REFERENCIA.date()])
+    dia, total = inicio, 0
+    while dia < fim:
+        if dia.weekday() < 5 and dia not in datas_feriado:
+            total += 1
+        dia += timedelta(days=1)
+    return total if data.date() <= REFERENCIA.date() else -total
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    calculadora = CalculadoraEnvelhecimento()
+    feriados = calculadora.calendario.feriados
+
+    amostra = gerar_ordens(3_000)
+    obtido = calculadora.aplicar(amostra.copy(), REFERENCIA)
+
+    esperado_corridos = [
+        None if pd.isna(d) else (REFERENCIA - d).days for d in amostra['Criação da Ordem']
+    ]
+    esperado_uteis = [
+        None if pd.isna(d) else dias_uteis_linha(d, uf, feriados)
+        for d, uf in zip(amostra['Criação da Ordem'], amostra['Estado'])
+    ]
+
+    sucesso = True
+    for coluna, esperado in [('Dias_Em_Aberto', esperado_corridos), ('Dias_Uteis_Em_Aberto', esperado_uteis)]:
+        esperado = pd.Series(esperado, dtype='Int64')
+        if obtido[coluna].reset_index(drop=True).equals(esperado):
+            print(f"✅ {coluna}: {len(esperado):,} linhas idênticas")
+        else:
+            print(f"❌ {coluna} diverge do cálculo linha a linha")
+            sucesso = False
+
+    ordens = gerar_ordens(quantidade, semente=7)
+    inicio = time.perf_counter()
+    calculadora.aplicar(ordens, REFERENCIA)
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️ Envelhecimento vetorizado de {quantidade:,} ordens: {duracao:.3f}s")
+
+    sys.exit(0 if sucesso else 1)
+
+if __name__ == "__main__":
+    main()
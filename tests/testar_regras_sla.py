@@ -0,0 +1,82 @@
+"""Teste diferencial do motor de regras de SLA (src/utils/regras_sla.py)
+
+Compara a classificação vetorizada com as funções linha a linha do main.py
+(calcular_status_sla / calcular_prioridade) e mede o tempo para 1M de ordens.
+
+Uso: python tests/testar_regras_sla.py [quantidade_ordens]
+"""
+import numpy as np
+import pandas as pd
+import time
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import calcular_status_sla, calcular_prioridade
+from src.utils.regras_sla import MotorRegrasSLA
+
+def classificar_linha_a_linha(df: pd.DataFrame) -> pd.DataFrame:
+    resultado = df.copy()
+    resultado['Status_SLA'] = resultado.apply(calcular_status_sla, axis=1)
+    resultado['Prioridade'] = resultado.apply(calcular_prioridade, axis=1)
+    return resultado
+
+def casos_de_borda() -> list:
+    """Conjuntos com fronteiras exatas, nulos, textos e colunas ausentes"""
+    sla = [0, 1, 5, 5, 5, 10, 10, 3, 7, 2]
+    dias = [0, 0, 4, 5, 6, 8, 9, 2.4, 5.6, 1.6]
+    return [
+        pd.DataFrame({'SLA Cliente': sla, 'Dias_Em_Aberto': dias}),
+        pd.DataFrame({'SLA Cliente': [5.0, np.nan, 3.0], 'Dias_Em_Aberto': [4, 2, np.nan]}),
+        pd.DataFrame({'SLA Cliente': pd.array([5, None, 3], dtype='Int64'),
+                      'Dias_Em_Aberto': pd.array([4, 2, None], dtype='Int64')}),
+        pd.DataFrame({'SLA Cliente': [5, 'abc', None, '7', np.nan, True, pd.NaT],
+                      'Dias_Em_Aberto': [4, 2, 1, 3, 2, 1, 0]}),
+        pd.DataFrame({'SLA Cliente': pd.array(['5', None], dtype='string'),
+                      'Dias_Em_Aberto': [1, 2]}),
+        pd.DataFrame({'Dias_Em_Aberto': [0, 1, -1]}),
+        pd.DataFrame({'SLA Cliente': [0, 4, 10]}),
+        pd.DataFrame({'SLA Cliente': [5, 5], 'Dias_Em_Aberto': pd.to_datetime(['2025-01-01', None])})
+    ]
+
+def gerar_ordens(quantidade: int, semente: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        'SLA Cliente': rng.integers(0, 30, quantidade),
+        'Dias_Em_Aberto': rng.integers(0, 40, quantidade)
+    })
+
+def conferir(df: pd.DataFrame, motor: MotorRegrasSLA, descricao: str) -> bool:
+    esperado = classificar_linha_a_linha(df)
+    obtido = motor.aplicar(df.copy())
+
+    for coluna in ['Status_SLA', 'Prioridade']:
+        diferentes = esperado[coluna].to_numpy() != obtido[coluna].to_numpy()
+        if diferentes.any():
+            print(f"❌ {descricao}: {coluna} diverge em {int(diferentes.sum())} linhas")
+            print(pd.concat([df[diferentes], esperado.loc[diferentes, coluna].rename('esperado'),
+                             obtido.loc[diferentes, coluna].rename('obtido')], axis=1).head(10))
+            return False
+
+    print(f"✅ {descricao}: {len(df):,} linhas idênticas")
+    return True
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    motor = MotorRegrasSLA()
+
+    sucesso = all(
+        conferir(df, motor, f"Caso de borda {i}") for i, df in enumerate(casos_de_borda(), 1)
+    )
+    sucesso &= conferir(gerar_ordens(100_000), motor, "Aleatório")
+
+    ordens = gerar_ordens(quantidade, semente=7)
+    inicio = time.perf_counter()
+    motor.aplicar(ordens)
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️ Classificação vetorizada de {quantidade:,} ordens: {duracao:.3f}s")
+
+    sys.exit(0 if sucesso else 1)
+
+if __name__ == "__main__":
+    main()
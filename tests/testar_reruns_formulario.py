@@ -0,0 +1,84 @@
+"""Reexecuções do dashboard por envio do formulário de justificativas
+
+Simula com o AppTest do Streamlit um líder preenchendo justificativa e ação
+corretiva de todos os seus polos, mais as observações, e enviando. Como no
+navegador, cada campo fora de um st.form dispara uma reexecução do script ao
+ser alterado; campos dentro do form só seguem no envio. O envio ao Logic Apps
+é substituído por uma resposta falsa (nada sai da máquina).
+
+Conta as execuções completas do script (cada uma chama ArmazemSnapshots.datas
+uma vez) entre o primeiro caractere digitado e a confirmação do envio.
+
+Uso: python tests/testar_reruns_formulario.py [posicao_lider]
+Requer um snapshot publicado com líderes associados (python main.py).
+"""
+import logging
+import sys
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).parent.parent
+sys.path.append(str(RAIZ))
+from streamlit.testing.v1 import AppTest
+from src.etl.snapshots import ArmazemSnapshots
+
+def main():
+    posicao_lider = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    if not ArmazemSnapshots().datas():
+        print("❌ Nenhum snapshot publicado - execute o ETL antes (python main.py)")
+        sys.exit(1)
+    logging.disable(logging.CRITICAL)
+
+    execucoes = []
+    datas_original = ArmazemSnapshots.datas
+
+    def datas_contando(self):
+        execucoes.append(1)
+        return datas_original(self)
+
+    enviados = []
+
+    def post_falso(url, json=None, **kwargs):
+        enviados.append(json)
+        return mock.Mock(status_code=202, text='')
+
+    with mock.patch.object(ArmazemSnapshots, 'datas', datas_contando), \
+            mock.patch('requests.post', post_falso):
+        at = AppTest.from_file(str(RAIZ / 'dashboard' / 'app_dashboard.py'), default_timeout=120).run()
+        seletores = [s for s in at.selectbox if s.label.startswith('Selecione')]
+        if not seletores:
+            print(f"❌ Dashboard sem seletor de líder: {[erro.value for erro in [*at.error, *at.exception]]}")
+            sys.exit(1)
+        seletor = seletores[0]
+        lider = seletor.options[posicao_lider]
+        seletor.select_index(posicao_lider).run()
+
+        campos = [
+            posicao for posicao, campo in enumerate(at.text_area)
+            if (campo.key or '').startswith(('just_', 'acao_')) or campo.label == 'Comentários adicionais:'
+        ]
+        inicio = len(execucoes)
+        for posicao in campos:
+            campo = at.text_area[posicao]
+            campo.set_value(f"Texto de teste {posicao}")
+            if not campo.proto.form_id:
+                # Fora de um form o navegador reexecuta o script a cada campo alterado
+                at.run()
+
+        [botao for botao in at.button if botao.label.startswith('🚀')][0].click().run()
+        reexecucoes = len(execucoes) - inicio
+
+    erros = [excecao.value for excecao in at.exception]
+    confirmado = any('Justificativas Enviadas' in elemento.value for elemento in at.markdown)
+    polos = enviados[0]['polos'] if enviados else []
+    completos = len(polos) > 0 and all(polo['justificativa'] and polo['acao_corretiva'] for polo in polos)
+
+    print(f"👤 {lider}: {len(polos)} polos, {len(campos)} campos de texto")
+    print(f"🔁 Execuções completas do script por envio: {reexecucoes}")
+    if erros or not confirmado or not completos:
+        print(f"❌ Envio incompleto (confirmado={confirmado}, campos preenchidos={completos}, erros={erros})")
+        sys.exit(1)
+    print("✅ Envio confirmado com todos os campos preenchidos")
+
+if __name__ == "__main__":
+    main()